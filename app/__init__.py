@@ -2,7 +2,7 @@
 from flask import Flask, render_template, request, current_app
 from flask_login import LoginManager, current_user
 from flask_mail import Mail
-from app.core.models import db, User, Event, Ministry, Media
+from app.core.models import db, Ministry, Media
 from config import Config
 from datetime import datetime
 from flask_migrate import Migrate
@@ -21,9 +21,44 @@ def create_app():
     login_manager.login_view = 'auth.login'
     migrate.init_app(app, db)
     
+    # Tempo, consultas SQL e tamanho de cada requisição (/admin/performance) - antes dos demais hooks
+    from app.utils.request_metrics import init_request_metrics
+    init_request_metrics(app)
+    
+    # Métricas no formato do Prometheus em /metrics (somadas entre os workers do Gunicorn)
+    from app.utils.metrics import init_metrics
+    init_metrics(app)
+    
+    # Sincronização do índice de busca textual
+    from app.utils.search_index import init_search_index
+    from app.utils.member_search import init_member_search
+    init_search_index(app)
+    init_member_search(app)
+    
+    # Cache das configurações do sistema e das filiais
+    from app.utils.settings_cache import init_settings_cache
+    init_settings_cache(app)
+    
+    # Tema da igreja em arquivo CSS compilado (rota /theme/<arquivo>)
+    from app.utils.theme_css import init_theme_css
+    init_theme_css(app)
+    
+    # Compressão das respostas e estáticos com hash (compilar_assets.py)
+    from app.utils.compression import init_compression
+    from app.utils.assets import init_assets
+    init_compression(app)
+    init_assets(app)
+    
+    # Envio da fila de e-mails em segundo plano
+    from app.utils.email_outbox import init_email_outbox
+    init_email_outbox(app)
+    
+    # Usuário logado: uma consulta (cargo, igreja, tema, ministérios)
+    from app.utils.identity import load_identity
+    
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return load_identity(user_id)
     
     # Blueprints - Importações dentro da função para evitar ciclos
     from app.modules.auth.routes import auth_bp
@@ -64,19 +99,13 @@ def create_app():
         now = datetime.now()
         week_later = now + timedelta(days=7)
         
-        if current_user.is_authenticated:
-            public_events = Event.query.filter(
-                Event.ministry_id.is_(None),
-                Event.church_id == current_user.church_id,
-                Event.start_time >= now,
-                Event.start_time <= week_later
-            ).order_by(Event.start_time.asc()).limit(10).all()
+        from app.utils.recurrence import get_occurrences
+        if current_user.is_authenticated and not current_user.church_id:
+            public_events = []
         else:
-            public_events = Event.query.filter(
-                Event.ministry_id.is_(None),
-                Event.start_time >= now,
-                Event.start_time <= week_later
-            ).order_by(Event.start_time.asc()).limit(10).all()
+            church_id = current_user.church_id if current_user.is_authenticated else None
+            public_events = get_occurrences(now, week_later, church_id=church_id,
+                                            ministry_ids=[], include_general=True, limit=10)
         
         return dict(public_events=public_events)
 
@@ -1,6 +1,7 @@
 from sqlalchemy import JSON
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import validates
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 
@@ -71,6 +72,7 @@ class User(db.Model, UserMixin):
     
     # Dados Pessoais Expandidos
     birth_date = db.Column(db.Date)
+    birthday_key = db.Column(db.SmallInteger, nullable=True)  # MMDD do aniversário (ex.: 229 = 29/02), preenchido a partir de birth_date
     baptism_date = db.Column(db.Date, nullable=True)
     conversion_date = db.Column(db.Date, nullable=True)
     gender = db.Column(db.String(20))
@@ -103,6 +105,8 @@ class User(db.Model, UserMixin):
     data_consent = db.Column(db.Boolean, default=False)
     data_consent_date = db.Column(db.DateTime)
     marketing_consent = db.Column(db.Boolean, default=False)
+    weekly_digest = db.Column(db.Boolean, default=False)  # Recebe o resumo semanal por e-mail
+    calendar_feed_version = db.Column(db.Integer, default=0, nullable=False, server_default='0')  # Muda ao gerar novos links de calendário (invalida os antigos)
     
     is_ministry_leader = db.Column(db.Boolean, default=False)
     
@@ -113,6 +117,15 @@ class User(db.Model, UserMixin):
     # Relacionamentos
     ministries = db.relationship('Ministry', secondary=member_ministries, backref=db.backref('members', lazy='dynamic'))
     
+    __table_args__ = (
+        db.Index('ix_user_church_birthday', 'church_id', 'birthday_key'),
+    )
+    
+    @validates('birth_date')
+    def _sync_birthday_key(self, key, value):
+        self.birthday_key = value.month * 100 + value.day if value else None
+        return value
+    
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
     
@@ -157,6 +170,14 @@ class Event(db.Model):
     ministry_id = db.Column(db.Integer, db.ForeignKey('ministry.id'), nullable=True)
     church_id = db.Column(db.Integer, db.ForeignKey('church.id'))
     recurrence = db.Column(db.String(20), default='none')
+    # Regra de repetição (ex.: FREQ=WEEKLY;INTERVAL=1) - ocorrências são calculadas, não gravadas
+    recurrence_rule = db.Column(db.String(100), nullable=True)
+    recurrence_until = db.Column(db.DateTime, nullable=True)
+    recurrence_exceptions = db.Column(JSON, nullable=True)  # Datas canceladas ['YYYY-MM-DD', ...]
+
+    __table_args__ = (
+        db.Index('ix_event_church_start', 'church_id', 'start_time'),
+    )
 
 class Asset(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -336,7 +357,11 @@ class Study(db.Model):
     category = db.Column(db.String(50), default='Geral')
     author_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    
+
+    # Cache do HTML renderizado (Markdown + bleach)
+    content_html = db.Column(db.Text, nullable=True)
+    content_hash = db.Column(db.String(64), nullable=True)  # sha256 do conteúdo + versão do renderizador
+
     questions = db.relationship('StudyQuestion', backref='study', lazy=True)
 
 class StudyQuestion(db.Model):
@@ -448,6 +473,33 @@ class SystemLog(db.Model):
     user = db.relationship('User', backref=db.backref('logs', lazy='dynamic'))
     church = db.relationship('Church', backref=db.backref('logs', lazy='dynamic'))
 
+class EmailOutbox(db.Model):
+    """Fila de e-mails - enviados em segundo plano por app/utils/email_outbox.py"""
+    __tablename__ = 'email_outbox'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    church_id = db.Column(db.Integer, db.ForeignKey('church.id'), nullable=True)
+    to_email = db.Column(db.String(255), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    html_content = db.Column(db.Text, nullable=True)
+    text_content = db.Column(db.Text, nullable=True)
+    category = db.Column(db.String(30), nullable=True)  # verification, password_reset, ...
+    
+    status = db.Column(db.String(20), default='pending')  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    locked_by = db.Column(db.String(32), nullable=True)  # lote que reservou a mensagem
+    locked_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    
+    church = db.relationship('Church', backref=db.backref('outbox', lazy='dynamic'))
+    
+    __table_args__ = (
+        db.Index('ix_email_outbox_status_next', 'status', 'next_attempt_at'),
+    )
+
 class ChurchTheme(db.Model):
     __tablename__ = 'church_themes'
     
@@ -519,6 +571,9 @@ class ChurchTheme(db.Model):
     # CSS personalizado extra
     custom_css = db.Column(db.Text, nullable=True)
     
+    # Arquivo compilado do tema (church-<id>-<hash>.css - ver app/utils/theme_css.py)
+    css_file = db.Column(db.String(100), nullable=True)
+    
     # Metadados
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
@@ -542,11 +597,12 @@ class SystemSetting(db.Model):
     
     @classmethod
     def get(cls, key, default=None):
-        setting = cls.query.filter_by(key=key).first()
-        return setting.value if setting else default
-    
+        # Servido do cache em memória (invalidado a cada alteração - ver app/utils/settings_cache.py)
+        from app.utils.settings_cache import get_setting
+        return get_setting(key, default)
+
     @classmethod
-    def set(cls, key, value, description=None, is_encrypted=False):
+    def set(cls, key, value, description=None, is_encrypted=False, commit=True):
         setting = cls.query.filter_by(key=key).first()
         if setting:
             setting.value = value
@@ -556,7 +612,8 @@ class SystemSetting(db.Model):
         else:
             setting = cls(key=key, value=value, description=description, is_encrypted=is_encrypted)
             db.session.add(setting)
-        db.session.commit()
+        if commit:
+            db.session.commit()
         return setting
     
 # ==================== NOVAS CLASSES PARA MÓDULO BANCÁRIO (NÃO ALTERAM O EXISTENTE) ====================
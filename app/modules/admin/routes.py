@@ -11,13 +11,16 @@ from app.utils.logger import log_action  # <-- ÚNICA LINHA ADICIONADA
 from werkzeug.utils import secure_filename
 import os
 from datetime import datetime
-from PIL import Image, ImageDraw, ImageFont, ImageOps
+from app.utils.lazy_imports import Image, ImageDraw, ImageFont, ImageOps
 from io import BytesIO
 from flask import send_file
 import textwrap  # Para quebrar linhas longas se necessário
 import uuid
 import json
-from sqlalchemy import or_
+from sqlalchemy import or_, func, case
+from app.utils.member_search import member_search_filter
+from app.utils.birthdays import upcoming_birthdays
+from app.utils.recurrence import get_occurrences
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -150,9 +153,7 @@ def admin_dashboard():
     ).join(StudyProgress, Study.id == StudyProgress.study_id).group_by(Study.id).order_by(func.count(StudyProgress.id).desc()).limit(5).all()
     
     # ========== EVENTOS ==========
-    upcoming_events = Event.query.filter(
-        Event.start_time >= datetime.now()
-    ).order_by(Event.start_time.asc()).limit(5).all()
+    upcoming_events = get_occurrences(datetime.now(), limit=5)
     
     # ========== ATIVIDADES RECENTES ==========
     recent_activities = SystemLog.query.order_by(
@@ -279,10 +280,7 @@ def church_dashboard():
         })
     
     # ========== PRÓXIMOS EVENTOS ==========
-    upcoming_events = Event.query.filter(
-        Event.church_id == church.id,
-        Event.start_time >= datetime.now()
-    ).order_by(Event.start_time.asc()).limit(5).all()
+    upcoming_events = get_occurrences(datetime.now(), church_id=church.id, limit=5)
     
     stats = {
         'total_members': total_members,
@@ -366,39 +364,11 @@ def ministry_dashboard(ministry_id):
     ).group_by(MinistryTransaction.category_name).order_by(func.sum(MinistryTransaction.amount).desc()).limit(5).all()
     
     # ========== EVENTOS DO MINISTÉRIO ==========
-    upcoming_events = Event.query.filter(
-        Event.ministry_id == ministry.id,
-        Event.start_time >= datetime.now()
-    ).order_by(Event.start_time.asc()).limit(5).all()
+    upcoming_events = get_occurrences(datetime.now(), church_id=ministry.church_id,
+                                      ministry_ids=[ministry.id], include_general=False, limit=5)
     
     # ========== PRÓXIMOS ANIVERSARIANTES ==========
-    birthday_alerts = []
-    today_date = datetime.now().date()
-    future_limit = today_date + timedelta(days=10)
-    
-    for member in members:
-        if member.birth_date:
-            try:
-                bday_this_year = member.birth_date.replace(year=today_date.year)
-            except ValueError:
-                bday_this_year = member.birth_date.replace(year=today_date.year, day=28)
-            
-            if bday_this_year < today_date:
-                try:
-                    bday_this_year = bday_this_year.replace(year=today_date.year + 1)
-                except ValueError:
-                    bday_this_year = bday_this_year.replace(year=today_date.year + 1, day=28)
-            
-            if today_date <= bday_this_year <= future_limit:
-                days_until = (bday_this_year - today_date).days
-                birthday_alerts.append({
-                    'name': member.name,
-                    'day': member.birth_date.day,
-                    'month': member.birth_date.strftime('%m'),
-                    'is_today': days_until == 0,
-                    'days_until': days_until
-                })
-    birthday_alerts.sort(key=lambda x: x['days_until'])
+    birthday_alerts = upcoming_birthdays(days=10, ministry_ids=[ministry.id], today=today)
     
     stats = {
         'total_members': total_members,
@@ -782,10 +752,8 @@ def edit_church(id):
 @login_required
 def test_church_email(id):
     """Testar configuração de email da congregação"""
-    from flask import current_app
-    import smtplib
-    from email.mime.text import MIMEText
-    from email.mime.multipart import MIMEMultipart
+    from app.utils.email_utils import send_email_now
+    from markupsafe import escape
     
     church = Church.query.get_or_404(id)
     
@@ -802,14 +770,7 @@ def test_church_email(id):
     if not church.smtp_server:
         return jsonify({'success': False, 'message': 'Servidor SMTP não configurado. Salve as configurações primeiro.'}), 400
     
-    try:
-        # Criar mensagem
-        msg = MIMEMultipart()
-        msg['From'] = church.email_from
-        msg['To'] = test_email
-        msg['Subject'] = f'Teste de Email - {church.name}'
-        
-        body = f"""
+    body = f"""
         Este é um email de teste do Ecclesia Master para a congregação {church.name}.
         
         Configurações utilizadas:
@@ -823,24 +784,13 @@ def test_church_email(id):
         
         Data e hora do teste: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
         """
-        
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Conectar e enviar
-        if church.smtp_use_tls:
-            server = smtplib.SMTP(church.smtp_server, church.smtp_port)
-            server.starttls()
-        else:
-            server = smtplib.SMTP_SSL(church.smtp_server, church.smtp_port)
-        
-        server.login(church.smtp_user, church.smtp_password)
-        server.send_message(msg)
-        server.quit()
-        
+    
+    # Envio imediato (fora da fila): o resultado do login/envio é a resposta do teste
+    success, message = send_email_now(church, test_email, f'Teste de Email - {church.name}',
+                                      f'<pre>{escape(body)}</pre>', body)
+    if success:
         return jsonify({'success': True, 'message': 'Email enviado com sucesso!'})
-        
-    except Exception as e:
-        return jsonify({'success': False, 'message': str(e)}), 500
+    return jsonify({'success': False, 'message': message}), 500
 
 @admin_bp.route('/church/delete/<int:id>', methods=['POST'])
 @login_required
@@ -1002,12 +952,9 @@ def system_settings():
         flash('Acesso negado. Apenas administradores globais.', 'danger')
         return redirect(url_for('members.dashboard'))
     
-    from app.core.models import SystemSetting
-    
-    settings = SystemSetting.query.all()
-    settings_dict = {s.key: s.value for s in settings}
+    from app.utils.settings_cache import all_settings
     
-    return render_template('admin/system_settings.html', settings=settings_dict)
+    return render_template('admin/system_settings.html', settings=all_settings())
 
 
 @admin_bp.route('/system-settings/save', methods=['POST'])
@@ -1025,18 +972,20 @@ def save_system_settings():
     
     for key in email_keys:
         value = request.form.get(key, '')
-        SystemSetting.set(key, value)
+        SystemSetting.set(key, value, commit=False)
     
     # Salvar chave da API Gemini
     gemini_key = request.form.get('gemini_api_key', '')
     if gemini_key:
-        SystemSetting.set('gemini_api_key', gemini_key, is_encrypted=True)
+        SystemSetting.set('gemini_api_key', gemini_key, is_encrypted=True, commit=False)
     
     # Salvar configurações gerais
-    SystemSetting.set('site_name', request.form.get('site_name', 'Ecclesia Master'))
-    SystemSetting.set('site_logo', request.form.get('site_logo', ''))
-    SystemSetting.set('timezone', request.form.get('timezone', 'America/Sao_Paulo'))
-    SystemSetting.set('maintenance_mode', request.form.get('maintenance_mode', 'false'))
+    SystemSetting.set('site_name', request.form.get('site_name', 'Ecclesia Master'), commit=False)
+    SystemSetting.set('site_logo', request.form.get('site_logo', ''), commit=False)
+    SystemSetting.set('timezone', request.form.get('timezone', 'America/Sao_Paulo'), commit=False)
+    SystemSetting.set('maintenance_mode', request.form.get('maintenance_mode', 'false'), commit=False)
+    # Um único commit: uma troca do carimbo de versão do cache de configurações
+    db.session.commit()
     
     log_action(
         action='UPDATE',
@@ -1048,6 +997,68 @@ def save_system_settings():
     return jsonify({'success': True})
 
 
+@admin_bp.route('/system-settings/ai-cache', methods=['GET', 'POST'])
+@login_required
+def ai_cache_stats():
+    """Estatísticas (hits/misses deste processo e ocupação) do cache de respostas da IA; POST limpa"""
+    if not is_global_admin():
+        return jsonify({'success': False, 'message': 'Acesso negado'}), 403
+
+    from app.utils import ai_cache
+
+    if request.method == 'POST':
+        removed = ai_cache.clear()
+        log_action(
+            action='DELETE',
+            module='ADMIN',
+            description=f"Cache de IA limpo ({removed} respostas)",
+            church_id=current_user.church_id
+        )
+        return jsonify({'success': True, 'removed': removed})
+
+    return jsonify({'success': True, 'stats': ai_cache.stats()})
+
+
+@admin_bp.route('/performance')
+@login_required
+def performance():
+    """Tempo, consultas SQL e tamanho das últimas requisições atendidas por este processo"""
+    if not is_global_admin():
+        flash('Acesso negado.', 'danger')
+        return redirect(url_for('members.dashboard'))
+
+    from app.utils import request_metrics
+
+    limits = {key: current_app.config.get(key) for key in
+              ('PERF_ENABLED', 'PERF_SLOW_REQUEST_MS', 'PERF_QUERY_LIMIT', 'PERF_SLOW_QUERY_MS')}
+    return render_template('admin/performance.html', data=request_metrics.summary(), limits=limits)
+
+
+@admin_bp.route('/performance/data', methods=['GET', 'POST'])
+@login_required
+def performance_data():
+    """Mesmos dados de /performance em JSON (?raw=1 inclui cada requisição do buffer); POST limpa"""
+    if not is_global_admin():
+        return jsonify({'success': False, 'message': 'Acesso negado'}), 403
+
+    from app.utils import request_metrics
+
+    if request.method == 'POST':
+        removed = request_metrics.clear()
+        log_action(
+            action='DELETE',
+            module='ADMIN',
+            description=f"Métricas de desempenho limpas ({removed} requisições)",
+            church_id=current_user.church_id
+        )
+        return jsonify({'success': True, 'removed': removed})
+
+    data = request_metrics.summary()
+    if request.args.get('raw'):
+        data['records'] = request_metrics.records()
+    return jsonify({'success': True, 'stats': data})
+
+
 @admin_bp.route('/system-settings/test-email', methods=['POST'])
 @login_required
 def test_email():
@@ -1100,11 +1111,19 @@ def list_members():
         return redirect(url_for('members.dashboard'))
     
     # ========== ESTATÍSTICAS GLOBAIS ==========
+    # Uma única consulta agregada em vez de um COUNT por indicador
+    totals = db.session.query(
+        func.count(User.id),
+        func.coalesce(func.sum(case((User.status == 'active', 1), else_=0)), 0),
+        func.coalesce(func.sum(case((User.status == 'pending', 1), else_=0)), 0),
+        db.session.query(func.count(Church.id)).scalar_subquery()
+    ).one()
+    
     stats = {
-        'total': User.query.count(),
-        'active': User.query.filter_by(status='active').count(),
-        'pending': User.query.filter_by(status='pending').count(),
-        'churches': Church.query.count()
+        'total': totals[0],
+        'active': totals[1],
+        'pending': totals[2],
+        'churches': totals[3]
     }
     
     # ========== FILTROS ==========
@@ -1128,11 +1147,7 @@ def list_members():
         query = query.filter(User.church_role_id == role_id)
     
     if search:
-        query = query.filter(or_(
-            User.name.ilike(f'%{search}%'),
-            User.email.ilike(f'%{search}%'),
-            User.phone.ilike(f'%{search}%')
-        ))
+        query = query.filter(member_search_filter(search))
     
     if status_filter:
         query = query.filter(User.status == status_filter)
@@ -1970,6 +1985,7 @@ def log_details(log_id):
 def edit_church_theme(church_id):
     """Configurar tema personalizado da igreja"""
     from app.core.models import ChurchTheme
+    from app.utils.theme_css import build_theme_css
     import os
     
     church = Church.query.get_or_404(church_id)
@@ -2011,6 +2027,8 @@ def edit_church_theme(church_id):
                         except Exception as e:
                             current_app.logger.warning(f"Não foi possível remover o logo {logo_type}: {e}")
             
+            # Volta ao arquivo de tema padrão (compartilhado)
+            theme.css_file = build_theme_css(theme)
             db.session.commit()
             
             log_action(
@@ -2106,6 +2124,8 @@ def edit_church_theme(church_id):
                 file.save(full_path)
                 setattr(theme, f'logo_{logo_type}', relative_path)
         
+        # Compila o CSS do tema (arquivo com hash do conteúdo, servido com cache imutável)
+        theme.css_file = build_theme_css(theme)
         db.session.commit()
         
         log_action(
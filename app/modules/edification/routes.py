@@ -1,112 +1,125 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify, send_file
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify, send_file, Response, abort
 from flask_login import login_required, current_user
 from app.core.models import (db, Devotional, Study, KidsActivity, StudyQuestion, 
                              Media, Ministry, Album, BibleStory, BibleQuiz, User,
                              StudyProgress, StudyHighlight, StudyNote)
 from app.utils.logger import log_action
 from datetime import datetime
-from PIL import Image
 from werkzeug.utils import secure_filename
 from sqlalchemy import func
 import os
 import json
-import pillow_heif
 from app.utils.text_extractor import extract_text
-from app.utils.gemini_service import generate_questions
-import markdown
-import bleach
+from app.utils.pdf_compressor import comprimir_pdf
+from app.utils.gemini_service import generate_questions, generate_questions_chunked
+from app.utils.ai_providers import get_provider, ProviderError
+from app.utils.ai_jobs import run_as_job, report, load_job, public_state, wait_for_change, event_stream, jobs_dir, MAX_POLL_WAIT
+from app.utils.content_render import refresh_study_html, get_study_html
+from app.utils.search_index import search as search_content, search_ids, DOC_TYPES
+from app.utils.lazy_imports import fitz, Image, requests
+from app.utils.metrics import track_upload, track_pdf
 import unicodedata
-from weasyprint import HTML
 from io import BytesIO
-import requests
 import tempfile
 from urllib.parse import urlparse
-import fitz 
 
-def extrair_melhor_imagem_do_pdf(caminho_pdf, largura_minima=200, altura_minima=200):
+# Lado máximo (px) da imagem salva para o quebra-cabeça
+PUZZLE_LADO_MAXIMO = 1200
+
+@track_upload('pdf_image_extract')
+def extrair_melhor_imagem_do_pdf(caminho_pdf, largura_minima=200, altura_minima=200,
+                                 max_paginas=None, lado_maximo=PUZZLE_LADO_MAXIMO):
     """
     Extrai a melhor imagem de um PDF (prioriza a maior em resolução)
+    Escolhe pelas dimensões já informadas em get_images (sem decodificar nada),
+    cada xref é avaliado uma vez e só a vencedora é extraída; depois é reduzida
+    para no máximo `lado_maximo` px. max_paginas limita as páginas analisadas.
     Retorna os bytes da imagem e sua extensão, ou (None, None)
     """
     try:
         doc = fitz.open(caminho_pdf)
-        melhor_imagem = None
-        melhor_area = 0
-        melhor_ext = "jpg"
-        
-        for pagina_num in range(len(doc)):
-            pagina = doc.load_page(pagina_num)
-            imagens = pagina.get_images(full=True)
+        try:
+            melhor_xref = None
+            melhor_area = 0
+            vistos = set()
             
-            for img in imagens:
-                xref = img[0]
-                base_img = doc.extract_image(xref)
-                imagem_bytes = base_img["image"]
-                ext = base_img["ext"]  # jpg, png, etc.
-                
-                # Verificar tamanho da imagem (extraindo do bytes é mais complicado)
-                # Então usamos a área em pixels que o PyMuPDF fornece
-                largura = base_img.get("width", 0)
-                altura = base_img.get("height", 0)
-                area = largura * altura
-                
-                # Filtrar imagens muito pequenas (ícones, bordas)
-                if largura >= largura_minima and altura >= altura_minima:
-                    if area > melhor_area:
+            total_paginas = min(len(doc), max_paginas) if max_paginas else len(doc)
+            for pagina_num in range(total_paginas):
+                # (xref, smask, largura, altura, ...) — sem carregar a página nem a imagem
+                for img in doc.get_page_images(pagina_num, full=True):
+                    xref, largura, altura = img[0], img[2], img[3]
+                    if xref in vistos:
+                        continue
+                    vistos.add(xref)
+                    
+                    # Filtrar imagens muito pequenas (ícones, bordas)
+                    area = largura * altura
+                    if largura >= largura_minima and altura >= altura_minima and area > melhor_area:
                         melhor_area = area
-                        melhor_imagem = imagem_bytes
-                        melhor_ext = ext
-        
-        doc.close()
+                        melhor_xref = xref
+            
+            if not melhor_xref:
+                return None, None
+            
+            base_img = doc.extract_image(melhor_xref)
+        finally:
+            doc.close()
         
-        if melhor_imagem:
-            return melhor_imagem, melhor_ext
-        return None, None
+        return _reduzir_imagem_puzzle(base_img["image"], base_img["ext"], lado_maximo)
         
     except Exception as e:
         print(f"Erro ao extrair imagem do PDF: {e}")
         return None, None
+
+def _reduzir_imagem_puzzle(imagem_bytes, ext, lado_maximo):
+    """Reduz para o tamanho do quebra-cabeça e converte formatos que o navegador não exibe"""
+    try:
+        img = Image.open(BytesIO(imagem_bytes))
+        # Já está em formato web e no tamanho: devolve sem recodificar
+        if ext in ('jpg', 'jpeg', 'png') and (not lado_maximo or max(img.size) <= lado_maximo):
+            return imagem_bytes, ext
+        if lado_maximo:
+            img.thumbnail((lado_maximo, lado_maximo), Image.LANCZOS)
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        saida = BytesIO()
+        img.save(saida, format='JPEG', quality=85, optimize=True)
+        return saida.getvalue(), 'jpg'
+    except Exception as e:
+        # Formato que o Pillow não abre: mantém o original
+        print(f"Não foi possível reduzir a imagem do PDF: {e}")
+        return imagem_bytes, ext
     
 def validar_e_comprimir_pdf(caminho_arquivo, tamanho_maximo_mb=10):
     """
     Verifica o tamanho do PDF e comprime se necessário
-    Retorna: (caminho_do_arquivo_processado, foi_comprimido)
+    Retorna: (caminho_do_arquivo_processado, foi_comprimido, resultado)
+    resultado traz os tamanhos antes/depois (None se não precisou comprimir)
     """
     tamanho_mb = os.path.getsize(caminho_arquivo) / (1024 * 1024)
     
     if tamanho_mb <= tamanho_maximo_mb:
         print(f"✅ PDF dentro do limite: {tamanho_mb:.2f} MB")
-        return caminho_arquivo, False
+        return caminho_arquivo, False, None
     
     print(f"⚠️ PDF muito grande: {tamanho_mb:.2f} MB. Comprimindo...")
     
-    try:
-        from PyPDF2 import PdfReader, PdfWriter
-        
-        # Ler o PDF original
-        leitor = PdfReader(caminho_arquivo)
-        escritor = PdfWriter()
-        
-        # Copiar páginas sem compressão de imagem (PyPDF2 não comprime imagens)
-        for pagina in leitor.pages:
-            escritor.add_page(pagina)
-        
-        # Salvar em arquivo temporário
-        caminho_comprimido = caminho_arquivo.replace('.pdf', '_comprimido.pdf')
-        with open(caminho_comprimido, 'wb') as f:
-            escritor.write(f)
-        
-        tamanho_novo_mb = os.path.getsize(caminho_comprimido) / (1024 * 1024)
-        print(f"✅ PDF comprimido: {tamanho_novo_mb:.2f} MB (redução de {(1 - tamanho_novo_mb/tamanho_mb)*100:.1f}%)")
-        
-        # Substituir o arquivo original pelo comprimido
-        os.replace(caminho_comprimido, caminho_arquivo)
-        
-        return caminho_arquivo, True
-        
-    except Exception as e:
-        print(f"❌ Erro ao comprimir PDF: {str(e)}")
-        return caminho_arquivo, False
+    # Reduz/recomprime as imagens e limpa o arquivo em um processo separado
+    resultado = comprimir_pdf(
+        caminho_arquivo,
+        dpi=current_app.config.get('PDF_COMPRESS_DPI', 150),
+        qualidade=current_app.config.get('PDF_COMPRESS_QUALITY', 75),
+    )
+    
+    if resultado['erro']:
+        print(f"❌ Erro ao comprimir PDF: {resultado['erro']}")
+        return caminho_arquivo, False, resultado
+    
+    tamanho_novo_mb = resultado['tamanho_final'] / (1024 * 1024)
+    print(f"✅ PDF comprimido: {tamanho_mb:.2f} MB → {tamanho_novo_mb:.2f} MB "
+          f"(redução de {resultado['reducao']:.1f}%) em {resultado['segundos']:.1f}s")
+    
+    return caminho_arquivo, resultado['comprimido'], resultado
 
 
 def dividir_texto_para_ia(texto, tamanho_maximo=6000):
@@ -150,20 +163,9 @@ def gerar_imagem_pollinations(prompt_descricao, width=1024, height=1024):
     Retorna os bytes da imagem ou None em caso de erro
     """
     try:
-        # Pollinations aceita prompt em texto puro na URL
-        # Parâmetros: width, height, seed (opcional), model (flux ou turbo)
-        url = f"https://image.pollinations.ai/prompt/{prompt_descricao}?width={width}&height={height}&model=flux"
-        
-        response = requests.get(url, timeout=60)
-        
-        if response.status_code == 200:
-            return response.content  # bytes da imagem
-        print(f"Erro Pollinations: status {response.status_code}")
-        return None
-    except requests.exceptions.Timeout:
-        print("Timeout ao gerar imagem")
-        return None
-    except Exception as e:
+        # Timeout, novas tentativas e circuit breaker ficam na camada de provedores
+        return get_provider('pollinations').generate_image(prompt_descricao, width=width, height=height)
+    except ProviderError as e:
         print(f"Erro ao gerar imagem: {e}")
         return None
 
@@ -219,31 +221,6 @@ def remover_acentos(texto):
     texto = unicodedata.normalize('NFKD', texto).encode('ASCII', 'ignore').decode('ASCII')
     return texto
 
-# Lista de tags HTML permitidas (segurança)
-ALLOWED_TAGS = [
-    'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
-    'p', 'br', 'hr',
-    'strong', 'b', 'em', 'i', 'u', 'mark',
-    'ul', 'ol', 'li',
-    'a', 'img',
-    'blockquote', 'pre', 'code',
-    'table', 'thead', 'tbody', 'tr', 'th', 'td',
-    'div', 'span'
-]
-
-# Atributos permitidos
-ALLOWED_ATTRIBUTES = {
-    'a': ['href', 'title', 'target'],
-    'img': ['src', 'alt', 'title', 'width', 'height'],
-    'div': ['class'],
-    'span': ['class'],
-    'code': ['class'],
-    'pre': ['class']
-}
-
-# Registra suporte a HEIC
-pillow_heif.register_heif_opener()
-
 edification_bp = Blueprint('edification', __name__)
 
 # ============================================
@@ -367,6 +344,7 @@ def can_edit_media(media):
 # FUNÇÃO DE COMPRESSÃO DE IMAGEM
 # ============================================
 
+@track_upload('image_resize')
 def compress_and_resize_image(img):
     """Redimensiona (se maior que 1920px) e comprime imagem para web."""
     max_width = 1920
@@ -503,15 +481,75 @@ def delete_devotional(id):
     flash('Devocional excluído!', 'info')
     return redirect(url_for('edification.list_devotionals'))
 
+# ============================================
+# PROGRESSO DOS JOBS DE IA
+# ============================================
+
+def _own_job_or_404(job_id):
+    job = load_job(job_id)
+    if not job or job['user_id'] != current_user.id:
+        abort(404)
+    return job
+
+@edification_bp.route('/jobs/<job_id>')
+@login_required
+def job_status(job_id):
+    """Estado do job; com ?since=<versão>&wait=<s> aguarda uma mudança (long-poll)"""
+    job = _own_job_or_404(job_id)
+    wait = min(request.args.get('wait', 0, type=float), MAX_POLL_WAIT)
+    since = request.args.get('since', -1, type=int)
+    if wait > 0:
+        job = wait_for_change(job_id, since, wait, jobs_dir()) or job
+    return jsonify(public_state(job))
+
+@edification_bp.route('/jobs/<job_id>/events')
+@login_required
+def job_events(job_id):
+    """Server-Sent Events com as etapas do job"""
+    _own_job_or_404(job_id)
+    stream = event_stream(job_id, jobs_dir(), url_for('edification.finish_job', job_id=job_id))
+    return Response(stream, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@edification_bp.route('/jobs/<job_id>/finish')
+@login_required
+def finish_job(job_id):
+    """Repassa as mensagens do job e redireciona para o resultado"""
+    job = _own_job_or_404(job_id)
+    if job['status'] == 'running':
+        flash('O processamento ainda está em andamento.', 'info')
+        return redirect(request.referrer or url_for('edification.studies'))
+    for category, message in job['flashes']:
+        flash(message, category)
+    return redirect(job['redirect'] or request.referrer or url_for('edification.studies'))
+
 # ============================================
 # ROTAS DE ESTUDOS
 # ============================================
 
+@edification_bp.route('/search')
+@login_required
+def global_search():
+    q = request.args.get('q', '').strip()
+    doc_type = request.args.get('type', '')
+    types = [doc_type] if doc_type in DOC_TYPES else None
+    results = search_content(q, types=types, limit=50) if q else []
+    return render_template('edification/search.html', q=q, doc_type=doc_type, results=results)
+
+@edification_bp.route('/api/search')
+@login_required
+def api_search():
+    q = request.args.get('q', '').strip()
+    types = [t for t in request.args.get('types', '').split(',') if t in DOC_TYPES] or None
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    return jsonify({'query': q, 'results': search_content(q, types=types, limit=limit, offset=offset)})
+
 @edification_bp.route('/studies')
 @login_required
 def studies():
     from app.core.models import StudyProgress
-    from sqlalchemy import or_
+    from sqlalchemy import case
     
     # Parâmetros de busca
     search = request.args.get('search', '')
@@ -521,19 +559,20 @@ def studies():
     
     query = Study.query
     
-    if search:
-        query = query.filter(
-            or_(
-                Study.title.ilike(f'%{search}%'),
-                Study.content.ilike(f'%{search}%')
-            )
-        )
-    
     if category:
         query = query.filter(Study.category == category)
     
-    # Ordenar por data decrescente
-    query = query.order_by(Study.created_at.desc())
+    if search:
+        # Busca textual ordenada por relevância
+        ranked_ids = search_ids(search, 'study')
+        if ranked_ids:
+            ordem = case({study_id: pos for pos, study_id in enumerate(ranked_ids)}, value=Study.id)
+            query = query.filter(Study.id.in_(ranked_ids)).order_by(ordem)
+        else:
+            query = query.filter(db.false())
+    else:
+        # Ordenar por data decrescente
+        query = query.order_by(Study.created_at.desc())
     
     # Paginação
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
@@ -582,13 +621,8 @@ def study_detail(id):
         Study.id != study.id
     ).order_by(Study.created_at.desc()).limit(3).all()
     
-    # Converter conteúdo de Markdown para HTML (apenas para exibição)
-    if study.content:
-        md = markdown.Markdown(extensions=['extra', 'fenced_code', 'tables', 'nl2br'])
-        html_content = md.convert(study.content)
-        content_html = bleach.clean(html_content, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, strip=True)
-    else:
-        content_html = '<p>Nenhum conteúdo disponível.</p>'
+    # HTML renderizado vem do cache (gerado ao criar/editar o estudo)
+    content_html = get_study_html(study)
     
     # Verificar se o estudo já foi concluído
     progress = StudyProgress.query.filter_by(
@@ -606,6 +640,7 @@ def study_detail(id):
 
 @edification_bp.route('/study/add', methods=['GET', 'POST'])
 @login_required
+@run_as_job('Novo estudo')
 def add_study():
     if not can_publish_content():
         flash('Acesso negado.', 'danger')
@@ -622,6 +657,7 @@ def add_study():
             filename = secure_filename(file.filename)
             file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
             file.save(file_path)
+            report('extracting', 'Extraindo texto do arquivo...')
             try:
                 extracted_text = extract_text(file_path)
                 if not content:
@@ -635,6 +671,7 @@ def add_study():
             category=category,
             author_id=current_user.id
         )
+        refresh_study_html(new_study)
         db.session.add(new_study)
         db.session.commit()
         
@@ -652,13 +689,11 @@ def add_study():
         
         if generate_ia:
             question_count = 7
+            report('generating', 'Gerando questões com IA...')
             try:
-                # Verificar tamanho do conteúdo
+                # Conteúdo extenso é processado em trechos paralelos pelo serviço
                 content_for_ai = content
                 
-                if content and len(content) > 8000:
-                    flash(f'Conteúdo muito extenso ({len(content)} caracteres). A IA processará apenas os primeiros 6000 caracteres.', 'warning')
-                
                 if file_path:
                     ai_data = generate_questions(file_path, type='adult', count=question_count, is_file=True)
                 elif content_for_ai and len(content_for_ai.strip()) >= 100:
@@ -670,6 +705,7 @@ def add_study():
                 if "error" in ai_data:
                     flash(f'Erro na IA: {ai_data["error"]}', 'danger')
                 elif "questions" in ai_data:
+                    report('saving', 'Salvando questões...')
                     for q_data in ai_data["questions"]:
                         correct_letter = q_data["correct_option"].upper()
                         new_q = StudyQuestion(
@@ -795,7 +831,8 @@ def review_study_questions(study_id):
             StudyQuestion.query.filter_by(study_id=study_id).delete()
             
             question_count = 7
-            ai_data = generate_questions(study.content, type='adult', count=question_count)
+            ai_data = generate_questions(study.content, type='adult', count=question_count,
+                                         fresh=request.form.get('force_fresh') == 'on')
             
             if "error" in ai_data:
                 flash(f'Erro na IA: {ai_data["error"]}', 'danger')
@@ -963,6 +1000,7 @@ def edit_study(id):
         study.title = request.form.get('title')
         study.content = request.form.get('content')
         study.category = request.form.get('category')
+        refresh_study_html(study)
         
         regenerate_questions = 'regenerate_questions' in request.form
         
@@ -987,10 +1025,9 @@ def edit_study(id):
             
             try:
                 content_for_ai = study.content
-                if content_for_ai and len(content_for_ai) > 8000:
-                    flash(f'Conteúdo muito extenso ({len(content_for_ai)} caracteres). A IA processará apenas os primeiros 6000 caracteres.', 'warning')
                 
-                ai_data = generate_questions(content_for_ai, type='adult', count=7)
+                ai_data = generate_questions(content_for_ai, type='adult', count=7,
+                                             fresh=request.form.get('force_fresh') == 'on')
                 
                 if "error" in ai_data:
                     flash(f'Erro na IA: {ai_data["error"]}', 'danger')
@@ -1255,12 +1292,8 @@ def download_study(id, format):
         if author:
             author_name = author.name
     
-    # Converter conteúdo para HTML
-    if study.content:
-        md = markdown.Markdown(extensions=['extra', 'fenced_code', 'tables'])
-        html_content = md.convert(study.content)
-    else:
-        html_content = '<p>Nenhum conteúdo disponível.</p>'
+    # Conteúdo em HTML (cache do estudo)
+    html_content = get_study_html(study)
     
     # Template HTML para os downloads
     html_template = f"""
@@ -1397,7 +1430,8 @@ def download_study(id, format):
         # Download como PDF
         try:
             from weasyprint import HTML
-            pdf_file = HTML(string=html_template).write_pdf()
+            with track_pdf('study'):
+                pdf_file = HTML(string=html_template).write_pdf()
             return send_file(
                 BytesIO(pdf_file),
                 mimetype='application/pdf',
@@ -1753,6 +1787,7 @@ def manage_kids():
 
 @edification_bp.route('/kids/story/add', methods=['POST'])
 @login_required
+@run_as_job('Nova história')
 def add_bible_story():
     if not can_manage_kids():
         flash('Acesso negado.', 'danger')
@@ -1776,19 +1811,22 @@ def add_bible_story():
         file_ext = os.path.splitext(filename)[1].lower()
         file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
         file.save(file_path)
+        report('uploading')
         
         # Validar tamanho do PDF
         if file_ext == '.pdf':
             tamanho_mb = os.path.getsize(file_path) / (1024 * 1024)
-            if tamanho_mb > 15:
-                flash(f'O PDF tem {tamanho_mb:.1f} MB. O sistema vai comprimi-lo.', 'warning')
-                file_path, comprimido = validar_e_comprimir_pdf(file_path)
+            if tamanho_mb > 10:
+                report('uploading', f'Comprimindo o PDF ({tamanho_mb:.1f} MB)...')
+                file_path, comprimido, resultado = validar_e_comprimir_pdf(file_path)
                 if comprimido:
-                    flash('PDF comprimido com sucesso!', 'success')
-            elif tamanho_mb > 10:
-                flash(f'O PDF tem {tamanho_mb:.1f} MB. O processamento pode ser lento.', 'info')
+                    flash(f'PDF comprimido: {tamanho_mb:.1f} MB → '
+                          f'{resultado["tamanho_final"] / (1024 * 1024):.1f} MB.', 'success')
+                else:
+                    flash(f'O PDF tem {tamanho_mb:.1f} MB. O processamento pode ser lento.', 'info')
         
         # Extrair texto do arquivo
+        report('extracting', 'Extraindo texto do arquivo...')
         try:
             extracted_text = extract_text(file_path)
             if extracted_text and extracted_text.strip():
@@ -1806,8 +1844,9 @@ def add_bible_story():
         os.makedirs(media_folder, exist_ok=True)
         final_path = os.path.join(media_folder, unique_filename)
         
-        import shutil
-        shutil.copy2(file_path, final_path)
+        # Move o arquivo (já comprimido) em vez de copiar
+        os.replace(file_path, final_path)
+        file_path = final_path
         final_image_path = f'uploads/media/{unique_filename}'
         
         flash(f'PDF salvo permanentemente para leitura!', 'success')
@@ -1817,6 +1856,7 @@ def add_bible_story():
         # ========================================
         if generate_puzzle_image and file_ext == '.pdf':
             flash('Procurando ilustrações no PDF...', 'info')
+            report('extracting', 'Procurando ilustrações no PDF...')
             
             imagem_bytes, imagem_ext = extrair_melhor_imagem_do_pdf(final_path)
             
@@ -1935,6 +1975,7 @@ def add_bible_story():
     # ========================================
     elif generate_puzzle_image and (not hasattr(new_story, 'puzzle_image') or not new_story.puzzle_image):
         flash('Gerando imagem para o quebra-cabeça com IA...', 'info')
+        report('generating', 'Gerando imagem do quebra-cabeça com IA...')
         try:
             prompt = f"Biblical children's story illustration: {new_story.title}. {new_story.content[:300]}"
             prompt = prompt.replace('\n', ' ').strip()
@@ -1969,25 +2010,21 @@ def add_bible_story():
                 if len(partes_texto) > 1:
                     flash(f'Conteúdo extenso ({len(content)} caracteres). Processando em {len(partes_texto)} partes.', 'info')
                 
+                report('generating', 'Gerando questões com IA...')
+                # Partes processadas em paralelo; questões repetidas entre partes são descartadas
+                ai_data = generate_questions_chunked(content, type='kids', count=min(7 * len(partes_texto), 21))
                 todas_questoes = []
                 dados_jogo = None
                 
-                for idx, parte in enumerate(partes_texto):
-                    if len(parte.strip()) < 100:
-                        continue
-                    
-                    ai_data = generate_questions(parte, type='kids', count=7)
-                    
-                    if "error" in ai_data:
-                        flash(f'Erro na IA (parte {idx+1}): {ai_data["error"]}', 'danger')
-                        continue
-                    elif "questions" in ai_data and ai_data["questions"]:
-                        todas_questoes.extend(ai_data["questions"])
-                        if not dados_jogo and "game_words" in ai_data:
-                            dados_jogo = ai_data["game_words"]
+                if "error" in ai_data:
+                    flash(f'Erro na IA: {ai_data["error"]}', 'danger')
+                elif ai_data.get("questions"):
+                    todas_questoes = ai_data["questions"]
+                    dados_jogo = ai_data.get("game_words")
                 
                 if todas_questoes:
-                    for q_data in todas_questoes[:21]:
+                    report('saving', 'Salvando questões...')
+                    for q_data in todas_questoes:
                         new_q = BibleQuiz(
                             story_id=new_story.id,
                             question=q_data["question"],
@@ -2109,11 +2146,9 @@ def regenerate_kids_questions(story_id):
         # Gerar novas questões
         try:
             texto_para_ia = story.content
-            if len(texto_para_ia) > 6000:
-                texto_para_ia = texto_para_ia[:6000]
-                flash(f'Conteúdo extenso. Processando os primeiros 6000 caracteres.', 'info')
             
-            ai_data = generate_questions(texto_para_ia, type='kids', count=7)
+            ai_data = generate_questions(texto_para_ia, type='kids', count=7,
+                                         fresh=request.form.get('force_fresh') == 'on')
             
             if "error" in ai_data:
                 flash(f'Erro na IA: {ai_data["error"]}', 'danger')
@@ -2189,6 +2224,7 @@ def generate_puzzle_image(story_id):
 @edification_bp.route('/kids/story/<int:story_id>/regenerate-puzzle-image')
 @edification_bp.route('/kids/story/<int:story_id>/regenerate-puzzle-image/<source>')
 @login_required
+@run_as_job('Imagem do quebra-cabeça')
 def regenerate_puzzle_image(story_id, source=None):
     """Regenera a imagem do quebra-cabeça
     source: 'pdf' (extrai do PDF) ou 'ai' (gera com IA)
@@ -2220,6 +2256,7 @@ def regenerate_puzzle_image(story_id, source=None):
                 return redirect(url_for('edification.edit_bible_story', story_id=story.id))
             
             flash('📄 Procurando ilustrações no PDF...', 'info')
+            report('extracting', 'Procurando ilustrações no PDF...')
             
             if story.image_path.startswith('http'):
                 temp_pdf = download_pdf_from_url(story.image_path)
@@ -2243,6 +2280,7 @@ def regenerate_puzzle_image(story_id, source=None):
         # ========================================
         elif source == 'ai':
             flash('🎨 Gerando ilustração com IA... Isso pode levar alguns segundos.', 'info')
+            report('generating', 'Gerando ilustração com IA...')
             
             prompt = f"Biblical children's story illustration: {story.title}. {story.content[:300]}"
             prompt = prompt.replace('\n', ' ').strip()
@@ -2256,6 +2294,7 @@ def regenerate_puzzle_image(story_id, source=None):
         # SALVAR IMAGEM
         # ========================================
         if imagem_bytes:
+            report('saving', 'Salvando imagem...')
             puzzle_filename = f"puzzle_{story.id}_{source}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{imagem_ext}"
             puzzle_folder = os.path.join(current_app.config['UPLOAD_FOLDER'], 'media', 'puzzles')
             os.makedirs(puzzle_folder, exist_ok=True)
@@ -2301,7 +2340,8 @@ def review_kids_questions(story_id):
             old_questions = [{'id': q.id, 'question': q.question} for q in questions]
             
             BibleQuiz.query.filter_by(story_id=story_id, is_published=False).delete()
-            ai_data = generate_questions(story.content, type='kids', count=7)
+            ai_data = generate_questions(story.content, type='kids', count=7,
+                                         fresh=request.form.get('force_fresh') == 'on')
             if "questions" in ai_data:
                 for q_data in ai_data["questions"]:
                     new_q = BibleQuiz(
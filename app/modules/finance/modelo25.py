@@ -4,15 +4,11 @@ from app.core.models import Transaction, User, Church, db
 from datetime import datetime
 from sqlalchemy import func
 import os
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, Border, Side
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import cm
-from reportlab.lib import colors
+# openpyxl e reportlab são importados nas rotas que os usam (subida mais rápida)
 
 # Se você estiver usando fill_modelo25_pdf de outro arquivo:
 from app.utils.pdf_modelo25 import fill_modelo25_pdf
+from app.utils.metrics import track_pdf
 
 modelo25_bp = Blueprint('modelo25', __name__, url_prefix='/finance/modelo25')
 
@@ -97,6 +93,7 @@ def generate(year):
     filepath = os.path.join(current_app.root_path, 'static', 'uploads', 'receipts', filename)
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
     
+    from openpyxl import Workbook
     wb = Workbook()
     ws = wb.active
     ws.append(['NIF Doador', 'Código', 'Valor Total (€)'])
@@ -157,7 +154,12 @@ def draw_box(c, x, y, w, h, text="", align="left", bold=False):
     else:
         c.drawString(x + 5, y + h/2 - 2, text)
 
+@track_pdf('modelo25_report')
 def generate_official_pdf(church, donations, year, output_path):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+    from reportlab.pdfgen import canvas
+    
     c = canvas.Canvas(output_path, pagesize=A4)
     width, height = A4
     
@@ -240,10 +242,14 @@ def comprovativo(user_id, year):
     filepath = os.path.join(current_app.root_path, 'static', 'uploads', 'receipts', filename)
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
     
-    c = canvas.Canvas(filepath, pagesize=A4)
-    c.setFont("Helvetica-Bold", 16); c.drawCentredString(A4[0]/2, A4[1]-3*cm, "COMPROVATIVO DE DONATIVO")
-    c.setFont("Helvetica", 10); c.drawString(2*cm, A4[1]-5*cm, f"Entidade: {church.name} (NIF: {church.nif})")
-    c.drawString(2*cm, A4[1]-6*cm, f"Doador: {user.name} (NIF: {user.tax_id})")
-    c.setFont("Helvetica-Bold", 12); c.drawString(2*cm, A4[1]-8*cm, f"VALOR TOTAL EM {year}: € {total:.2f}")
-    c.save()
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+    from reportlab.pdfgen import canvas
+    with track_pdf('comprovativo'):
+        c = canvas.Canvas(filepath, pagesize=A4)
+        c.setFont("Helvetica-Bold", 16); c.drawCentredString(A4[0]/2, A4[1]-3*cm, "COMPROVATIVO DE DONATIVO")
+        c.setFont("Helvetica", 10); c.drawString(2*cm, A4[1]-5*cm, f"Entidade: {church.name} (NIF: {church.nif})")
+        c.drawString(2*cm, A4[1]-6*cm, f"Doador: {user.name} (NIF: {user.tax_id})")
+        c.setFont("Helvetica-Bold", 12); c.drawString(2*cm, A4[1]-8*cm, f"VALOR TOTAL EM {year}: € {total:.2f}")
+        c.save()
     return send_file(filepath, as_attachment=True, download_name=filename)
@@ -5,7 +5,6 @@ from app.core.models import (
     MinistryTransaction, TransactionCategory, PaymentMethod, SystemLog,
     BankAccount, MBWay, MinistryCategory, MinistryPaymentMethod, Supplier, Bill
 )
-from app.utils.pdf_gen import generate_receipt, generate_consolidated_receipt
 from app.utils.logger import log_action  # <-- IMPORT DO LOGGER
 from sqlalchemy import or_, func
 import os
@@ -501,6 +500,7 @@ def annual_receipt():
                 flash('Nenhuma contribuição encontrada no período selecionado.', 'warning')
                 return redirect(request.url)
 
+            from app.utils.pdf_gen import generate_consolidated_receipt  # fpdf só quando gera recibo
             filename = generate_consolidated_receipt(current_user, transactions, start_date, end_date)
 
             receipts_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], 'receipts')
@@ -1091,6 +1091,7 @@ def download_receipt(tx_id):
         flash('Acesso negado.', 'danger')
         return redirect(url_for('finance.dashboard'))
     
+    from app.utils.pdf_gen import generate_receipt  # fpdf só quando gera recibo
     filename = generate_receipt(tx)
     
     upload_folder = current_app.config.get('UPLOAD_FOLDER', 'app/static/uploads')
@@ -1,15 +1,23 @@
 # app/modules/members/routes.py
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app, jsonify, abort
 from flask_login import login_required, current_user, logout_user
 from app.core.models import User, Church, Ministry, Event, db, Devotional, Study, ChurchRole
 from app.utils.logger import log_action
 from datetime import datetime, timedelta
-from sqlalchemy import func, or_
+from sqlalchemy import func, or_, case
+from app.utils.member_search import member_search_filter, search_member_ids
+from app.utils.birthdays import upcoming_birthdays, birthdays_by_month
+from app.utils.recurrence import get_occurrences, apply_recurrence, form_value as recurrence_form_value
+from app.utils.calendar_feed import make_feed_token, load_feed_token, get_feed
+from app.utils import notifications
 from werkzeug.utils import secure_filename
 import os
 
 members_bp = Blueprint('members', __name__)
 
+# Máximo de opções carregadas nos seletores de membros (o resto via /members/api/search)
+MEMBER_PICKER_LIMIT = 200
+
 def is_ministry_leader(ministry):
     """Verifica se o usuário atual é líder/vice ou está na lista extra"""
     if not current_user.is_authenticated:
@@ -56,12 +64,9 @@ def dashboard():
     recent_studies = Study.query.order_by(Study.created_at.desc()).limit(3).all()
     ministry_ids = [m.id for m in current_user.ministries]
     week_later = datetime.now() + timedelta(days=7)
-    personal_agenda = Event.query.filter(
-        (Event.church_id == current_user.church_id) & 
-        ((Event.ministry_id == None) | (Event.ministry_id.in_(ministry_ids))) &
-        (Event.start_time >= datetime.now()) &
-        (Event.start_time <= week_later)
-    ).order_by(Event.start_time.asc()).all()
+    personal_agenda = get_occurrences(datetime.now(), week_later,
+                                      church_id=current_user.church_id,
+                                      ministry_ids=ministry_ids)
     
     is_global_admin = current_user.church_role and current_user.church_role.name == 'Administrador Global'
     is_pastor = current_user.church_role and current_user.church_role.is_lead_pastor
@@ -98,42 +103,12 @@ def dashboard():
 
     birthday_alerts = []
     if is_authorized_for_alerts:
-        today_date = datetime.now().date()
-        future_limit = today_date + timedelta(days=10)
-        
         if is_global_admin or is_pastor:
-            target_ministries = Ministry.query.filter_by(church_id=current_user.church_id).all()
+            target_ministry_ids = [m.id for m in Ministry.query.with_entities(Ministry.id).filter_by(church_id=current_user.church_id)]
         else:
-            target_ministries = led_ministries_list
+            target_ministry_ids = [m.id for m in led_ministries_list]
             
-        if target_ministries:
-            seen_members = set()
-            for ministry in target_ministries:
-                for member in ministry.members:
-                    if member.birth_date and member.id not in seen_members:
-                        try:
-                            bday_this_year = member.birth_date.replace(year=today_date.year)
-                        except ValueError:
-                            bday_this_year = member.birth_date.replace(year=today_date.year, day=28)
-                        
-                        if bday_this_year < today_date:
-                            try:
-                                bday_this_year = bday_this_year.replace(year=today_date.year + 1)
-                            except ValueError:
-                                bday_this_year = bday_this_year.replace(year=today_date.year + 1, day=28)
-
-                        if today_date <= bday_this_year <= future_limit:
-                            days_until = (bday_this_year - today_date).days
-                            birthday_alerts.append({
-                                'name': member.name,
-                                'day': member.birth_date.day,
-                                'month': member.birth_date.strftime('%m'),
-                                'ministry': ministry.name,
-                                'is_today': days_until == 0,
-                                'days_until': days_until
-                            })
-                            seen_members.add(member.id)
-            birthday_alerts.sort(key=lambda x: x['days_until'])
+        birthday_alerts = upcoming_birthdays(days=10, ministry_ids=target_ministry_ids, today=today)
     
     # Galeria Recente
     recent_media = Media.query.filter(
@@ -205,6 +180,7 @@ def edit_profile():
         current_user.concelho = request.form.get('concelho')
         current_user.localidade = request.form.get('localidade')
         current_user.education_level = request.form.get('education_level')
+        current_user.weekly_digest = 'weekly_digest' in request.form
         
         file = request.files.get('profile_photo')
         if file and file.filename:
@@ -258,11 +234,14 @@ def ministry_manage_members(ministry_id):
         return redirect(url_for('members.my_led_ministries'))
     
     current_members = ministry.members.all()
+    # Em congregações grandes a lista é limitada; o restante é encontrado pela busca (typeahead)
     available_members = User.query.filter(
         User.church_id == current_user.church_id,
         User.status == 'active',
         ~User.ministries.any(Ministry.id == ministry_id)
-    ).order_by(User.name).all()
+    ).order_by(User.name).limit(MEMBER_PICKER_LIMIT + 1).all()
+    has_more_members = len(available_members) > MEMBER_PICKER_LIMIT
+    available_members = available_members[:MEMBER_PICKER_LIMIT]
     
     total_members = len(current_members)
     gender_count = db.session.query(User.gender, func.count(User.id)).filter(
@@ -275,6 +254,7 @@ def ministry_manage_members(ministry_id):
                            available_members=available_members,
                            total_members=total_members,
                            gender_count=gender_count,
+                           has_more_members=has_more_members,
                            is_leader=is_leader)
 
 @members_bp.route('/ministry/add', methods=['GET', 'POST'])
@@ -433,18 +413,14 @@ def agenda():
     
     # 🔥 SE TEM PERMISSÃO TOTAL, VÊ TODOS OS EVENTOS DA IGREJA
     if is_global_admin or is_lead_pastor or can_manage_all_events:
-        events = Event.query.filter(
-            Event.church_id == current_user.church_id,
-            Event.start_time >= datetime.now() - timedelta(hours=24)
-        ).order_by(Event.start_time.asc()).all()
+        events = get_occurrences(datetime.now() - timedelta(hours=24),
+                                 church_id=current_user.church_id)
     else:
         # Usuário comum: vê apenas eventos gerais + dos ministérios que participa
         ministry_ids = [m.id for m in current_user.ministries]
-        events = Event.query.filter(
-            (Event.church_id == current_user.church_id) & 
-            ((Event.ministry_id == None) | (Event.ministry_id.in_(ministry_ids))) &
-            (Event.start_time >= datetime.now() - timedelta(hours=24))
-        ).order_by(Event.start_time.asc()).all()
+        events = get_occurrences(datetime.now() - timedelta(hours=24),
+                                 church_id=current_user.church_id,
+                                 ministry_ids=ministry_ids)
     
     # Buscar ministérios para o filtro (todos para quem tem permissão, apenas os que participa para outros)
     if is_global_admin or is_lead_pastor or can_manage_all_events:
@@ -452,33 +428,63 @@ def agenda():
     else:
         ministries = current_user.ministries
     
+    # Links privados para assinar a agenda em apps de calendário
+    calendar_feeds = []
+    if current_user.church_id:
+        calendar_feeds.append({
+            'name': 'Eventos gerais da igreja',
+            'url': url_for('members.calendar_feed', token=make_feed_token(current_user), _external=True)
+        })
+        for m in current_user.ministries:
+            calendar_feeds.append({
+                'name': m.name,
+                'url': url_for('members.calendar_feed', token=make_feed_token(current_user, m.id), _external=True)
+            })
+    
     return render_template('members/agenda.html', 
                          events=events,
-                         ministries=ministries)
+                         ministries=ministries,
+                         calendar_feeds=calendar_feeds)
+
+@members_bp.route('/calendar/<token>.ics')
+def calendar_feed(token):
+    """Feed iCalendar privado (sem login; o token assinado identifica o membro)"""
+    loaded = load_feed_token(token)
+    if not loaded:
+        abort(404)
+    user, church_id, ministry_id = loaded
+    
+    feed = get_feed(church_id, ministry_id, host=request.host)
+    response = current_app.response_class(feed['body'], mimetype='text/calendar')
+    response.headers['Content-Disposition'] = 'inline; filename="agenda.ics"'
+    response.headers['Cache-Control'] = 'private, max-age=300'
+    response.set_etag(feed['etag'])
+    response.last_modified = feed['last_modified']
+    # Responde 304 quando o calendário já tem esta versão
+    return response.make_conditional(request)
+
+@members_bp.route('/calendar/regenerate', methods=['POST'])
+@login_required
+def regenerate_calendar_feeds():
+    """Gera novos links de calendário; os anteriores deixam de funcionar"""
+    current_user.calendar_feed_version = (current_user.calendar_feed_version or 0) + 1
+    db.session.commit()
+    
+    log_action(
+        action='UPDATE',
+        module='MEMBERS',
+        description="Links de calendário regenerados",
+        new_values={'calendar_feed_version': current_user.calendar_feed_version}
+    )
+    
+    flash('Novos links de calendário gerados. Atualize as assinaturas nos seus aplicativos.', 'success')
+    return redirect(url_for('members.agenda'))
 
-def create_recurring_events(base_event, recurrence_type, count=12):
-    """Gera ocorrências futuras para um evento recorrente"""
-    for i in range(1, count):
-        if recurrence_type == 'weekly':
-            new_start = base_event.start_time + timedelta(weeks=i)
-            new_end = base_event.end_time + timedelta(weeks=i) if base_event.end_time else None
-        elif recurrence_type == 'monthly':
-            new_start = base_event.start_time + timedelta(days=30*i)
-            new_end = base_event.end_time + timedelta(days=30*i) if base_event.end_time else None
-        else:
-            break
-            
-        new_event = Event(
-            title=base_event.title,
-            description=base_event.description,
-            start_time=new_start,
-            end_time=new_end,
-            location=base_event.location,
-            ministry_id=base_event.ministry_id,
-            church_id=base_event.church_id,
-            recurrence='none'  # Os eventos gerados não são recorrentes
-        )
-        db.session.add(new_event)
+def parse_recurrence_until(value):
+    """Data final da repetição (fim do dia) a partir do formulário"""
+    if not value:
+        return None
+    return datetime.combine(datetime.strptime(value, '%Y-%m-%d').date(), datetime.max.time().replace(microsecond=0))
 
 @members_bp.route('/event/add', methods=['GET', 'POST'])
 @members_bp.route('/ministry/<int:id>/event/add', methods=['GET', 'POST'])
@@ -590,14 +596,11 @@ def add_event(id=None):
                 end_time=end_time,
                 location=request.form.get('location'),
                 ministry_id=selected_ministry.id if selected_ministry else None,
-                church_id=current_user.church_id,
-                recurrence=recurrence
+                church_id=current_user.church_id
             )
+            # A série fica guardada como regra; as ocorrências são calculadas na agenda
+            apply_recurrence(new_event, recurrence, parse_recurrence_until(request.form.get('recurrence_until')))
             db.session.add(new_event)
-            
-            if recurrence != 'none':
-                create_recurring_events(new_event, recurrence)
-            
             db.session.commit()
             
             log_action(
@@ -643,6 +646,8 @@ def add_general_event():
 @login_required
 def edit_event(id):
     event = Event.query.get_or_404(id)
+    if event.church_id != current_user.church_id:
+        abort(404)
     
     # 🔥 VERIFICAR PERMISSÃO
     is_global_admin = current_user.church_role and current_user.church_role.name == 'Administrador Global'
@@ -673,7 +678,7 @@ def edit_event(id):
             'start_time': str(event.start_time),
             'end_time': str(event.end_time) if event.end_time else None,
             'location': event.location,
-            'recurrence': event.recurrence,
+            'recurrence': event.recurrence_rule,
             'ministry_id': event.ministry_id
         }
         
@@ -685,7 +690,8 @@ def edit_event(id):
         event.end_time = datetime.strptime(end_time_str, '%Y-%m-%dT%H:%M') if end_time_str else None
         
         event.location = request.form.get('location')
-        event.recurrence = request.form.get('recurrence', 'none')
+        apply_recurrence(event, request.form.get('recurrence', 'none'),
+                         parse_recurrence_until(request.form.get('recurrence_until')))
         
         # 🔥 PERMITIR MUDAR O MINISTÉRIO DO EVENTO (apenas para admins)
         ministry_id = request.form.get('ministry_id')
@@ -714,12 +720,15 @@ def edit_event(id):
     
     return render_template('members/edit_event.html', 
                          event=event,
+                         recurrence_value=recurrence_form_value(event),
                          ministries=ministries)
 
 @members_bp.route('/event/<int:id>/delete', methods=['POST'])
 @login_required
 def delete_event(id):
     event = Event.query.get_or_404(id)
+    if event.church_id != current_user.church_id:
+        abort(404)
     is_authorized = (current_user.church_role and (current_user.church_role.name == 'Administrador Global' or current_user.church_role.is_lead_pastor)) or \
                     (event.ministry and is_ministry_leader(event.ministry)) or \
                     current_user.can_manage_events
@@ -743,6 +752,45 @@ def delete_event(id):
     flash('Evento excluído!', 'success')
     return redirect(url_for('members.agenda'))
 
+@members_bp.route('/event/<int:id>/skip', methods=['POST'])
+@login_required
+def skip_event_occurrence(id):
+    """Cancela uma única ocorrência de um evento recorrente"""
+    event = Event.query.get_or_404(id)
+    if event.church_id != current_user.church_id:
+        abort(404)
+    is_authorized = (current_user.church_role and (current_user.church_role.name == 'Administrador Global' or current_user.church_role.is_lead_pastor)) or \
+                    (event.ministry and is_ministry_leader(event.ministry)) or \
+                    current_user.can_manage_events
+    
+    if not is_authorized or not event.recurrence_rule:
+        flash('Acesso negado.', 'danger')
+        return redirect(url_for('members.agenda'))
+    
+    try:
+        occurrence_date = datetime.strptime(request.form.get('date', ''), '%Y-%m-%d').date().isoformat()
+    except ValueError:
+        flash('Data inválida.', 'danger')
+        return redirect(url_for('members.agenda'))
+    
+    # Reatribuir a lista para o SQLAlchemy detectar a alteração no JSON
+    exceptions = list(event.recurrence_exceptions or [])
+    if occurrence_date not in exceptions:
+        exceptions.append(occurrence_date)
+        event.recurrence_exceptions = sorted(exceptions)
+        db.session.commit()
+        
+        log_action(
+            action='UPDATE',
+            module='EVENT',
+            description=f"Ocorrência cancelada: {event.title} em {occurrence_date}",
+            new_values={'id': event.id, 'skipped_date': occurrence_date},
+            church_id=event.church_id
+        )
+    
+    flash('Ocorrência removida da agenda!', 'success')
+    return redirect(request.referrer or url_for('members.agenda'))
+
 @members_bp.route('/my-church/members')
 @login_required
 def church_members():
@@ -751,13 +799,19 @@ def church_members():
         return redirect(url_for('members.dashboard'))
     
     # ========== ESTATÍSTICAS (TOTAIS REAIS) ==========
-    query_base = User.query.filter_by(church_id=current_user.church_id)
+    # Uma única consulta agregada em vez de um COUNT por indicador
+    totals = db.session.query(
+        func.count(User.id),
+        func.coalesce(func.sum(case((User.status == 'active', 1), else_=0)), 0),
+        func.coalesce(func.sum(case((User.status == 'pending', 1), else_=0)), 0),
+        func.count(User.baptism_date)
+    ).filter(User.church_id == current_user.church_id).one()
     
     stats = {
-        'total': query_base.count(),
-        'active': query_base.filter_by(status='active').count(),
-        'pending': query_base.filter_by(status='pending').count(),
-        'baptized': query_base.filter(User.baptism_date.isnot(None)).count()
+        'total': totals[0],
+        'active': totals[1],
+        'pending': totals[2],
+        'baptized': totals[3]
     }
     
     # ========== FILTROS (para a tabela) ==========
@@ -775,11 +829,7 @@ def church_members():
     
     # Aplicar filtros
     if search:
-        query = query.filter(or_(
-            User.name.ilike(f'%{search}%'),
-            User.email.ilike(f'%{search}%'),
-            User.phone.ilike(f'%{search}%')
-        ))
+        query = query.filter(member_search_filter(search))
     
     if role_id:
         query = query.filter(User.church_role_id == int(role_id))
@@ -820,6 +870,50 @@ def church_members():
                            stats=stats,  # ← NOVO: estatísticas reais
                            pagination=pagination)
 
+@members_bp.route('/api/search')
+@login_required
+def api_member_search():
+    """Typeahead de membros da congregação (nome, email ou telefone)"""
+    q = request.args.get('q', '').strip()
+    limit = min(request.args.get('limit', 10, type=int), 50)
+    ministry_id = request.args.get('exclude_ministry', type=int)
+    
+    ministry = Ministry.query.get(ministry_id) if ministry_id else None
+    if ministry:
+        allowed = ministry.church_id == current_user.church_id and (is_ministry_leader(ministry) or can_manage_ministries())
+    else:
+        allowed = can_manage_members()
+    if not allowed:
+        return jsonify({'error': 'Acesso negado.'}), 403
+    
+    if not q:
+        return jsonify({'query': q, 'results': []})
+    
+    # Buscar alguns a mais para compensar os já inscritos no ministério
+    ids = search_member_ids(q, church_id=current_user.church_id, limit=limit * 2 if ministry else limit)
+    members = {m.id: m for m in User.query.filter(User.id.in_(ids)).all()} if ids else {}
+    excluded = {m.id for m in ministry.members.with_entities(User.id)} if ministry else set()
+    
+    results = []
+    for user_id in ids:
+        member = members.get(user_id)
+        if not member or member.id in excluded:
+            continue
+        if ministry and member.status != 'active':
+            continue
+        results.append({
+            'id': member.id,
+            'name': member.name,
+            'email': member.email,
+            'phone': member.phone,
+            'status': member.status,
+            'role': member.church_role.name if member.church_role else None
+        })
+        if len(results) >= limit:
+            break
+    
+    return jsonify({'query': q, 'results': results})
+
 @members_bp.route('/member/promote/<int:id>', methods=['GET', 'POST'])
 @login_required
 def promote_member(id):
@@ -1077,10 +1171,8 @@ def ministry_agenda(ministry_id):
         flash('Acesso negado.', 'danger')
         return redirect(url_for('members.my_led_ministries'))
     
-    events = Event.query.filter(
-        Event.ministry_id == ministry_id,
-        Event.start_time >= datetime.utcnow()
-    ).order_by(Event.start_time.asc()).all()
+    events = get_occurrences(datetime.utcnow(), church_id=ministry.church_id,
+                             ministry_ids=[ministry_id], include_general=False)
     
     return render_template(
         'members/ministry_agenda.html',
@@ -1102,28 +1194,15 @@ def birthday_agenda(ministry_id=None):
         if not (is_leader or is_global_admin or is_pastor):
             flash('Acesso negado.', 'danger')
             return redirect(url_for('members.dashboard'))
-        members = ministry.members.all()
+        agenda = birthdays_by_month(ministry_id=ministry.id, active_only=False)
         title = f"Aniversariantes - {ministry.name}"
     else:
         if not (is_global_admin or is_pastor):
             flash('Acesso negado.', 'danger')
             return redirect(url_for('members.dashboard'))
-        members = User.query.filter_by(church_id=current_user.church_id, status='active').all()
+        agenda = birthdays_by_month(church_id=current_user.church_id)
         title = "Agenda Anual de Aniversariantes"
 
-    agenda = {i: [] for i in range(1, 13)}
-    for member in members:
-        if member.birth_date:
-            month = member.birth_date.month
-            agenda[month].append({
-                'name': member.name,
-                'day': member.birth_date.day,
-                'phone': member.phone
-            })
-    
-    for month in agenda:
-        agenda[month].sort(key=lambda x: x['day'])
-
     month_names = {
         1: 'Janeiro', 2: 'Fevereiro', 3: 'Março', 4: 'Abril',
         5: 'Maio', 6: 'Junho', 7: 'Julho', 8: 'Agosto',
@@ -1136,6 +1215,87 @@ def birthday_agenda(ministry_id=None):
                            title=title,
                            ministry=ministry)
 
+@members_bp.route('/notify', methods=['GET', 'POST'])
+@members_bp.route('/ministry/<int:ministry_id>/notify', methods=['GET', 'POST'])
+@login_required
+def send_notification(ministry_id=None):
+    """Comunicado por e-mail para a igreja, um ministério, um cargo ou aniversariantes"""
+    ministry = None
+    if ministry_id:
+        ministry = Ministry.query.get_or_404(ministry_id)
+        if ministry.church_id != current_user.church_id or not (is_ministry_leader(ministry) or can_manage_members()):
+            flash('Acesso negado.', 'danger')
+            return redirect(url_for('members.dashboard'))
+    elif not can_manage_members():
+        flash('Acesso negado.', 'danger')
+        return redirect(url_for('members.dashboard'))
+    
+    church = current_user.church
+    ministries = [ministry] if ministry else Ministry.query.filter_by(church_id=church.id).order_by(Ministry.name).all()
+    roles = [] if ministry else ChurchRole.query.filter_by(church_id=church.id, is_active=True).order_by(ChurchRole.name).all()
+    
+    form = request.form
+    audience = form.get('audience', 'ministry' if ministry else 'church')
+    preview = None
+    
+    if request.method == 'POST':
+        birthday_days = form.get('birthday_days', type=int) or 7
+        selected_ministry = ministry.id if ministry else (form.get('ministry_id', type=int) if audience == 'ministry' else None)
+        selected_role = form.get('role_id', type=int) if audience == 'role' and not ministry else None
+        if selected_ministry and not any(m.id == selected_ministry for m in ministries):
+            abort(404)
+        if selected_role and not any(r.id == selected_role for r in roles):
+            abort(404)
+        # Público sem o ministério/cargo escolhido nunca vira "toda a congregação"
+        incomplete = (audience not in notifications.AUDIENCES
+                      or (audience == 'ministry' and not selected_ministry)
+                      or (audience == 'role' and not selected_role))
+        recipients = [] if incomplete else notifications.resolve_recipients(
+            church.id,
+            ministry_id=selected_ministry,
+            role_id=selected_role,
+            birthday_days=min(birthday_days, 60) if audience == 'birthdays' else None
+        )
+        subject = (form.get('subject') or '').strip()
+        body = (form.get('body') or '').strip()
+        
+        if incomplete:
+            flash('Escolha o ministério ou o cargo que vai receber o comunicado.', 'warning')
+        elif not subject or not body:
+            flash('Informe o assunto e a mensagem.', 'warning')
+        elif not recipients:
+            flash('Nenhum membro ativo com e-mail encontrado para esse público.', 'warning')
+        elif form.get('action') == 'send':
+            try:
+                total = notifications.send_notification(church, subject, body, recipients)
+            except ValueError as e:
+                flash(str(e), 'danger')
+            else:
+                log_action(
+                    action='CREATE',
+                    module='NOTIFICATIONS',
+                    description=f"Comunicado enviado para {total} membro(s): {subject}",
+                    new_values={'audience': audience, 'ministry_id': selected_ministry, 'recipients': total},
+                    church_id=church.id
+                )
+                flash(f'Comunicado colocado na fila para {total} membro(s). O envio acontece em segundo plano.', 'success')
+                return redirect(url_for('members.my_led_ministries') if ministry else url_for('members.church_members'))
+        else:
+            try:
+                sample = notifications.render_messages(church, subject, body, recipients[:1])[0]
+            except ValueError as e:
+                flash(str(e), 'danger')
+            else:
+                preview = {'total': len(recipients), 'names': [r.name for r in recipients[:30]], 'sample': sample}
+    
+    return render_template('members/send_notification.html',
+                           ministry=ministry,
+                           ministries=ministries,
+                           roles=roles,
+                           audiences=notifications.AUDIENCES,
+                           audience=audience,
+                           preview=preview)
+
 @members_bp.route('/logout')
 @login_required
 def logout():
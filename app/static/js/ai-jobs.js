@@ -0,0 +1,128 @@
+// static/js/ai-jobs.js
+// Formulários/links com data-ai-job são enviados em segundo plano (_async=1):
+// o servidor responde com o id do job e esta tela mostra as etapas (SSE ou
+// long-poll) até abrir o resultado. Sem JavaScript, o envio continua normal.
+(function() {
+    const PROGRESS = {queued: 5, started: 10, uploading: 25, extracting: 40, generating: 65, saving: 90, done: 100, error: 100};
+    let modal = null;
+
+    function getModal() {
+        if (modal) return modal;
+        const el = document.createElement('div');
+        el.className = 'modal fade';
+        el.tabIndex = -1;
+        el.setAttribute('data-bs-backdrop', 'static');
+        el.setAttribute('data-bs-keyboard', 'false');
+        el.innerHTML = `
+            <div class="modal-dialog modal-dialog-centered">
+                <div class="modal-content border-0 rounded-4 shadow">
+                    <div class="modal-body p-4 text-center">
+                        <div class="spinner-border text-primary mb-3" role="status"></div>
+                        <h5 class="fw-bold mb-2" data-job-label>Processando...</h5>
+                        <p class="text-muted mb-3" data-job-message>Enviando...</p>
+                        <div class="progress" style="height: 8px;">
+                            <div class="progress-bar progress-bar-striped progress-bar-animated" data-job-bar style="width: 5%"></div>
+                        </div>
+                        <small class="text-muted d-block mt-3">Você pode continuar usando o sistema em outra aba.</small>
+                    </div>
+                </div>
+            </div>`;
+        document.body.appendChild(el);
+        modal = {el: el, instance: new bootstrap.Modal(el)};
+        return modal;
+    }
+
+    function show(label) {
+        // Fecha o modal do formulário (ex.: "Nova História") antes de abrir o de progresso
+        document.querySelectorAll('.modal.show').forEach(function(m) {
+            const inst = bootstrap.Modal.getInstance(m);
+            if (inst) inst.hide();
+        });
+        const m = getModal();
+        m.el.querySelector('[data-job-label]').textContent = label || 'Processando...';
+        update({stage: 'queued', message: 'Enviando...'});
+        m.instance.show();
+    }
+
+    function update(state) {
+        const m = getModal();
+        if (state.label) m.el.querySelector('[data-job-label]').textContent = state.label;
+        if (state.message) m.el.querySelector('[data-job-message]').textContent = state.message;
+        m.el.querySelector('[data-job-bar]').style.width = (PROGRESS[state.stage] || 50) + '%';
+    }
+
+    function finish(state) {
+        update(state);
+        window.location.href = state.finish_url;
+    }
+
+    function poll(job, since) {
+        const url = job.status_url + '?wait=20&since=' + since;
+        fetch(url, {credentials: 'same-origin'})
+            .then(function(r) { return r.json(); })
+            .then(function(state) {
+                if (state.status !== 'running') return finish(state);
+                update(state);
+                poll(job, state.version);
+            })
+            .catch(function() { setTimeout(function() { poll(job, since); }, 3000); });
+    }
+
+    function follow(job) {
+        if (!window.EventSource) return poll(job, -1);
+        const source = new EventSource(job.events_url);
+        let version = -1;
+        source.addEventListener('progress', function(e) {
+            const state = JSON.parse(e.data);
+            version = state.version;
+            update(state);
+        });
+        source.addEventListener('done', function(e) {
+            source.close();
+            finish(JSON.parse(e.data));
+        });
+        // Fim normal da conexão (o servidor limita a duração): abre outra
+        source.addEventListener('timeout', function() { source.close(); follow(job); });
+        // Conexão caiu (proxy) ou job não encontrado: continua por long-poll
+        const fallback = function() { source.close(); poll(job, version); };
+        source.addEventListener('missing', fallback);
+        source.onerror = fallback;
+    }
+
+    function start(url, options, label, onFail) {
+        show(label);
+        options.credentials = 'same-origin';
+        options.headers = {'X-Requested-With': 'XMLHttpRequest'};
+        fetch(url, options)
+            .then(function(r) {
+                if (r.status === 202) return r.json().then(follow);
+                // Servidor processou de forma síncrona: seguir para onde ele mandou
+                window.location.href = r.url;
+            })
+            .catch(function() {
+                getModal().instance.hide();
+                onFail();
+            });
+    }
+
+    document.addEventListener('submit', function(e) {
+        const form = e.target;
+        if (!form.matches('form[data-ai-job]')) return;
+        e.preventDefault();
+        const data = new FormData(form);
+        data.append('_async', '1');
+        form.querySelectorAll('[type=submit]').forEach(function(b) { b.disabled = true; });
+        start(form.action || window.location.href, {method: 'POST', body: data}, form.dataset.aiJob, function() {
+            form.removeAttribute('data-ai-job');
+            form.submit();
+        });
+    });
+
+    document.addEventListener('click', function(e) {
+        const link = e.target.closest('a[data-ai-job]');
+        if (!link) return;
+        e.preventDefault();
+        const url = link.href + (link.href.indexOf('?') === -1 ? '?' : '&') + '_async=1';
+        start(url, {method: 'GET'}, link.dataset.aiJob, function() { window.location.href = link.href; });
+    });
+})();
@@ -0,0 +1,121 @@
+// Tema claro/escuro e instalação do PWA (usado em todas as páginas - base.html)
+// ========== TEMA ==========
+function updateIcons(theme) {
+    const iconDesktop = document.getElementById('theme-icon');
+    const iconMobile = document.getElementById('theme-icon-mobile');
+    const className = theme === 'dark' ? 'bi bi-sun' : 'bi bi-moon-stars';
+    if(iconDesktop) iconDesktop.className = className;
+    if(iconMobile) iconMobile.className = className;
+}
+
+function toggleTheme() {
+    const html = document.documentElement;
+    if (html.getAttribute('data-theme') === 'dark') {
+        html.removeAttribute('data-theme');
+        updateIcons('light');
+        localStorage.setItem('theme', 'light');
+    } else {
+        html.setAttribute('data-theme', 'dark');
+        updateIcons('dark');
+        localStorage.setItem('theme', 'dark');
+    }
+}
+
+const savedTheme = localStorage.getItem('theme') || 'light';
+if (savedTheme === 'dark') {
+    document.documentElement.setAttribute('data-theme', 'dark');
+    updateIcons('dark');
+} else {
+    updateIcons('light');
+}
+
+window.updateThemePreview = function(variable, value) {
+    document.documentElement.style.setProperty(variable, value);
+};
+
+// ========== PWA INSTALAÇÃO ==========
+(function() {
+    let deferredPrompt = null;
+    const installButton = document.getElementById('installButton');
+    const helpButton = document.getElementById('showInstallHelpBtn');
+
+    // Detectar dispositivo
+    function detectDevice() {
+        const userAgent = navigator.userAgent || navigator.vendor || window.opera;
+        if (/iPad|iPhone|iPod/.test(userAgent) && !window.MSStream) return 'ios';
+        if (/android/i.test(userAgent)) return 'android';
+        if (/Windows|Mac|Linux/.test(userAgent)) return 'desktop';
+        return 'other';
+    }
+
+    // Mostrar instruções
+    function showInstallInstructions() {
+        const device = detectDevice();
+        
+        const androidDiv = document.getElementById('androidInstructions');
+        const iosDiv = document.getElementById('iosInstructions');
+        const desktopDiv = document.getElementById('desktopInstructions');
+        const otherDiv = document.getElementById('otherInstructions');
+        
+        if (androidDiv) androidDiv.style.display = 'none';
+        if (iosDiv) iosDiv.style.display = 'none';
+        if (desktopDiv) desktopDiv.style.display = 'none';
+        if (otherDiv) otherDiv.style.display = 'none';
+        
+        if (device === 'ios' && iosDiv) iosDiv.style.display = 'block';
+        else if (device === 'android' && androidDiv) androidDiv.style.display = 'block';
+        else if (device === 'desktop' && desktopDiv) desktopDiv.style.display = 'block';
+        else if (otherDiv) otherDiv.style.display = 'block';
+        
+        const modalEl = document.getElementById('installHelpModal');
+        if (modalEl) new bootstrap.Modal(modalEl).show();
+    }
+
+    // Registrar Service Worker
+    if ('serviceWorker' in navigator) {
+        window.addEventListener('load', () => {
+            navigator.serviceWorker.register('/static/sw.js')
+                .then(registration => console.log('ServiceWorker OK:', registration.scope))
+                .catch(error => console.log('ServiceWorker ERRO:', error));
+        });
+    }
+
+    // Evento de instalação (Chrome/Edge)
+    window.addEventListener('beforeinstallprompt', (e) => {
+        console.log('📱 beforeinstallprompt disparado!');
+        e.preventDefault();
+        deferredPrompt = e;
+        if (installButton) {
+            installButton.style.display = 'block';
+            if (helpButton) helpButton.style.display = 'none';
+        }
+    });
+
+    // Botão de instalação
+    if (installButton) {
+        installButton.addEventListener('click', async () => {
+            if (deferredPrompt) {
+                deferredPrompt.prompt();
+                const { outcome } = await deferredPrompt.userChoice;
+                console.log(`Usuário ${outcome === 'accepted' ? 'aceitou' : 'recusou'} a instalação`);
+                deferredPrompt = null;
+                installButton.style.display = 'none';
+            }
+        });
+    }
+
+    // Botão de ajuda
+    if (helpButton) {
+        const device = detectDevice();
+        if (device === 'ios') {
+            helpButton.style.display = 'block';
+        } else {
+            setTimeout(() => {
+                if (installButton && installButton.style.display !== 'block') {
+                    helpButton.style.display = 'block';
+                }
+            }, 3000);
+        }
+        helpButton.addEventListener('click', showInstallInstructions);
+    }
+})();
@@ -0,0 +1,166 @@
+# app/utils/ai_cache.py
+"""
+Cache em disco das respostas de IA (questões, palavras dos jogos).
+
+Chave: provedor + modelo + versão do prompt + hash do conteúdo + quantidade + tipo.
+Cada resposta fica em um arquivo JSON em instance/ai_cache (ou AI_CACHE_DIR);
+o mtime marca o último uso e os menos usados recentemente são removidos quando
+o total passa de AI_CACHE_MAX_MB. Compartilhado entre workers do mesmo servidor.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from flask import current_app
+
+from app.utils.metrics import count_cache
+
+DEFAULT_MAX_MB = 50
+
+_stats = {'hits': 0, 'misses': 0, 'fresh': 0, 'writes': 0, 'evictions': 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name, n=1):
+    with _stats_lock:
+        _stats[name] += n
+
+
+def cache_dir():
+    path = current_app.config.get('AI_CACHE_DIR') or os.path.join(current_app.instance_path, 'ai_cache')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def content_hash(content):
+    """sha256 de texto ou bytes"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def file_hash(file_path):
+    """sha256 do conteúdo de um arquivo (lido em blocos)"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_key(provider, model, prompt_version, content_sha, count, type):
+    raw = f"{provider}|{model}|{prompt_version}|{content_sha}|{count}|{type}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _path(key):
+    return os.path.join(cache_dir(), f"{key}.json")
+
+
+def get(key):
+    """Resposta em cache ou None (atualiza o último uso)"""
+    path = _path(key)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+        os.utime(path, None)
+    except (OSError, ValueError):
+        _count('misses')
+        count_cache('ai_response', 'miss')
+        return None
+    _count('hits')
+    count_cache('ai_response', 'hit')
+    return entry.get('response')
+
+
+def put(key, response, **meta):
+    """Grava a resposta (escrita atômica) e aplica o limite de tamanho"""
+    entry = dict(meta, response=response, created_at=time.time())
+    path = _path(key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        _count('writes')
+    except OSError as e:
+        current_app.logger.warning(f"Cache de IA: falha ao gravar {key}: {e}")
+        return
+    _evict()
+
+
+def _entries():
+    """[(mtime, tamanho, caminho)] dos arquivos do cache"""
+    entries = []
+    for item in os.scandir(cache_dir()):
+        if item.name.endswith('.json'):
+            try:
+                st = item.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, item.path))
+    return entries
+
+
+def _evict():
+    """Remove as entradas usadas há mais tempo até caber em AI_CACHE_MAX_MB"""
+    max_bytes = int(current_app.config.get('AI_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024
+    entries = _entries()
+    total = sum(size for _, size, _ in entries)
+    if total <= max_bytes:
+        return
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            removed += 1
+        except OSError:
+            pass
+    _count('evictions', removed)
+
+
+def cached_call(key, producer, fresh=False, **meta):
+    """
+    Retorna a resposta em cache ou chama producer() e guarda o resultado.
+    fresh=True ignora o cache (mas grava a nova resposta). Erros não são guardados.
+    """
+    if fresh:
+        _count('fresh')
+    else:
+        response = get(key)
+        if response is not None:
+            current_app.logger.info(f"Cache de IA: hit {key[:12]}")
+            return response
+
+    response = producer()
+    if isinstance(response, dict) and 'error' not in response:
+        put(key, response, **meta)
+    return response
+
+
+def stats():
+    """Contadores do processo + ocupação do cache em disco"""
+    entries = _entries()
+    with _stats_lock:
+        data = dict(_stats)
+    lookups = data['hits'] + data['misses']
+    data['hit_rate'] = round(data['hits'] / lookups, 3) if lookups else None
+    data['entries'] = len(entries)
+    data['size_bytes'] = sum(size for _, size, _ in entries)
+    return data
+
+
+def clear():
+    """Apaga todas as entradas; retorna quantas foram removidas"""
+    removed = 0
+    for _, _, path in _entries():
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
@@ -0,0 +1,300 @@
+# app/utils/ai_jobs.py
+"""
+Execução em segundo plano das telas que chamam a IA (novo estudo, nova história,
+regenerar imagem do quebra-cabeça).
+
+Quando o formulário é enviado pelo JavaScript com _async=1, a rota responde na
+hora com o id do job e a própria view é executada numa thread, num contexto de
+requisição reconstruído (mesmo formulário, arquivos e usuário). A view informa
+as etapas com report('generating') etc.; o navegador acompanha por SSE
+(/edification/jobs/<id>/events) ou long-poll (/edification/jobs/<id>) e, ao
+final, abre /edification/jobs/<id>/finish, que repassa os flashes e redireciona.
+
+O estado de cada job fica em um arquivo JSON em instance/ai_jobs (ou
+AI_JOBS_DIR), visível para todos os workers do servidor. Enquanto roda, o
+processo dono (pid) regrava o arquivo a cada JOB_HEARTBEAT segundos; um job
+"running" sem atualização há mais de JOB_STALE_AFTER (worker que morreu ou foi
+reiniciado num deploy) é tratado como erro, e o navegador para de esperar.
+"""
+import contextvars
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from io import BytesIO
+
+from flask import current_app, request, session, jsonify, url_for
+from flask_login import current_user, login_user
+from werkzeug.datastructures import MultiDict
+
+JOB_TTL = 3600           # segundos que o estado fica disponível
+POLL_INTERVAL = 0.5      # intervalo de leitura do estado no SSE/long-poll
+# SSE e long-poll ocupam uma thread do worker: ficam abaixo do timeout do
+# Gunicorn (30s, gunicorn.conf.py) e o navegador reconecta ao fim de cada um
+STREAM_TIMEOUT = 25      # duração máxima de uma conexão SSE
+MAX_POLL_WAIT = 20       # espera máxima de um long-poll
+HEARTBEAT = 15           # comentário periódico para manter a conexão SSE viva
+JOB_HEARTBEAT = 10       # regravação do estado enquanto o job espera ou roda
+JOB_STALE_AFTER = 3 * STREAM_TIMEOUT  # job "running" sem atualização: worker perdido
+
+STAGES = {
+    'queued': 'Na fila...',
+    'started': 'Iniciando...',
+    'uploading': 'Processando o arquivo enviado...',
+    'extracting': 'Extraindo texto e imagens...',
+    'generating': 'Gerando com IA... isso pode levar alguns segundos.',
+    'saving': 'Salvando...',
+    'done': 'Concluído!',
+    'error': 'Não foi possível concluir.',
+}
+LOST_MESSAGE = 'O processamento foi interrompido (servidor reiniciado). Tente novamente.'
+
+_JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+_current_job = contextvars.ContextVar('ai_job', default=None)
+_executor = None
+_executor_lock = threading.Lock()
+
+
+# ============================================
+# ESTADO
+# ============================================
+
+def jobs_dir():
+    path = current_app.config.get('AI_JOBS_DIR') or os.path.join(current_app.instance_path, 'ai_jobs')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _path(job_id, directory=None):
+    return os.path.join(directory or jobs_dir(), f"{job_id}.json")
+
+
+def _save(job):
+    with job['_lock']:
+        job['updated_at'] = time.time()
+        path = _path(job['id'], job.get('_dir'))
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({k: v for k, v in job.items() if not k.startswith('_')}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+def load_job(job_id, directory=None):
+    """Estado do job ou None (job "running" abandonado pelo worker volta como erro)"""
+    if not _JOB_ID.match(job_id or ''):
+        return None
+    try:
+        with open(_path(job_id, directory), 'r', encoding='utf-8') as f:
+            job = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if job.get('status') == 'running' and time.time() - job.get('updated_at', 0) > JOB_STALE_AFTER:
+        job.update(status='error', stage='error', message=STAGES['error'],
+                   version=job['version'] + 1, flashes=[['danger', LOST_MESSAGE]])
+    return job
+
+
+def _cleanup(directory):
+    """Remove estados de jobs antigos"""
+    limit = time.time() - JOB_TTL
+    for item in os.scandir(directory):
+        try:
+            if item.stat().st_mtime < limit:
+                os.remove(item.path)
+        except OSError:
+            pass
+
+
+def job_counts(directory=None):
+    """Jobs ainda guardados (última hora) por status: {'running': 2, 'done': 5, ...}"""
+    counts = {}
+    try:
+        entries = list(os.scandir(directory or jobs_dir()))
+    except OSError:
+        return counts
+    for item in entries:
+        if not item.name.endswith('.json'):
+            continue
+        job = load_job(item.name[:-5], os.path.dirname(item.path))
+        if job:
+            status = job.get('status', 'unknown')
+            counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def create_job(user_id, label):
+    directory = jobs_dir()
+    _cleanup(directory)
+    job = {
+        'id': uuid.uuid4().hex,
+        'user_id': user_id,
+        'label': label,
+        'status': 'running',
+        'stage': 'queued',
+        'message': STAGES['queued'],
+        'version': 0,
+        'flashes': [],
+        'redirect': None,
+        'created_at': time.time(),
+        'pid': os.getpid(),
+        '_dir': directory,
+        '_lock': threading.Lock(),
+        '_finished': threading.Event(),
+    }
+    _save(job)
+    return job
+
+
+def report(stage, message=None):
+    """Atualiza a etapa do job em execução (não faz nada fora de um job)"""
+    job = _current_job.get()
+    if job is None:
+        return
+    job['stage'] = stage
+    job['message'] = message or STAGES.get(stage, stage)
+    job['version'] += 1
+    try:
+        _save(job)
+    except OSError:
+        pass
+
+
+def public_state(job):
+    """Dados enviados ao navegador (sem os flashes)"""
+    state = {k: job[k] for k in ('id', 'label', 'status', 'stage', 'message', 'version')}
+    if job['status'] != 'running':
+        state['finish_url'] = url_for('edification.finish_job', job_id=job['id'])
+    return state
+
+
+# ============================================
+# EXECUÇÃO
+# ============================================
+
+def _get_executor(app):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=int(app.config.get('AI_JOB_WORKERS', 4)),
+                                           thread_name_prefix='ai-job')
+        return _executor
+
+
+def _heartbeat(job):
+    """Mantém updated_at recente enquanto o job espera na fila ou roda (ex.: esperando a IA)"""
+    while not job['_finished'].wait(JOB_HEARTBEAT):
+        try:
+            _save(job)
+        except OSError:
+            pass
+
+
+def _run(app, job, view, view_args, path, method, query, form, files, base_url):
+    from app.core.models import User
+
+    token = _current_job.set(job)
+    flashes = []
+    try:
+        data = MultiDict(form)
+        for name, filename, mimetype, content in files:
+            data.add(name, (BytesIO(content), filename, mimetype))
+
+        with app.test_request_context(path, method=method, query_string=query, data=data, base_url=base_url):
+            user = User.query.get(job['user_id'])
+            if user:
+                login_user(user, force=True)
+            report('started')
+            response = app.make_response(view(**view_args))
+            flashes = session.get('_flashes', [])
+            if 300 <= response.status_code < 400:
+                job['redirect'] = response.headers.get('Location')
+        job['status'] = 'done'
+        job['stage'] = 'done'
+        job['message'] = STAGES['done']
+    except Exception as e:
+        app.logger.exception(f"Erro no job {job['id']} ({job['label']})")
+        flashes = list(flashes) + [('danger', f'Erro ao processar: {str(e)}')]
+        job['status'] = 'error'
+        job['stage'] = 'error'
+        job['message'] = STAGES['error']
+    finally:
+        job['_finished'].set()
+        _current_job.reset(token)
+    job['flashes'] = [list(item) for item in flashes]
+    job['version'] += 1
+    _save(job)
+
+
+def run_as_job(label):
+    """
+    Decorator de view: com _async=1 (enviado pelo ai-jobs.js) a view roda em
+    segundo plano e a resposta é 202 com o id do job; sem ele, roda como antes.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            if request.values.get('_async') != '1' or _current_job.get() is not None:
+                return view(**kwargs)
+
+            app = current_app._get_current_object()
+            form = [(k, v) for k, v in request.form.items(multi=True) if k != '_async']
+            query = [(k, v) for k, v in request.args.items(multi=True) if k != '_async']
+            # Os arquivos precisam ser lidos agora: o stream fecha ao fim da requisição
+            files = [(name, f.filename, f.mimetype, f.read())
+                     for name, storages in request.files.lists() for f in storages if f and f.filename]
+
+            job = create_job(current_user.id, label)
+            threading.Thread(target=_heartbeat, args=(job,), name=f"ai-job-heartbeat-{job['id'][:8]}",
+                             daemon=True).start()
+            _get_executor(app).submit(_run, app, job, view, kwargs, request.path, request.method,
+                                      query, form, files, request.host_url)
+            return jsonify({
+                'job_id': job['id'],
+                'status_url': url_for('edification.job_status', job_id=job['id']),
+                'events_url': url_for('edification.job_events', job_id=job['id']),
+            }), 202
+        return wrapper
+    return decorator
+
+
+# ============================================
+# ACOMPANHAMENTO (SSE / long-poll)
+# ============================================
+
+def wait_for_change(job_id, since, timeout, directory):
+    """Aguarda o job passar da versão `since` (ou terminar) até `timeout` segundos"""
+    deadline = time.monotonic() + timeout
+    while True:
+        job = load_job(job_id, directory)
+        if job is None or job['version'] > since or job['status'] != 'running' or time.monotonic() >= deadline:
+            return job
+        time.sleep(POLL_INTERVAL)
+
+
+def event_stream(job_id, directory, finish_url):
+    """Gerador SSE: um evento 'progress' a cada mudança e 'done' no final"""
+    version = -1
+    started = last_sent = time.monotonic()
+    while time.monotonic() - started < STREAM_TIMEOUT:
+        job = load_job(job_id, directory)
+        if job is None:
+            yield "event: missing\ndata: {}\n\n"
+            return
+        if job['version'] != version:
+            version = job['version']
+            state = {k: job[k] for k in ('id', 'label', 'status', 'stage', 'message', 'version')}
+            if job['status'] != 'running':
+                state['finish_url'] = finish_url
+                yield f"event: done\ndata: {json.dumps(state, ensure_ascii=False)}\n\n"
+                return
+            yield f"event: progress\ndata: {json.dumps(state, ensure_ascii=False)}\n\n"
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent > HEARTBEAT:
+            yield ": ping\n\n"
+            last_sent = time.monotonic()
+        time.sleep(POLL_INTERVAL)
+    yield "event: timeout\ndata: {}\n\n"
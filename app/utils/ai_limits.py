@@ -0,0 +1,122 @@
+# app/utils/ai_limits.py
+"""
+Limites por provedor de IA (requisições por minuto + chamadas simultâneas).
+
+Compartilhado por todas as threads do processo, com um limitador por provedor e
+chave de API. Configurável por variáveis de ambiente: <PROVEDOR>_RPM,
+<PROVEDOR>_MAX_CONCURRENCY, <PROVEDOR>_BATCH_RPM e <PROVEDOR>_BATCH_CONCURRENCY
+(ex.: GEMINI_RPM=15).
+
+Scripts em lote devem rodar dentro de batch_mode(): usam só parte das vagas
+simultâneas e um orçamento próprio de requisições por minuto (BATCH_RPM, padrão
+1/4 do RPM), deixando o restante para quem está usando o sistema.
+
+Os limites valem POR PROCESSO (não há estado compartilhado entre processos):
+cada worker do Gunicorn e cada script em lote tem os seus. Para não passar da
+cota da chave, divida-a: <PROVEDOR>_RPM dos workers = (cota - BATCH_RPM) / nº de
+workers, e o script em lote fica com BATCH_RPM. Ex.: cota de 15/min, 2 workers
+e GEMINI_BATCH_RPM=3 -> GEMINI_RPM=6 no servidor web.
+"""
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_LIMITS = {
+    'gemini': {'rpm': 15, 'concurrency': 4},
+    'pollinations': {'rpm': 30, 'concurrency': 2},
+    # Também usado pela fila de e-mails (um limitador por igreja)
+    'smtp': {'rpm': 60, 'concurrency': 1},
+}
+
+
+_batch = contextvars.ContextVar('ai_batch_mode', default=False)
+
+
+@contextmanager
+def batch_mode():
+    """Marca as chamadas feitas dentro do bloco como processamento em lote"""
+    token = _batch.set(True)
+    try:
+        yield
+    finally:
+        _batch.reset(token)
+
+
+def in_batch_mode():
+    return _batch.get()
+
+
+class _TokenBucket:
+    """Requisições por minuto, com rajada de até um minuto de requisições"""
+
+    def __init__(self, rpm):
+        self.rpm = max(int(rpm), 1)
+        self.capacity = self.rpm
+        self.tokens = float(self.rpm)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        """Aguarda até haver uma requisição disponível no minuto"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rpm / 60.0)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) * 60.0 / self.rpm
+            time.sleep(wait)
+
+
+class ProviderLimiter:
+    """Token bucket (requisições/minuto) + semáforo (chamadas simultâneas); o lote tem os seus, menores"""
+
+    def __init__(self, rpm, concurrency, batch_concurrency=None, batch_rpm=None):
+        self.bucket = _TokenBucket(rpm)
+        self.rpm = self.bucket.rpm
+        if batch_rpm is None:
+            batch_rpm = max(self.rpm // 4, 1)
+        self.batch_bucket = _TokenBucket(min(max(int(batch_rpm), 1), self.rpm))
+        self.concurrency = max(int(concurrency), 1)
+        self.semaphore = threading.BoundedSemaphore(self.concurrency)
+        if batch_concurrency is None:
+            batch_concurrency = max(self.concurrency // 2, 1)
+        self.batch_semaphore = threading.BoundedSemaphore(min(max(int(batch_concurrency), 1), self.concurrency))
+
+    @contextmanager
+    def slot(self):
+        """Uso: with limiter.slot(): chamada_a_api()"""
+        if in_batch_mode():
+            with self.batch_semaphore, self.semaphore:
+                # O lote respeita o próprio orçamento e também o geral do processo
+                self.batch_bucket.take()
+                self.bucket.take()
+                yield
+        else:
+            with self.semaphore:
+                self.bucket.take()
+                yield
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider, key_id=None):
+    """Limitador único por provedor (e por chave de API, quando informada)"""
+    registry_key = (provider, key_id)
+    with _limiters_lock:
+        if registry_key not in _limiters:
+            defaults = DEFAULT_LIMITS.get(provider, {'rpm': 30, 'concurrency': 2})
+            prefix = provider.upper()
+            _limiters[registry_key] = ProviderLimiter(
+                rpm=os.environ.get(f'{prefix}_RPM', defaults['rpm']),
+                concurrency=os.environ.get(f'{prefix}_MAX_CONCURRENCY', defaults['concurrency']),
+                batch_concurrency=os.environ.get(f'{prefix}_BATCH_CONCURRENCY'),
+                batch_rpm=os.environ.get(f'{prefix}_BATCH_RPM')
+            )
+        return _limiters[registry_key]
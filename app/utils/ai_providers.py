@@ -0,0 +1,276 @@
+# app/utils/ai_providers.py
+"""
+Camada comum de acesso aos provedores de IA.
+
+- GeminiProvider: geração de texto/JSON (com ou sem arquivo anexado)
+- PollinationsProvider: geração de imagens
+Todos passam por: limite de concorrência/RPM (ai_limits), timeout, novas
+tentativas com backoff para falhas transitórias (timeout, 429, 5xx) e circuit
+breaker (após falhas transitórias seguidas o provedor fica "aberto" por um
+tempo e as chamadas falham na hora, sem esperar o timeout). Há um breaker por
+chave de API, como nos limitadores: a chave inválida de uma igreja (400/401)
+não conta como falha e não desliga o provedor para as outras.
+
+Endereços configuráveis (servidor local de testes: servidor_ia_local.py):
+GEMINI_BASE_URL, POLLINATIONS_BASE_URL.
+"""
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import quote
+
+from app.utils.ai_limits import get_limiter
+from app.utils.lazy_imports import requests, genai_errors, genai_types as types
+from app.utils.metrics import observe_ai
+
+POLLINATIONS_URL = 'https://image.pollinations.ai'
+
+
+class ProviderError(Exception):
+    """Falha ao chamar um provedor de IA"""
+
+    def __init__(self, message, retryable=False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class CircuitOpenError(ProviderError):
+    """Provedor temporariamente desativado após falhas seguidas"""
+
+
+# ============================================
+# CIRCUIT BREAKER
+# ============================================
+
+class CircuitBreaker:
+    """
+    closed -> (failure_threshold falhas seguidas) -> open
+    open -> (após reset_timeout) -> half-open: uma chamada de teste
+    half-open -> sucesso fecha / falha reabre
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self.lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return 'half-open'
+            return 'open'
+
+    def before_call(self, name):
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_timeout or self.probing:
+                raise CircuitOpenError(f"{name} indisponível no momento (muitas falhas seguidas). Tente novamente em instantes.")
+            self.probing = True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def release(self):
+        """Chamada terminou sem indicar se o provedor está fora (ex.: erro 400/401)"""
+        with self.lock:
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+
+# ============================================
+# PROVEDOR BASE
+# ============================================
+
+class Provider:
+    """Executa chamadas com limite, timeout, novas tentativas e circuit breaker"""
+
+    name = 'provider'
+
+    def __init__(self, timeout=60, retries=2, backoff=1.0, failure_threshold=5, reset_timeout=30):
+        prefix = self.name.upper()
+        self.timeout = float(os.environ.get(f'{prefix}_TIMEOUT', timeout))
+        self.retries = int(os.environ.get(f'{prefix}_RETRIES', retries))
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+        self._breakers_lock = threading.Lock()
+
+    def get_breaker(self, key_id=None):
+        """Circuit breaker por chave de API (mesma chave dos limitadores)"""
+        with self._breakers_lock:
+            if key_id not in self._breakers:
+                self._breakers[key_id] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[key_id]
+
+    def is_retryable(self, exc):
+        if isinstance(exc, ProviderError):
+            return exc.retryable
+        return isinstance(exc, (TimeoutError, ConnectionError, requests.Timeout, requests.ConnectionError))
+
+    def call(self, fn, limiter_key=None):
+        """Executa fn() respeitando os limites; relança ProviderError"""
+        start = time.perf_counter()
+        try:
+            result = self._call(fn, limiter_key)
+        except CircuitOpenError:
+            observe_ai(self.name, time.perf_counter() - start, 'circuit_open')
+            raise
+        except ProviderError as e:
+            observe_ai(self.name, time.perf_counter() - start, 'retryable' if e.retryable else 'fatal')
+            raise
+        observe_ai(self.name, time.perf_counter() - start)
+        return result
+
+    def _call(self, fn, limiter_key):
+        breaker = self.get_breaker(limiter_key)
+        last_error = None
+        for attempt in range(self.retries + 1):
+            breaker.before_call(self.name)
+            try:
+                with get_limiter(self.name, limiter_key).slot():
+                    result = fn()
+            except Exception as e:
+                last_error = e
+                retryable = self.is_retryable(e)
+                # Só falhas transitórias indicam provedor fora do ar
+                if retryable:
+                    breaker.record_failure()
+                else:
+                    breaker.release()
+                if attempt < self.retries and retryable:
+                    # Backoff exponencial com jitter
+                    time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+                    continue
+                break
+            breaker.record_success()
+            return result
+
+        if isinstance(last_error, ProviderError):
+            raise last_error
+        raise ProviderError(f"Falha na comunicação com a IA: {last_error}",
+                            retryable=self.is_retryable(last_error)) from last_error
+
+
+# ============================================
+# GEMINI (texto e arquivos)
+# ============================================
+
+def strip_json_fences(text):
+    """Remove blocos ```json ... ``` que alguns modelos colocam na resposta"""
+    text = (text or '').strip()
+    if text.startswith("```json"):
+        text = text.split("```json")[1].split("```")[0].strip()
+    elif text.startswith("```"):
+        text = text.split("```")[1].split("```")[0].strip()
+    return text
+
+
+class GeminiProvider(Provider):
+    name = 'gemini'
+
+    def is_retryable(self, exc):
+        if isinstance(exc, genai_errors.APIError):
+            return exc.code in (408, 429) or (exc.code or 0) >= 500
+        # Timeouts/conexão do httpx usado pelo SDK
+        if type(exc).__module__.startswith('httpx'):
+            return True
+        return super().is_retryable(exc)
+
+    def generate_json(self, client, contents, model, limiter_key=None, temperature=0.3):
+        """Gera conteúdo em JSON e devolve o dict (ProviderError em caso de falha)"""
+        config = types.GenerateContentConfig(
+            response_mime_type='application/json',
+            temperature=temperature,
+            http_options={'timeout': int(self.timeout * 1000)}
+        )
+
+        def request():
+            response = client.models.generate_content(model=model, contents=contents, config=config)
+            if not response or not response.text:
+                raise ProviderError("A IA não retornou uma resposta válida a tempo.", retryable=True)
+            return response.text
+
+        text = self.call(request, limiter_key)
+        try:
+            return json.loads(strip_json_fences(text))
+        except json.JSONDecodeError as e:
+            raise ProviderError(f"Resposta da IA não é JSON válido: {str(e)}") from e
+
+
+# ============================================
+# POLLINATIONS (imagens)
+# ============================================
+
+class PollinationsProvider(Provider):
+    name = 'pollinations'
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.session = requests.Session()
+
+    def generate_image(self, prompt, width=1024, height=1024, model='flux'):
+        """Bytes da imagem gerada (ProviderError em caso de falha)"""
+        base_url = os.environ.get('POLLINATIONS_BASE_URL', POLLINATIONS_URL).rstrip('/')
+        url = f"{base_url}/prompt/{quote(prompt, safe='')}"
+
+        def request():
+            response = self.session.get(url, params={'width': width, 'height': height, 'model': model},
+                                        timeout=self.timeout)
+            if response.status_code != 200:
+                raise ProviderError(f"status {response.status_code}",
+                                    retryable=response.status_code in (408, 429) or response.status_code >= 500)
+            return response.content
+
+        return self.call(request)
+
+
+# ============================================
+# REGISTRO
+# ============================================
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+PROVIDER_CLASSES = {
+    'gemini': lambda: GeminiProvider(timeout=60, retries=2),
+    'pollinations': lambda: PollinationsProvider(timeout=60, retries=1),
+}
+
+
+def get_provider(name):
+    """Instância única do provedor no processo"""
+    with _providers_lock:
+        if name not in _providers:
+            _providers[name] = PROVIDER_CLASSES[name]()
+        return _providers[name]
+
+
+def providers_status():
+    """Estado dos circuit breakers de cada provedor já usado, por chave de API"""
+    with _providers_lock:
+        providers = dict(_providers)
+    status = {}
+    for name, provider in providers.items():
+        with provider._breakers_lock:
+            breakers = dict(provider._breakers)
+        status[name] = {key_id: breaker.state for key_id, breaker in breakers.items()}
+    return status
@@ -0,0 +1,183 @@
+# app/utils/assets.py
+"""
+Arquivos estáticos minificados e com hash no nome.
+
+- compilar_assets.py minifica app/static/css e app/static/js, grava
+  static/dist/<pasta>/<nome>.<hash>.<ext> com as versões .gz/.br e o
+  manifest.json (nome original -> nome com hash)
+- Com o manifest presente, url_for('static', filename='css/premium.css')
+  passa a gerar o endereço com hash (em DEBUG continua usando os originais)
+- Arquivos de static/dist são servidos com cache de um ano (imutável) e,
+  quando o navegador aceita, já comprimidos
+- Sem o manifest (compilação não executada) nada muda
+"""
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+
+from flask import send_from_directory
+
+from app.utils.compression import brotli, choose_encoding, compress_bytes, EXTENSIONS
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+ASSET_DIRS = ('css', 'js')
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+CACHE_MAX_AGE = 365 * 24 * 3600
+HASH_LENGTH = 10
+
+_CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+_CSS_SPACES = re.compile(r'\s+')
+_CSS_PUNCT = re.compile(r'\s*([{};,>])\s*')
+
+
+# ============================================
+# MINIFICAÇÃO
+# ============================================
+
+def minify_css(css):
+    """rcssmin se instalado; senão remove comentários e espaços (conservador)"""
+    if rcssmin is not None:
+        return rcssmin.cssmin(css)
+    css = _CSS_COMMENT.sub('', css)
+    css = _CSS_SPACES.sub(' ', css)
+    css = _CSS_PUNCT.sub(r'\1', css)
+    return css.replace(';}', '}').strip() + '\n'
+
+
+def minify_js(js):
+    """rjsmin se instalado; senão só tira indentação e linhas vazias (não mexe em strings)"""
+    if rjsmin is not None:
+        return rjsmin.jsmin(js)
+    return '\n'.join(line.strip() for line in js.splitlines() if line.strip()) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+# ============================================
+# COMPILAÇÃO
+# ============================================
+
+def _hashed_name(relative, content):
+    base, ext = os.path.splitext(relative)
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    return f'{DIST_DIR}/{base}.{digest}{ext}'
+
+
+def _write_variants(path, content):
+    with open(path, 'wb') as f:
+        f.write(content)
+    sizes = {'original': len(content)}
+    for encoding in ('gzip', 'br'):
+        if encoding == 'br' and brotli is None:
+            continue
+        compressed = compress_bytes(content, encoding, gzip_level=9, brotli_level=11)
+        with open(path + EXTENSIONS[encoding], 'wb') as f:
+            f.write(compressed)
+        sizes[encoding] = len(compressed)
+    return sizes
+
+
+def build_assets(static_folder, clean=True):
+    """
+    Gera static/dist e o manifest.
+    Retorna {arquivo: {'hashed', 'source', 'minified', 'gzip', 'br'}}
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    if clean and os.path.isdir(dist):
+        shutil.rmtree(dist)
+
+    manifest, report = {}, {}
+    for folder in ASSET_DIRS:
+        root = os.path.join(static_folder, folder)
+        if not os.path.isdir(root):
+            continue
+        for dirpath, _, filenames in os.walk(root):
+            for filename in sorted(filenames):
+                ext = os.path.splitext(filename)[1]
+                if ext not in MINIFIERS:
+                    continue
+                source = os.path.join(dirpath, filename)
+                relative = os.path.relpath(source, static_folder).replace(os.sep, '/')
+                with open(source, encoding='utf-8') as f:
+                    original = f.read()
+                content = MINIFIERS[ext](original).encode('utf-8')
+
+                hashed = _hashed_name(relative, content)
+                target = os.path.join(static_folder, hashed)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                sizes = _write_variants(target, content)
+
+                manifest[relative] = hashed
+                report[relative] = {'hashed': hashed, 'source': len(original.encode('utf-8')),
+                                    'minified': sizes['original'], 'gzip': sizes.get('gzip'),
+                                    'br': sizes.get('br')}
+
+    os.makedirs(dist, exist_ok=True)
+    with open(os.path.join(dist, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return report
+
+
+def load_manifest(static_folder):
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+# ============================================
+# SERVIDOR
+# ============================================
+
+def _serve_dist(static_folder, filename):
+    """Arquivo com hash: versão comprimida pronta, se houver, e cache imutável"""
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    encoding = choose_encoding()
+    served, content_encoding = filename, None
+    if encoding and os.path.isfile(os.path.join(static_folder, filename + EXTENSIONS[encoding])):
+        served, content_encoding = filename + EXTENSIONS[encoding], encoding
+
+    response = send_from_directory(static_folder, served, mimetype=mimetype, max_age=CACHE_MAX_AGE)
+    if content_encoding:
+        response.headers['Content-Encoding'] = content_encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def init_assets(app):
+    """Troca os nomes em url_for('static') pelos com hash e serve static/dist"""
+    manifest = {} if app.debug else load_manifest(app.static_folder)
+    app.config['ASSETS_MANIFEST'] = manifest
+    original_static = app.view_functions['static']
+
+    def static(filename):
+        if filename.startswith(DIST_DIR + '/') and not filename.endswith(MANIFEST_NAME):
+            return _serve_dist(app.static_folder, filename)
+        return original_static(filename=filename)
+
+    app.view_functions['static'] = static
+
+    if manifest:
+        @app.url_defaults
+        def _hashed_static(endpoint, values):
+            if endpoint == 'static':
+                hashed = manifest.get(values.get('filename'))
+                if hashed:
+                    values['filename'] = hashed
@@ -0,0 +1,134 @@
+# app/utils/birthdays.py
+"""
+Consultas de aniversariantes usando a coluna indexada User.birthday_key (MMDD).
+
+Nascidos em 29/02 comemoram em 28/02 nos anos não bissextos.
+"""
+import calendar
+from datetime import date, timedelta
+from sqlalchemy import or_
+from app.core.models import db, User, Ministry, member_ministries
+
+FEB_29 = 229
+
+
+def birthday_key(d):
+    """Chave MMDD de uma data (ou None)"""
+    return d.month * 100 + d.day if d else None
+
+
+def next_birthday(birth_date, today=None):
+    """Próxima data de aniversário a partir de hoje (inclusive)"""
+    today = today or date.today()
+    for year in (today.year, today.year + 1):
+        if birth_date.month == 2 and birth_date.day == 29 and not calendar.isleap(year):
+            bday = date(year, 2, 28)
+        else:
+            bday = date(year, birth_date.month, birth_date.day)
+        if bday >= today:
+            return bday
+    return bday
+
+
+def _key_ranges(start, end):
+    """
+    Intervalos de birthday_key cobrindo as datas [start, end].
+    Divide em dois intervalos quando a janela atravessa a virada do ano.
+    """
+    if (end - start).days >= 365:
+        return [(101, 1231)]
+
+    def end_key(d):
+        # Em ano não bissexto, 28/02 também cobre os nascidos em 29/02
+        if d.month == 2 and d.day == 28 and not calendar.isleap(d.year):
+            return FEB_29
+        return birthday_key(d)
+
+    if start.year == end.year:
+        return [(birthday_key(start), end_key(end))]
+    return [(birthday_key(start), 1231), (101, end_key(end))]
+
+
+def _key_filter(start, end):
+    return or_(*[User.birthday_key.between(lo, hi) for lo, hi in _key_ranges(start, end)])
+
+
+def birthday_window_filter(days, today=None):
+    """Filtro SQL: aniversário nos próximos `days` dias (hoje incluído)"""
+    today = today or date.today()
+    return db.and_(User.birthday_key.isnot(None), _key_filter(today, today + timedelta(days=days)))
+
+
+def upcoming_birthdays(days=10, church_id=None, ministry_ids=None, today=None, active_only=False):
+    """
+    Aniversariantes nos próximos `days` dias (hoje incluído), por igreja e/ou ministérios.
+    Retorna lista de dicts ordenada pelos dias restantes:
+    user_id, name, phone, birth_date, day, month, date, days_until, is_today, ministry
+    """
+    today = today or date.today()
+    limit_date = today + timedelta(days=days)
+
+    if ministry_ids is not None:
+        if not ministry_ids:
+            return []
+        query = db.session.query(
+            User.id, User.name, User.phone, User.birth_date, Ministry.name.label('ministry')
+        ).join(member_ministries, member_ministries.c.user_id == User.id).join(
+            Ministry, Ministry.id == member_ministries.c.ministry_id
+        ).filter(Ministry.id.in_(ministry_ids))
+    else:
+        query = db.session.query(User.id, User.name, User.phone, User.birth_date, db.null().label('ministry'))
+
+    if church_id:
+        query = query.filter(User.church_id == church_id)
+    if active_only:
+        query = query.filter(User.status == 'active')
+
+    rows = query.filter(User.birthday_key.isnot(None), _key_filter(today, limit_date)).order_by(Ministry.name if ministry_ids else User.name).all()
+
+    alerts = []
+    seen = set()
+    for row in rows:
+        if row.id in seen:
+            continue
+        seen.add(row.id)
+        bday = next_birthday(row.birth_date, today)
+        days_until = (bday - today).days
+        if days_until > days:
+            continue
+        alerts.append({
+            'user_id': row.id,
+            'name': row.name,
+            'phone': row.phone,
+            'birth_date': row.birth_date,
+            'day': row.birth_date.day,
+            'month': row.birth_date.strftime('%m'),
+            'date': bday,
+            'days_until': days_until,
+            'is_today': days_until == 0,
+            'ministry': row.ministry,
+        })
+    alerts.sort(key=lambda x: (x['days_until'], x['name']))
+    return alerts
+
+
+def birthdays_by_month(church_id=None, ministry_id=None, active_only=True):
+    """Agenda anual: {mês: [{'name', 'day', 'phone'}]} ordenada por dia"""
+    query = db.session.query(User.name, User.phone, User.birthday_key).filter(User.birthday_key.isnot(None))
+    if ministry_id:
+        query = query.join(member_ministries, member_ministries.c.user_id == User.id).filter(
+            member_ministries.c.ministry_id == ministry_id
+        )
+    if church_id:
+        query = query.filter(User.church_id == church_id)
+    if active_only:
+        query = query.filter(User.status == 'active')
+
+    agenda = {i: [] for i in range(1, 13)}
+    for row in query.order_by(User.birthday_key, User.name).all():
+        agenda[row.birthday_key // 100].append({
+            'name': row.name,
+            'day': row.birthday_key % 100,
+            'phone': row.phone
+        })
+    return agenda
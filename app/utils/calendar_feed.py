@@ -0,0 +1,220 @@
+# app/utils/calendar_feed.py
+"""
+Feeds iCalendar (.ics) da agenda da igreja e dos ministérios.
+
+- URLs privadas assinadas (itsdangerous) com igreja, ministério, usuário e a
+  versão dos links do usuário (gerar novos links invalida os anteriores)
+- Séries recorrentes são enviadas como RRULE/EXDATE (o calendário expande)
+- Cache por feed com ETag/Last-Modified, invalidado quando um evento do
+  escopo muda (e por TTL, para os demais workers)
+"""
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from itsdangerous import URLSafeSerializer, BadSignature
+from sqlalchemy import event as sa_event, or_
+from app.core.models import Event, User, Church, Ministry
+from app.utils.recurrence import parse_rule
+
+FEED_SALT = 'calendar-feed'
+FEED_TTL = 300  # segundos
+PAST_DAYS = 90  # eventos únicos já passados que continuam no feed
+
+# (church_id, ministry_id) -> {'body', 'etag', 'last_modified', 'created'}
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+
+# ============================================
+# URLS ASSINADAS
+# ============================================
+
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt=FEED_SALT)
+
+
+def make_feed_token(user, ministry_id=None):
+    """Token privado do feed (igreja do usuário ou um ministério)"""
+    return _serializer().dumps({'u': user.id, 'c': user.church_id, 'm': ministry_id,
+                                'v': user.calendar_feed_version or 0})
+
+
+def can_follow_ministry(user, ministry):
+    """Membro, líder, vice ou líder extra do ministério"""
+    if ministry.leader_id == user.id or ministry.vice_leader_id == user.id:
+        return True
+    if ministry.extra_leaders and user.id in ministry.extra_leaders:
+        return True
+    return ministry in user.ministries
+
+
+def load_feed_token(token):
+    """Valida o token e retorna (user, church_id, ministry_id) ou None"""
+    try:
+        data = _serializer().loads(token)
+    except BadSignature:
+        return None
+
+    user = User.query.get(data.get('u'))
+    # Feed deixa de funcionar se o membro for desativado, mudar de igreja ou gerar novos links
+    if not user or user.status != 'active' or user.church_id != data.get('c'):
+        return None
+    if data.get('v', 0) != (user.calendar_feed_version or 0):
+        return None
+
+    ministry_id = data.get('m')
+    if ministry_id:
+        ministry = Ministry.query.get(ministry_id)
+        # ... ou se sair do ministério
+        if not ministry or ministry.church_id != user.church_id or not can_follow_ministry(user, ministry):
+            return None
+    return user, user.church_id, ministry_id
+
+
+# ============================================
+# GERAÇÃO DO ICS
+# ============================================
+
+def _escape(value):
+    return (value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\r\n', '\\n').replace('\n', '\\n')
+
+
+def _fold(line):
+    """Quebra linhas com mais de 75 octetos (RFC 5545)"""
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return line
+    parts = []
+    while len(data) > 75:
+        cut = 75 if not parts else 74
+        # Não cortar no meio de um caractere UTF-8
+        while cut > 0 and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[:cut].decode('utf-8'))
+        data = data[cut:]
+    parts.append(data.decode('utf-8'))
+    return '\r\n '.join(parts)
+
+
+def _dt(value):
+    return value.strftime('%Y%m%dT%H%M%S')
+
+
+def _ics_rrule(event):
+    """RRULE equivalente à regra do evento"""
+    rule = parse_rule(event.recurrence_rule)
+    parts = [f"FREQ={rule['FREQ']}", f"INTERVAL={rule.get('INTERVAL', '1')}"]
+    if 'BYDAY' in rule:
+        parts.append(f"BYDAY={rule['BYDAY']}")
+    elif 'BYMONTHDAY' in rule:
+        day = int(rule['BYMONTHDAY'])
+        if day > 28:
+            # Dias 29-31 caem no último dia dos meses curtos (como na agenda)
+            parts.append(f"BYMONTHDAY={','.join(str(d) for d in range(28, day + 1))};BYSETPOS=-1")
+        else:
+            parts.append(f"BYMONTHDAY={day}")
+    if event.recurrence_until:
+        parts.append(f"UNTIL={_dt(event.recurrence_until)}")
+    return 'RRULE:' + ';'.join(parts)
+
+
+def _vevent(event, host):
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:event-{event.id}@{host}',
+        # DTSTAMP fixo (derivado do evento) para o ETag só mudar quando o conteúdo mudar
+        f'DTSTAMP:{_dt(event.start_time)}Z',
+        f'DTSTART:{_dt(event.start_time)}',
+    ]
+    if event.end_time:
+        lines.append(f'DTEND:{_dt(event.end_time)}')
+    lines.append(f'SUMMARY:{_escape(event.title)}')
+    if event.location:
+        lines.append(f'LOCATION:{_escape(event.location)}')
+    if event.description:
+        lines.append(f'DESCRIPTION:{_escape(event.description)}')
+    if event.recurrence_rule:
+        lines.append(_ics_rrule(event))
+        for day in event.recurrence_exceptions or []:
+            exdate = datetime.strptime(day, '%Y-%m-%d').replace(
+                hour=event.start_time.hour, minute=event.start_time.minute, second=event.start_time.second)
+            lines.append(f'EXDATE:{_dt(exdate)}')
+    lines.append('END:VEVENT')
+    return lines
+
+
+def build_feed(church_id, ministry_id=None, host='ecclesia'):
+    """Gera o conteúdo .ics do feed"""
+    church = Church.query.get(church_id)
+    ministry = Ministry.query.get(ministry_id) if ministry_id else None
+    name = f"{church.name if church else 'Igreja'} - {ministry.name}" if ministry else (church.name if church else 'Agenda')
+
+    query = Event.query.filter(Event.church_id == church_id)
+    if ministry_id:
+        query = query.filter(Event.ministry_id == ministry_id)
+    else:
+        query = query.filter(Event.ministry_id.is_(None))
+
+    since = datetime.now() - timedelta(days=PAST_DAYS)
+    events = query.filter(or_(
+        Event.start_time >= since,
+        # Séries recorrentes ainda ativas
+        (Event.recurrence_rule.isnot(None)) & (or_(Event.recurrence_until.is_(None), Event.recurrence_until >= since))
+    )).order_by(Event.start_time.asc()).all()
+
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Ecclesia Master//Agenda//PT',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escape(name)}',
+        'REFRESH-INTERVAL;VALUE=DURATION:PT1H',
+        'X-PUBLISHED-TTL:PT1H',
+    ]
+    for event in events:
+        lines.extend(_vevent(event, host))
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
+
+
+def get_feed(church_id, ministry_id=None, host='ecclesia'):
+    """Feed em cache: dict com body, etag e last_modified"""
+    key = (church_id, ministry_id)
+    now = time.monotonic()
+    with _feeds_lock:
+        cached = _feeds.get(key)
+        if cached and now - cached['created'] < FEED_TTL:
+            return cached
+
+    body = build_feed(church_id, ministry_id, host)
+    feed = {
+        'body': body,
+        'etag': hashlib.sha1(body.encode('utf-8')).hexdigest(),
+        'last_modified': datetime.utcnow().replace(microsecond=0),
+        'created': now,
+    }
+    with _feeds_lock:
+        previous = _feeds.get(key)
+        # Conteúdo igual: manter a data original para o If-Modified-Since continuar válido
+        if previous and previous['etag'] == feed['etag']:
+            feed['last_modified'] = previous['last_modified']
+        _feeds[key] = feed
+    return feed
+
+
+def invalidate_feeds(church_id):
+    """Descarta os feeds da igreja (geral e ministérios)"""
+    with _feeds_lock:
+        for key in [k for k in _feeds if k[0] == church_id]:
+            # Mantém a entrada para comparar o ETag, mas força nova geração
+            _feeds[key] = dict(_feeds[key], created=float('-inf'))
+
+
+@sa_event.listens_for(Event, 'after_insert')
+@sa_event.listens_for(Event, 'after_update')
+@sa_event.listens_for(Event, 'after_delete')
+def _event_changed(mapper, connection, target):
+    invalidate_feeds(target.church_id)
@@ -0,0 +1,99 @@
+# app/utils/compression.py
+"""
+Compressão das respostas (Brotli quando o pacote brotli estiver instalado,
+senão gzip).
+
+- Só comprime tipos de texto (COMPRESSIBLE_TYPES) a partir de
+  COMPRESS_MIN_SIZE bytes; respostas já codificadas, arquivos enviados em
+  stream (send_file) e status sem corpo ficam como estão
+- O ETag passa a ser fraco (o corpo comprimido não é byte a byte o original);
+  If-None-Match continua valendo, pois a comparação é fraca
+- Os arquivos estáticos gerados por compilar_assets.py já têm as versões
+  .br/.gz prontas (ver app/utils/assets.py)
+"""
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # opcional: sem ele, só gzip
+    brotli = None
+
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/javascript', 'text/calendar', 'text/csv',
+    'application/javascript', 'application/json', 'application/xml', 'image/svg+xml',
+    'application/manifest+json',
+}
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_LEVEL = 4  # bom equilíbrio para conteúdo dinâmico (11 só vale para estáticos)
+
+EXTENSIONS = {'br': '.br', 'gzip': '.gz'}
+
+
+def choose_encoding(accept_encodings=None):
+    """'br', 'gzip' ou None conforme o Accept-Encoding do cliente"""
+    accept = accept_encodings if accept_encodings is not None else request.accept_encodings
+    if brotli is not None and accept['br'] > 0:
+        return 'br'
+    if accept['gzip'] > 0:
+        return 'gzip'
+    return None
+
+
+def compress_bytes(data, encoding, gzip_level=DEFAULT_GZIP_LEVEL, brotli_level=DEFAULT_BROTLI_LEVEL):
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_level)
+    # mtime=0: mesmo conteúdo gera sempre os mesmos bytes
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def _should_compress(response, min_size):
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_TYPES:
+        return False
+    if 'no-transform' in (response.headers.get('Cache-Control') or ''):
+        return False
+    return response.content_length is None or response.content_length >= min_size
+
+
+def compress_response(response, config):
+    if response.mimetype in COMPRESSIBLE_TYPES:
+        response.vary.add('Accept-Encoding')
+    min_size = config.get('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE)
+    if not _should_compress(response, min_size):
+        return response
+
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+    compressed = compress_bytes(data, encoding,
+                                gzip_level=config.get('COMPRESS_GZIP_LEVEL', DEFAULT_GZIP_LEVEL),
+                                brotli_level=config.get('COMPRESS_BROTLI_LEVEL', DEFAULT_BROTLI_LEVEL))
+    if len(compressed) >= len(data):
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """Comprime as respostas de texto (COMPRESS_ENABLED=false desliga)"""
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+
+    @app.after_request
+    def _compress(response):
+        return compress_response(response, app.config)
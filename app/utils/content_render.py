@@ -0,0 +1,70 @@
+# app/utils/content_render.py
+import hashlib
+
+from app.utils.lazy_imports import markdown, bleach
+
+# Incrementar quando mudar extensões ou tags permitidas (invalida o cache)
+RENDER_VERSION = 1
+
+# Lista de tags HTML permitidas (segurança)
+ALLOWED_TAGS = [
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'p', 'br', 'hr',
+    'strong', 'b', 'em', 'i', 'u', 'mark',
+    'ul', 'ol', 'li',
+    'a', 'img',
+    'blockquote', 'pre', 'code',
+    'table', 'thead', 'tbody', 'tr', 'th', 'td',
+    'div', 'span'
+]
+
+# Atributos permitidos
+ALLOWED_ATTRIBUTES = {
+    'a': ['href', 'title', 'target'],
+    'img': ['src', 'alt', 'title', 'width', 'height'],
+    'div': ['class'],
+    'span': ['class'],
+    'code': ['class'],
+    'pre': ['class']
+}
+
+EMPTY_CONTENT_HTML = '<p>Nenhum conteúdo disponível.</p>'
+
+
+def content_hash(content):
+    """Hash do conteúdo + versão do renderizador (chave do cache)"""
+    data = f"{RENDER_VERSION}:{content or ''}".encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def render_markdown_safe(content):
+    """Converte Markdown para HTML sanitizado"""
+    if not content:
+        return EMPTY_CONTENT_HTML
+    md = markdown.Markdown(extensions=['extra', 'fenced_code', 'tables', 'nl2br'])
+    html_content = md.convert(content)
+    return bleach.clean(html_content, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, strip=True)
+
+
+def refresh_study_html(study, force=False):
+    """
+    Atualiza o HTML em cache do estudo se o conteúdo mudou.
+    Não faz commit. Retorna True se o cache foi (re)gerado.
+    """
+    new_hash = content_hash(study.content)
+    if not force and study.content_html and study.content_hash == new_hash:
+        return False
+    study.content_html = render_markdown_safe(study.content)
+    study.content_hash = new_hash
+    return True
+
+
+def get_study_html(study):
+    """
+    Retorna o HTML do estudo a partir do cache.
+    Se o cache estiver ausente ou desatualizado, renderiza sem gravar: o cache
+    é gravado só ao criar/editar o estudo e pela migração/gerar_html_estudos.py.
+    """
+    if study.content_html and study.content_hash == content_hash(study.content):
+        return study.content_html
+    return render_markdown_safe(study.content)
@@ -0,0 +1,349 @@
+# app/utils/email_outbox.py
+"""
+Fila de e-mails (tabela email_outbox) com envio em segundo plano.
+
+send_email apenas grava a mensagem e acorda o remetente; quem pediu o envio
+(cadastro, esqueci a senha...) não espera mais pelo servidor SMTP.
+
+O remetente roda numa thread do processo (flask run) ou no script
+enviar_emails.py --loop. Com o Gunicorn, gunicorn.conf.py desliga a thread nos
+workers e inicia um único enviar_emails.py: o limite e as conexões abaixo valem
+por processo de envio, então deve haver um só.
+- reserva um lote de mensagens pendentes (UPDATE condicional, seguro com
+  vários workers) e agrupa por igreja
+- mantém uma conexão SMTP aberta por configuração de igreja (login/STARTTLS
+  uma vez só), fechada depois de SMTP_IDLE_TIMEOUT segundos sem uso
+- respeita o limite por igreja (SMTP_RPM, via ai_limits)
+- falhas temporárias (4xx, conexão caiu, timeout) voltam para a fila com
+  espera crescente; erros permanentes (5xx) ou tentativas esgotadas ficam
+  como 'failed'
+
+SMTP_SINK=host:porta envia tudo para um servidor local sem TLS/login
+(servidor_smtp_local.py), para testes e benchmarks.
+"""
+import smtplib
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formataddr
+
+from flask import current_app
+from sqlalchemy import update
+
+from app.core.models import db, EmailOutbox
+from app.utils.settings_cache import church_settings
+from app.utils.ai_limits import get_limiter
+
+BATCH_SIZE = 50
+MAX_ATTEMPTS = 5
+RETRY_BASE = 60          # segundos até a 1ª nova tentativa (dobra a cada falha)
+RETRY_MAX = 3600
+STALE_LOCK = 600         # mensagens 'sending' há mais que isso voltam para a fila
+POLL_INTERVAL = 5        # a thread confere a fila mesmo sem ser acordada
+SMTP_TIMEOUT = 30
+SMTP_IDLE_TIMEOUT = 60
+
+_connections = {}        # configuração -> [conexão, último uso]
+_connections_lock = threading.Lock()
+_wake = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+# ============================================
+# CONFIGURAÇÃO SMTP
+# ============================================
+
+def _sink():
+    """(host, porta) de SMTP_SINK, se configurado"""
+    value = current_app.config.get('SMTP_SINK')
+    if not value:
+        return None
+    host, _, port = value.rpartition(':')
+    return host or 'localhost', int(port)
+
+
+def smtp_settings(church):
+    """Chave da conexão: (servidor, porta, tls, usuário, senha) ou None se não configurada"""
+    sink = _sink()
+    if sink:
+        # Uma conexão por igreja também no servidor local, como em produção
+        return ('sink', sink[0], sink[1], church.id if church else None)
+    if not church or not church.smtp_server or not church.smtp_user or not church.smtp_password:
+        return None
+    return ('smtp', church.smtp_server, church.smtp_port, bool(church.smtp_use_tls),
+            church.smtp_user, church.smtp_password)
+
+
+def connect(settings):
+    """Abre e autentica uma conexão SMTP"""
+    if settings[0] == 'sink':
+        return smtplib.SMTP(settings[1], settings[2], timeout=SMTP_TIMEOUT)
+    _, host, port, use_tls, user, password = settings
+    if use_tls:
+        server = smtplib.SMTP(host, port, timeout=SMTP_TIMEOUT)
+        server.starttls()
+    else:
+        server = smtplib.SMTP_SSL(host, port, timeout=SMTP_TIMEOUT)
+    server.login(user, password)
+    return server
+
+
+def _get_connection(settings):
+    with _connections_lock:
+        entry = _connections.get(settings)
+        if entry and time.monotonic() - entry[1] > current_app.config.get('SMTP_IDLE_TIMEOUT', SMTP_IDLE_TIMEOUT):
+            _close(entry[0])
+            entry = None
+        if entry is None:
+            entry = [connect(settings), time.monotonic()]
+            _connections[settings] = entry
+        entry[1] = time.monotonic()
+        return entry[0]
+
+
+def _drop_connection(settings):
+    with _connections_lock:
+        entry = _connections.pop(settings, None)
+    if entry:
+        _close(entry[0])
+
+
+def _close(server):
+    try:
+        server.quit()
+    except Exception:
+        try:
+            server.close()
+        except Exception:
+            pass
+
+
+def close_idle_connections(max_idle=None):
+    """Fecha conexões sem uso (todas, com max_idle=0)"""
+    limit = SMTP_IDLE_TIMEOUT if max_idle is None else max_idle
+    with _connections_lock:
+        idle = [key for key, (_, used) in _connections.items() if time.monotonic() - used >= limit]
+        servers = [_connections.pop(key)[0] for key in idle]
+    for server in servers:
+        _close(server)
+    return len(servers)
+
+
+def build_message(church, to_email, subject, html_content, text_content=None):
+    msg = MIMEMultipart('alternative')
+    sender = (church.email_from or church.smtp_user) if church else None
+    sender = sender or current_app.config.get('MAIL_DEFAULT_SENDER') or 'no-reply@localhost'
+    if church and church.email_from_name:
+        sender = formataddr((church.email_from_name, sender))
+    msg['From'] = sender
+    msg['To'] = to_email
+    msg['Subject'] = subject
+
+    # Versão texto plano primeiro (fallback), depois HTML
+    if text_content:
+        msg.attach(MIMEText(text_content, 'plain'))
+    msg.attach(MIMEText(html_content or '', 'html'))
+    return msg
+
+
+# ============================================
+# FILA
+# ============================================
+
+def enqueue_email(church_id, to_email, subject, html_content, text_content=None, category=None, commit=True):
+    """Grava a mensagem na fila e acorda o remetente"""
+    item = EmailOutbox(church_id=church_id, to_email=to_email, subject=subject,
+                       html_content=html_content, text_content=text_content, category=category,
+                       status='pending', attempts=0, next_attempt_at=datetime.utcnow())
+    db.session.add(item)
+    if commit:
+        db.session.commit()
+        wake_sender()
+    return item
+
+
+def _is_transient(error):
+    """Vale a pena tentar de novo? (4xx, conexão caiu, timeout de rede)"""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    # Erros de rede (recusa, timeout); os demais SMTPException são de protocolo/configuração
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+def _retry_delay(attempts):
+    return min(RETRY_BASE * 2 ** max(attempts - 1, 0), RETRY_MAX)
+
+
+def _claim(batch_size):
+    """Reserva até batch_size mensagens pendentes; devolve-as ordenadas por igreja"""
+    now = datetime.utcnow()
+
+    # Mensagens presas em 'sending' (processo morreu no meio do envio)
+    db.session.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.status == 'sending', EmailOutbox.locked_at < now - timedelta(seconds=STALE_LOCK))
+        .values(status='pending', locked_by=None)
+    )
+
+    ids = [row.id for row in db.session.query(EmailOutbox.id)
+           .filter(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now)
+           .order_by(EmailOutbox.id).limit(batch_size)]
+    if not ids:
+        db.session.commit()
+        return []
+
+    token = uuid.uuid4().hex
+    db.session.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(ids), EmailOutbox.status == 'pending')
+        .values(status='sending', locked_by=token, locked_at=now)
+    )
+    db.session.commit()
+    return (EmailOutbox.query.filter_by(locked_by=token, status='sending')
+            .order_by(EmailOutbox.church_id, EmailOutbox.id).all())
+
+
+def process_outbox(batch_size=None):
+    """
+    Envia um lote da fila.
+    Retorna {'claimed', 'sent', 'retry', 'failed'}
+    """
+    batch_size = batch_size or current_app.config.get('EMAIL_BATCH_SIZE', BATCH_SIZE)
+    max_attempts = current_app.config.get('EMAIL_MAX_ATTEMPTS', MAX_ATTEMPTS)
+    items = _claim(batch_size)
+    stats = {'claimed': len(items), 'sent': 0, 'retry': 0, 'failed': 0}
+    if not items:
+        return stats
+
+    unavailable = {}  # configuração -> (erro, próxima tentativa) quando a conexão falhou
+
+    for item in items:
+        church = church_settings(item.church_id)
+        settings = smtp_settings(church)
+        now = datetime.utcnow()
+
+        if settings is None:
+            item.status = 'failed'
+            item.last_error = 'Configurações de email não configuradas para esta igreja'
+            stats['failed'] += 1
+        elif settings in unavailable:
+            # Servidor fora do ar neste lote: reagenda sem gastar tentativa
+            item.status = 'pending'
+            item.last_error, item.next_attempt_at = unavailable[settings]
+            stats['retry'] += 1
+        else:
+            try:
+                msg = build_message(church, item.to_email, item.subject, item.html_content, item.text_content)
+                with get_limiter('smtp', item.church_id).slot():
+                    try:
+                        _get_connection(settings).send_message(msg, to_addrs=[item.to_email])
+                    except smtplib.SMTPServerDisconnected:
+                        # Conexão aquecida expirou no servidor: reconecta uma vez
+                        _drop_connection(settings)
+                        _get_connection(settings).send_message(msg, to_addrs=[item.to_email])
+                item.status = 'sent'
+                item.sent_at = now
+                item.last_error = None
+                stats['sent'] += 1
+            except Exception as e:
+                item.attempts = (item.attempts or 0) + 1
+                item.last_error = str(e)[:1000]
+                connection_error = not isinstance(e, (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError,
+                                                      smtplib.SMTPSenderRefused))
+                if connection_error:
+                    _drop_connection(settings)
+                if _is_transient(e) and item.attempts < max_attempts:
+                    item.status = 'pending'
+                    item.next_attempt_at = now + timedelta(seconds=_retry_delay(item.attempts))
+                    stats['retry'] += 1
+                    if connection_error:
+                        unavailable[settings] = (item.last_error, item.next_attempt_at)
+                else:
+                    item.status = 'failed'
+                    stats['failed'] += 1
+                current_app.logger.warning(f"Falha ao enviar email #{item.id} para {item.to_email}: {e}")
+
+        item.locked_by = None
+        item.locked_at = None
+        # Grava a cada mensagem: um envio confirmado nunca é repetido
+        db.session.commit()
+
+    return stats
+
+
+def drain_outbox(max_batches=None):
+    """Processa lotes até a fila (com envio já liberado) esvaziar"""
+    totals = {'claimed': 0, 'sent': 0, 'retry': 0, 'failed': 0}
+    batches = 0
+    batch_size = current_app.config.get('EMAIL_BATCH_SIZE', BATCH_SIZE)
+    while max_batches is None or batches < max_batches:
+        stats = process_outbox(batch_size)
+        batches += 1
+        for key in totals:
+            totals[key] += stats[key]
+        if stats['claimed'] < batch_size:
+            break
+    return totals
+
+
+def outbox_status(church_id=None):
+    """Quantidade de mensagens por status"""
+    query = db.session.query(EmailOutbox.status, db.func.count(EmailOutbox.id))
+    if church_id:
+        query = query.filter(EmailOutbox.church_id == church_id)
+    return dict(query.group_by(EmailOutbox.status).all())
+
+
+# ============================================
+# THREAD DE ENVIO
+# ============================================
+
+def wake_sender():
+    """Acorda a thread de envio (iniciando-a se preciso)"""
+    app = current_app._get_current_object()
+    if app.config.get('EMAIL_OUTBOX_WORKER', True):
+        _ensure_worker(app)
+    _wake.set()
+
+
+def _ensure_worker(app):
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_sender_loop, args=(app,), name='email-outbox', daemon=True)
+            _worker.start()
+
+
+def _sender_loop(app):
+    while True:
+        _wake.wait(timeout=app.config.get('EMAIL_POLL_INTERVAL', POLL_INTERVAL))
+        _wake.clear()
+        with app.app_context():
+            try:
+                drain_outbox()
+            except Exception:
+                app.logger.exception("Erro no envio da fila de emails")
+                db.session.rollback()
+            finally:
+                db.session.remove()
+            close_idle_connections(app.config.get('SMTP_IDLE_TIMEOUT', SMTP_IDLE_TIMEOUT))
+
+
+def init_email_outbox(app):
+    """Inicia o remetente na primeira requisição (envia o que ficou na fila)"""
+    if not app.config.get('EMAIL_OUTBOX_WORKER', True):
+        return
+
+    @app.before_request
+    def _start_email_sender():
+        if _worker is None or not _worker.is_alive():
+            _ensure_worker(app)
+            _wake.set()
@@ -1,15 +1,15 @@
 # app/utils/email_utils.py
 from flask import current_app, url_for
-from app.core.models import Church, db
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from app.core.models import db
+from app.utils.email_outbox import enqueue_email, smtp_settings, connect, build_message
+from app.utils.settings_cache import church_settings
 import uuid
 
 
-def send_email(church_id, to_email, subject, html_content, text_content=None):
+def send_email(church_id, to_email, subject, html_content, text_content=None, category=None):
     """
-    Envia email usando as configurações SMTP da filial
+    Coloca o email na fila de envio (enviado em segundo plano com as
+    configurações SMTP da filial - ver app/utils/email_outbox.py)
     
     Args:
         church_id: ID da igreja (para pegar as configurações)
@@ -17,46 +17,47 @@ def send_email(church_id, to_email, subject, html_content, text_content=None):
         subject: Assunto do email
         html_content: Conteúdo HTML do email
         text_content: Conteúdo texto plano (opcional)
+        category: Tipo da mensagem (verification, password_reset...)
     
     Returns:
         (success, message)
     """
-    church = Church.query.get(church_id)
-    if not church:
+    church = church_settings(church_id)
+    if not church and not current_app.config.get('SMTP_SINK'):
         return False, "Igreja não encontrada"
     
-    if not church.smtp_server or not church.smtp_user or not church.smtp_password:
+    if smtp_settings(church) is None:
         return False, "Configurações de email não configuradas para esta igreja"
     
     try:
-        # Criar mensagem
-        msg = MIMEMultipart('alternative')
-        msg['From'] = church.email_from or church.smtp_user
-        msg['To'] = to_email
-        msg['Subject'] = subject
-        
-        # Adicionar versão texto plano (fallback)
-        if text_content:
-            part_text = MIMEText(text_content, 'plain')
-            msg.attach(part_text)
-        
-        # Adicionar versão HTML
-        part_html = MIMEText(html_content, 'html')
-        msg.attach(part_html)
-        
-        # Conectar e enviar
-        if church.smtp_use_tls:
-            server = smtplib.SMTP(church.smtp_server, church.smtp_port)
-            server.starttls()
-        else:
-            server = smtplib.SMTP_SSL(church.smtp_server, church.smtp_port)
-        
-        server.login(church.smtp_user, church.smtp_password)
-        server.send_message(msg)
-        server.quit()
-        
+        enqueue_email(church_id, to_email, subject, html_content, text_content, category=category)
+        return True, "Email adicionado à fila de envio"
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Erro ao enfileirar email: {str(e)}")
+        return False, str(e)
+
+
+def send_email_now(church, to_email, subject, html_content, text_content=None):
+    """
+    Envia na hora, numa conexão nova (usado no teste de configuração, que
+    precisa do resultado do login/envio)
+    
+    Returns:
+        (success, message)
+    """
+    settings = smtp_settings(church)
+    if settings is None:
+        return False, "Configurações de email não configuradas para esta igreja"
+    
+    try:
+        server = connect(settings)
+        try:
+            server.send_message(build_message(church, to_email, subject, html_content, text_content),
+                                to_addrs=[to_email])
+        finally:
+            server.quit()
         return True, "Email enviado com sucesso"
-        
     except Exception as e:
         current_app.logger.error(f"Erro ao enviar email: {str(e)}")
         return False, str(e)
@@ -65,7 +66,7 @@ def send_password_reset_email(user):
     """Envia email para redefinição de senha"""
     from flask import url_for
     
-    church = Church.query.get(user.church_id) if user.church_id else None
+    church = church_settings(user.church_id)
     church_name = church.name if church else "Ecclesia Master"
     
     reset_url = url_for('auth.reset_password', token=user.reset_password_token, _external=True)
@@ -132,7 +133,8 @@ def send_password_reset_email(user):
         to_email=user.email,
         subject=f'Redefinição de Senha - {church_name}',
         html_content=html_content,
-        text_content=text_content
+        text_content=text_content,
+        category='password_reset'
     )
 
 def send_verification_email_via_smtp(user):
@@ -143,7 +145,7 @@ def send_verification_email_via_smtp(user):
         user.email_verification_token = token
         db.session.commit()
     
-    church = Church.query.get(user.church_id) if user.church_id else None
+    church = church_settings(user.church_id)
     church_name = church.name if church else "Ecclesia Master"
     
     verification_url = url_for('auth.verify_email', token=token, _external=True)
@@ -210,5 +212,6 @@ def send_verification_email_via_smtp(user):
         to_email=user.email,
         subject=f'Verifique seu e-mail - {church_name}',
         html_content=html_content,
-        text_content=text_content
+        text_content=text_content,
+        category='verification'
     )
\ No newline at end of file
@@ -1,23 +1,73 @@
 import os
-import json
+import re
+import math
 import time
-from google import genai
-from google.genai import types
+import hashlib
+import threading
+import contextvars
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from itertools import zip_longest
 from flask import current_app
 from dotenv import load_dotenv
+from app.utils.settings_cache import church_settings
+from app.utils.ai_limits import get_limiter
+from app.utils.ai_providers import get_provider, ProviderError
+from app.utils.lazy_imports import genai, genai_types as types
+from app.utils import ai_cache
 
 load_dotenv()
 
+MODEL_NAME = 'gemini-2.5-flash'
+# Incrementar ao mudar _build_prompt (invalida o cache de respostas)
+PROMPT_VERSION = 1
+GAME_WORDS_LIMIT = 12
+
+# ============================================
+# CLIENTES (um por chave de API, reaproveitados)
+# ============================================
+
+_clients = {}          # chave de API -> genai.Client
+_client_key_ids = {}   # id(cliente) -> identificador da chave (para o limitador)
+_registry_lock = threading.Lock()
+
+
+def _key_id(api_key):
+    """Identificador da chave sem expor o valor (logs, limitadores)"""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+
+
+def _church_api_key(church_id):
+    """Chave configurada na filial (cache de configurações, invalidado ao editar a filial)"""
+    church = church_settings(church_id)
+    return church.gemini_api_key if church and church.gemini_api_key else None
+
+
+def get_client_for_key(api_key):
+    """Cliente único por chave (mantém as conexões HTTP abertas entre chamadas)"""
+    with _registry_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            # GEMINI_BASE_URL permite apontar para um servidor local (testes)
+            base_url = os.environ.get('GEMINI_BASE_URL')
+            if base_url:
+                client = genai.Client(api_key=api_key, http_options=types.HttpOptions(base_url=base_url))
+            else:
+                client = genai.Client(api_key=api_key)
+            _clients[api_key] = client
+            _client_key_ids[id(client)] = _key_id(api_key)
+        return client
+
+
+def get_client_limiter(client):
+    """Limitador de concorrência/RPM da chave usada pelo cliente"""
+    return get_limiter('gemini', _client_key_ids.get(id(client)))
+
+
 def get_gemini_client(church_id=None):
     """Retorna cliente Gemini configurado com a chave da filial"""
-    from app.core.models import Church
-    
-    api_key = None
-    
-    if church_id:
-        church = Church.query.get(church_id)
-        if church and church.gemini_api_key:
-            api_key = church.gemini_api_key
+    api_key = _church_api_key(church_id) if church_id else None
     
     # Fallback para .env se não tiver configurado na filial
     if not api_key:
@@ -25,7 +75,98 @@ def get_gemini_client(church_id=None):
     
     if not api_key:
         return None
-    return genai.Client(api_key=api_key)
+    return get_client_for_key(api_key)
+
+
+# ============================================
+# ARQUIVOS ENVIADOS (Files API)
+# ============================================
+
+# A Files API mantém os arquivos por 48h; margem para não usar um quase expirado
+FILE_LIFETIME = timedelta(hours=47)
+FILE_READY_TIMEOUT = 60  # segundos
+FILE_POLL_INITIAL = 0.25
+FILE_POLL_MAX = 4
+
+MIME_TYPES = {
+    '.pdf': 'application/pdf',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    '.txt': 'text/plain',
+}
+
+_uploads = {}  # (chave da API, sha256 do arquivo) -> {'name', 'uri', 'mime_type', 'expires', 'sha256'}
+_uploads_lock = threading.Lock()
+
+
+def mime_type_for(file_path):
+    return MIME_TYPES.get(os.path.splitext(file_path)[1].lower(), 'application/pdf')
+
+
+def _state_name(file):
+    state = getattr(file, 'state', None)
+    return getattr(state, 'name', None) or (str(state) if state else None)
+
+
+def wait_until_active(client, file, timeout=FILE_READY_TIMEOUT):
+    """Consulta o estado do arquivo com backoff exponencial até ficar ACTIVE"""
+    delay = FILE_POLL_INITIAL
+    deadline = time.monotonic() + timeout
+    while _state_name(file) == 'PROCESSING':
+        if time.monotonic() + delay > deadline:
+            raise TimeoutError(f"Arquivo {file.name} ainda em processamento após {timeout}s")
+        time.sleep(delay)
+        delay = min(delay * 2, FILE_POLL_MAX)
+        file = client.files.get(name=file.name)
+    if _state_name(file) == 'FAILED':
+        raise RuntimeError(f"Processamento do arquivo {file.name} falhou no Gemini")
+    return file
+
+
+def get_uploaded_file(client, file_path, mime_type=None):
+    """
+    Envia o arquivo para a Files API (ou reaproveita o envio anterior do mesmo
+    conteúdo com a mesma chave) e aguarda ficar pronto.
+    Retorna dict com uri, mime_type, sha256 e reused.
+    """
+    sha = ai_cache.file_hash(file_path)
+    cache_key = (_client_key_ids.get(id(client)), sha)
+    now = datetime.now(timezone.utc)
+
+    with _uploads_lock:
+        cached = _uploads.get(cache_key)
+    if cached and cached['expires'] > now:
+        return dict(cached, reused=True)
+
+    mime_type = mime_type or mime_type_for(file_path)
+    uploaded = get_provider('gemini').call(
+        lambda: client.files.upload(file=file_path, config=types.UploadFileConfig(mime_type=mime_type)),
+        limiter_key=cache_key[0]
+    )
+    uploaded = wait_until_active(client, uploaded)
+
+    expires = now + FILE_LIFETIME
+    expiration = getattr(uploaded, 'expiration_time', None)
+    if isinstance(expiration, datetime):
+        if expiration.tzinfo is None:
+            expiration = expiration.replace(tzinfo=timezone.utc)
+        expires = min(expires, expiration - timedelta(hours=1))
+
+    entry = {'name': uploaded.name, 'uri': uploaded.uri, 'mime_type': mime_type,
+             'expires': expires, 'sha256': sha}
+    with _uploads_lock:
+        _uploads[cache_key] = entry
+    return dict(entry, reused=False)
+
+
+def forget_uploaded_file(client, sha):
+    with _uploads_lock:
+        _uploads.pop((_client_key_ids.get(id(client)), sha), None)
+
+
+def _file_part(upload):
+    return types.Part(file_data=types.FileData(file_uri=upload['uri'], mime_type=upload['mime_type']))
+
 
 def split_content_for_ai(content, max_chars=5000):
     """Divide conteúdo grande em partes menores para processamento"""
@@ -63,62 +204,16 @@ def extract_text_from_file(file_path):
         current_app.logger.error(f"Erro no extract_text: {e}")
         return None
 
-def generate_questions(content_or_path, type='adult', count=7, is_file=False, church_id=None):
-    client = get_gemini_client(church_id=church_id)  # 🔥 CORRIGIDO
-    if not client:
-        return {"error": "GEMINI_API_KEY não configurada no ambiente."}
+# Conteúdo acima deste tamanho é dividido em trechos (map-reduce)
+CHUNK_THRESHOLD = 8000
+CHUNK_SIZE = 6000
+MAX_CHUNK_WORKERS = 4
 
-    model_name = 'gemini-2.5-flash'
-    contents = []
-    indexing_wait = 2
-    text_content = ""
 
-    # Processar arquivo
-    if is_file and os.path.exists(content_or_path):
-        try:
-            ext = os.path.splitext(content_or_path)[1].lower()
-            mime_type = "application/pdf"
-            if ext == ".docx": 
-                mime_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-            elif ext == ".pptx": 
-                mime_type = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
-            elif ext == ".txt": 
-                mime_type = "text/plain"
-
-            uploaded_file = client.files.upload(
-                file=content_or_path,
-                config=types.UploadFileConfig(mime_type=mime_type)
-            )
-            
-            time.sleep(indexing_wait)
-            
-            contents.append(types.Part(
-                file_data=types.FileData(
-                    file_uri=uploaded_file.uri,
-                    mime_type=mime_type
-                )
-            ))
-        except Exception as e:
-            current_app.logger.error(f"Erro no upload Gemini: {e}")
-            text_content = extract_text_from_file(content_or_path)
-            if not text_content:
-                return {"error": f"Falha no processamento do arquivo: {str(e)}"}
-    else:
-        text_content = content_or_path
-
-    # Se texto for muito grande
-    if text_content and len(text_content) > 8000:
-        current_app.logger.info(f"Conteúdo grande ({len(text_content)} caracteres). Usando primeiros 6000 caracteres.")
-        text_content = text_content[:6000]
-        partial_note = "\n\n[Nota: O conteúdo original é muito extenso. As questões foram geradas com base na primeira parte do texto.]"
-        text_content += partial_note
-
-    if text_content:
-        contents.append(types.Part(text=text_content))
-
-    # Montar o prompt
+def _build_prompt(type, count):
+    """Instruções enviadas junto com o conteúdo"""
     if type == 'kids':
-        prompt_text = f"""
+        return f"""
         Você é um educador infantil especializado em criar atividades bíblicas divertidas.
         Com base no conteúdo fornecido:
         
@@ -147,8 +242,7 @@ def generate_questions(content_or_path, type='adult', count=7, is_file=False, ch
             "game_words": ["PALAVRA1", "PALAVRA2", "PALAVRA3"]
         }}
         """
-    else:
-        prompt_text = f"""
+    return f"""
         Gere {count} questões de múltipla escolha baseadas no seguinte conteúdo bíblico.
         
         REGRAS IMPORTANTES:
@@ -175,40 +269,185 @@ def generate_questions(content_or_path, type='adult', count=7, is_file=False, ch
         }}
         """
 
-    contents.append(types.Part(text=prompt_text))
 
+def _call_model(client, contents, type, logger):
+    """Uma chamada ao Gemini pela camada de provedores; retorna dict ou {'error'}"""
     try:
-        response = client.models.generate_content(
-            model=model_name,
-            contents=contents,
-            config=types.GenerateContentConfig(
-                response_mime_type='application/json',
-                temperature=0.3,
-                http_options={'timeout': 60000}
-            )
+        ai_data = get_provider('gemini').generate_json(
+            client, contents, MODEL_NAME, limiter_key=_client_key_ids.get(id(client))
         )
-        
-        if not response or not response.text:
-            return {"error": "A IA não retornou uma resposta válida a tempo."}
-        
-        ai_text = response.text.strip()
-        
-        if ai_text.startswith("```json"):
-            ai_text = ai_text.split("```json")[1].split("```")[0].strip()
-        elif ai_text.startswith("```"):
-            ai_text = ai_text.split("```")[1].split("```")[0].strip()
-        
-        ai_data = json.loads(ai_text)
-        
-        if type == 'kids' and 'game_words' not in ai_data:
-            ai_data['game_words'] = []
-        
-        return ai_data
+    except ProviderError as e:
+        logger.error(f"Erro na API do Gemini: {str(e)}")
+        return {"error": str(e)}
     
-    except json.JSONDecodeError as e:
-        current_app.logger.error(f"Erro ao decodificar JSON: {e}")
-        return {"error": f"Resposta da IA não é JSON válido: {str(e)}"}
+    if type == 'kids' and 'game_words' not in ai_data:
+        ai_data['game_words'] = []
     
-    except Exception as e:
-        current_app.logger.error(f"Erro na API do Gemini: {str(e)}")
-        return {"error": f"Falha na geração de conteúdo: {str(e)}"}
\ No newline at end of file
+    return ai_data
+
+
+def _question_key(question):
+    """Texto normalizado da pergunta (sem acentos, pontuação e caixa) para deduplicar"""
+    text = unicodedata.normalize('NFKD', str(question.get('question', '')))
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    return ' '.join(re.findall(r'\w+', text))
+
+
+def _is_duplicate(key, seen_keys):
+    """Igual ou quase igual (>= 80% das palavras em comum) a uma pergunta já aceita"""
+    if not key:
+        return True
+    words = set(key.split())
+    for other in seen_keys:
+        if key == other:
+            return True
+        other_words = set(other.split())
+        if len(words & other_words) / max(len(words | other_words), 1) >= 0.8:
+            return True
+    return False
+
+
+def merge_question_sets(results, count, type='adult'):
+    """
+    Junta as questões geradas por trecho: remove duplicadas e intercala os
+    trechos (1º de cada, 2º de cada...) para cobrir o texto inteiro até `count`.
+    """
+    per_chunk = [r.get('questions') or [] for r in results]
+    merged, seen_keys = [], []
+    for round_items in zip_longest(*per_chunk):
+        for question in round_items:
+            if not isinstance(question, dict):
+                continue
+            key = _question_key(question)
+            if _is_duplicate(key, seen_keys):
+                continue
+            seen_keys.append(key)
+            merged.append(question)
+    data = {'questions': merged[:count]}
+
+    if type == 'kids':
+        words, seen_words = [], set()
+        for r in results:
+            for word in r.get('game_words') or []:
+                label = (word.get('word', '') if isinstance(word, dict) else str(word)).strip().upper()
+                if label and label not in seen_words:
+                    seen_words.add(label)
+                    words.append(word)
+        data['game_words'] = words[:GAME_WORDS_LIMIT]
+    return data
+
+
+def _cached(content_sha, type, count, fresh, producer):
+    key = ai_cache.make_key('gemini', MODEL_NAME, PROMPT_VERSION, content_sha, count, type)
+    return ai_cache.cached_call(key, producer, fresh=fresh, provider='gemini',
+                                model=MODEL_NAME, type=type, count=count)
+
+
+def generate_questions_chunked(text, type='adult', count=7, church_id=None, client=None,
+                               chunk_size=CHUNK_SIZE, max_workers=MAX_CHUNK_WORKERS, fresh=False):
+    """
+    Gera questões sobre um texto longo: divide em trechos, processa os trechos em
+    paralelo (pool limitado + limite do provedor) e junta o resultado.
+    fresh=True ignora o cache de respostas.
+    """
+    if not text:
+        return {"error": "Conteúdo vazio."}
+    return _cached(ai_cache.content_hash(text), type, count, fresh,
+                   lambda: _generate_chunked(text, type, count, church_id, client, chunk_size, max_workers))
+
+
+def _generate_chunked(text, type, count, church_id, client, chunk_size, max_workers):
+    client = client or get_gemini_client(church_id=church_id)
+    if not client:
+        return {"error": "GEMINI_API_KEY não configurada no ambiente."}
+
+    chunks = split_content_for_ai(text, max_chars=chunk_size)
+    if not chunks:
+        return {"error": "Conteúdo vazio."}
+
+    # Cada trecho gera um pouco a mais para sobrar questões após a deduplicação
+    per_chunk = max(2, math.ceil(count / len(chunks)) + 1)
+    prompt = _build_prompt(type, per_chunk)
+    logger = current_app.logger
+    total = len(chunks)
+
+    def run(index, chunk):
+        header = f"[Trecho {index + 1} de {total} do conteúdo]\n\n" if total > 1 else ""
+        return _call_model(client, [types.Part(text=header + chunk), types.Part(text=prompt)], type, logger)
+
+    if total == 1:
+        results = [run(0, chunks[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, total)) as pool:
+            # Cópia do contexto por tarefa: os trechos herdam o batch_mode() do chamador
+            futures = [pool.submit(contextvars.copy_context().run, run, index, chunk)
+                       for index, chunk in enumerate(chunks)]
+            results = [future.result() for future in futures]
+
+    ok = [r for r in results if 'error' not in r]
+    if not ok:
+        return results[0]
+    if len(ok) < total:
+        logger.warning(f"Geração de questões: {total - len(ok)} de {total} trechos falharam")
+
+    return merge_question_sets(ok, count, type)
+
+
+def generate_questions(content_or_path, type='adult', count=7, is_file=False, church_id=None, fresh=False):
+    """
+    Gera questões (e palavras dos jogos, no tipo 'kids') a partir de texto ou arquivo.
+    Respostas iguais ficam em cache pelo hash do conteúdo; fresh=True força nova geração.
+    """
+    if is_file and os.path.exists(content_or_path):
+        content_sha = ai_cache.file_hash(content_or_path)
+    elif content_or_path:
+        content_sha = ai_cache.content_hash(content_or_path)
+    else:
+        return {"error": "Conteúdo vazio."}
+    return _cached(content_sha, type, count, fresh,
+                   lambda: _generate_questions(content_or_path, type, count, is_file, church_id))
+
+
+def _generate_questions(content_or_path, type, count, is_file, church_id):
+    client = get_gemini_client(church_id=church_id)  # 🔥 CORRIGIDO
+    if not client:
+        return {"error": "GEMINI_API_KEY não configurada no ambiente."}
+
+    contents = []
+    text_content = ""
+    upload = None
+
+    # Processar arquivo (upload reaproveitado se o mesmo arquivo já foi enviado)
+    if is_file and os.path.exists(content_or_path):
+        try:
+            upload = get_uploaded_file(client, content_or_path)
+            contents.append(_file_part(upload))
+        except Exception as e:
+            current_app.logger.error(f"Erro no upload Gemini: {e}")
+            text_content = extract_text_from_file(content_or_path)
+            if not text_content:
+                return {"error": f"Falha no processamento do arquivo: {str(e)}"}
+    else:
+        text_content = content_or_path
+
+    # Texto grande: processar em trechos paralelos em vez de cortar
+    if not contents and text_content and len(text_content) > CHUNK_THRESHOLD:
+        current_app.logger.info(f"Conteúdo grande ({len(text_content)} caracteres). Gerando questões por trechos.")
+        return _generate_chunked(text_content, type, count, None, client, CHUNK_SIZE, MAX_CHUNK_WORKERS)
+
+    if text_content:
+        contents.append(types.Part(text=text_content))
+
+    contents.append(types.Part(text=_build_prompt(type, count)))
+    result = _call_model(client, contents, type, current_app.logger)
+
+    # Arquivo em cache pode ter sido removido no servidor: enviar de novo uma vez
+    if 'error' in result and upload and upload.get('reused'):
+        forget_uploaded_file(client, upload['sha256'])
+        try:
+            contents[0] = _file_part(get_uploaded_file(client, content_or_path))
+        except Exception as e:
+            current_app.logger.error(f"Erro no upload Gemini: {e}")
+            return result
+        result = _call_model(client, contents, type, current_app.logger)
+    return result
@@ -0,0 +1,31 @@
+# app/utils/identity.py
+"""
+Usuário logado carregado de uma vez para o Flask-Login.
+
+- Uma consulta traz o usuário com cargo, igreja, tema da igreja e ministérios
+  (antes eram 3 a 5 consultas escondidas por página, em lazy loads)
+- Sempre lido na sessão da requisição: não há cópia entre requisições, para
+  que consultas e formulários de edição nunca recebam linhas desatualizadas
+"""
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, configure_mappers
+
+from app.core.models import db, User, Church
+
+
+def _query(user_id):
+    configure_mappers()  # garante os backrefs (User.church, User.church_role, Church.theme)
+    return (select(User)
+            .options(joinedload(User.church_role),
+                     joinedload(User.church).joinedload(Church.theme),
+                     joinedload(User.ministries))
+            .where(User.id == user_id))
+
+
+def load_identity(user_id):
+    """Usuário (anexado à sessão da requisição) ou None"""
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    return db.session.execute(_query(user_id)).unique().scalar_one_or_none()
@@ -0,0 +1,92 @@
+# app/utils/lazy_imports.py
+"""
+Bibliotecas pesadas importadas só no primeiro uso.
+
+    from app.utils.lazy_imports import fitz
+    fitz.open(caminho)   # o import de PyMuPDF acontece aqui
+
+PyMuPDF, Pillow (+ HEIF), o SDK do Gemini, requests, markdown e bleach
+somavam boa parte do tempo de subida de cada worker, e a maioria das
+requisições nunca os usa. Classes que são herdadas (FPDF) ou usadas numa
+única rota (weasyprint, openpyxl, reportlab) são importadas dentro da função.
+
+benchmark_inicializacao.py falha se algum módulo de HEAVY_MODULES voltar a
+ser carregado por create_app.
+"""
+import importlib
+import importlib.util
+import threading
+
+# Não podem ser carregados ao subir a aplicação
+HEAVY_MODULES = (
+    'fitz', 'pymupdf', 'PIL.Image', 'pillow_heif', 'google.genai', 'requests',
+    'markdown', 'bleach', 'weasyprint', 'openpyxl', 'reportlab', 'fpdf',
+)
+
+
+class LazyModule:
+    """Representa o módulo; importa no primeiro acesso a um atributo"""
+
+    def __init__(self, name, on_load=None):
+        self._name = name
+        self._on_load = on_load
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        module = self._module
+        if module is None:
+            with self._lock:
+                if self._module is None:
+                    module = importlib.import_module(self._name)
+                    if self._on_load is not None:
+                        self._on_load(module)
+                    self._module = module
+                module = self._module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'carregado' if self._module is not None else 'não carregado'
+        return f'<LazyModule {self._name} ({state})>'
+
+
+def is_available(name):
+    """Pacote instalado? (sem importar o próprio pacote)"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def optional_module(*names):
+    """Primeiro dos nomes que estiver instalado (carregado sob demanda) ou None"""
+    for name in names:
+        if is_available(name):
+            return LazyModule(name)
+    return None
+
+
+def _register_heif(_image):
+    # Suporte a HEIC (fotos de iPhone) em Image.open
+    import pillow_heif
+    pillow_heif.register_heif_opener()
+
+
+# ============================================
+# MÓDULOS COMPARTILHADOS
+# ============================================
+
+fitz = optional_module('pymupdf', 'fitz')
+Image = LazyModule('PIL.Image', on_load=_register_heif)
+ImageDraw = LazyModule('PIL.ImageDraw')
+ImageFont = LazyModule('PIL.ImageFont')
+ImageOps = LazyModule('PIL.ImageOps')
+requests = LazyModule('requests')
+genai = LazyModule('google.genai')
+genai_types = LazyModule('google.genai.types')
+genai_errors = LazyModule('google.genai.errors')
+markdown = LazyModule('markdown')
+bleach = LazyModule('bleach')
@@ -0,0 +1,261 @@
+# app/utils/member_search.py
+"""
+Índice de busca de membros (nome, email, telefone) sem distinção de acentos.
+
+- SQLite: tabela virtual FTS5 com tokenizer trigram (busca por trecho/prefixo)
+- PostgreSQL: índice GIN pg_trgm sobre f_unaccent(lower(nome || email || telefone))
+
+No SQLite o índice é preenchido pela migração e mantido pelos eventos da
+sessão; no PostgreSQL é um índice de expressão, mantido pelo próprio banco.
+"""
+import re
+import time
+from sqlalchemy import event, inspect as sa_inspect, or_, select, text, column
+from app.core.models import db, User
+from app.utils.search_index import fold, INDEX_RECHECK_SECONDS
+
+SQLITE_TABLE = 'member_search'
+PG_INDEX = 'ix_user_search_trgm'
+
+# Expressão indexada no PostgreSQL (a consulta precisa usar exatamente a mesma)
+PG_SEARCH_EXPR = "f_unaccent(lower({t}name || ' ' || {t}email || ' ' || coalesce({t}phone, '')))"
+PG_INDEX_EXPR = PG_SEARCH_EXPR.format(t='')
+PG_QUERY_EXPR = PG_SEARCH_EXPR.format(t='"user".')
+
+INDEXED_FIELDS = ('name', 'email', 'phone', 'church_id')
+
+# Mesmo princípio do índice de conteúdo: url -> (existe, verificado_em);
+# "não existe" é verificado de novo após INDEX_RECHECK_SECONDS
+_index_ready = {}
+_listeners_registered = False
+
+
+def _backend(bind=None):
+    bind = bind or db.engine
+    name = bind.dialect.name
+    return name if name in ('sqlite', 'postgresql') else None
+
+
+def normalize_query(q):
+    """Texto da busca sem acentos, minúsculo e com espaços simples"""
+    return ' '.join(fold(q or '').split())
+
+
+def _digits(valor):
+    return re.sub(r'\D', '', valor or '')
+
+
+def is_index_ready(bind=None):
+    """Verifica se a estrutura do índice existe (uma vez por engine; se não existir, de novo após INDEX_RECHECK_SECONDS)"""
+    bind = bind or db.engine
+    engine = getattr(bind, 'engine', bind)
+    key = str(engine.url)
+    ready, checked_at = _index_ready.get(key, (False, None))
+    if not ready and (checked_at is None or time.monotonic() - checked_at >= INDEX_RECHECK_SECONDS):
+        backend = _backend(engine)
+        try:
+            if backend == 'sqlite':
+                ready = sa_inspect(engine).has_table(SQLITE_TABLE)
+            elif backend == 'postgresql':
+                with engine.connect() as conn:
+                    ready = conn.execute(
+                        text("SELECT 1 FROM pg_indexes WHERE indexname = :name"), {'name': PG_INDEX}
+                    ).first() is not None
+            else:
+                ready = False
+        except Exception:
+            ready = False
+        _index_ready[key] = (ready, time.monotonic())
+    return ready
+
+
+def create_member_search_schema(connection):
+    """Cria as estruturas do índice conforme o banco configurado"""
+    backend = _backend(connection)
+    if backend == 'sqlite':
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} "
+            f"USING fts5(name, extra, church_id UNINDEXED, tokenize = 'trigram')"
+        ))
+    elif backend == 'postgresql':
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
+        # unaccent() não é IMMUTABLE; o wrapper permite usá-lo num índice
+        connection.execute(text("""
+            CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+            LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+            AS $$ SELECT public.unaccent('public.unaccent', $1) $$
+        """))
+        connection.execute(text(
+            f'CREATE INDEX IF NOT EXISTS {PG_INDEX} ON "user" USING GIN ({PG_INDEX_EXPR} gin_trgm_ops)'
+        ))
+    _index_ready.pop(str(connection.engine.url), None)
+
+
+# ============================================
+# SINCRONIZAÇÃO (SQLITE)
+# ============================================
+
+def index_member(connection, user):
+    """Insere ou atualiza um membro no índice FTS5"""
+    connection.execute(text(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = :id"), {'id': user.id})
+    extra = f"{fold(user.email)} {fold(user.phone)} {_digits(user.phone)}"
+    connection.execute(
+        text(f"INSERT INTO {SQLITE_TABLE} (rowid, name, extra, church_id) VALUES (:id, :name, :extra, :church_id)"),
+        {'id': user.id, 'name': normalize_query(user.name), 'extra': extra, 'church_id': user.church_id}
+    )
+
+
+def fill_member_index(connection, batch_size=500):
+    """Indexa todos os membros numa conexão (app ou migração; só SQLite). Retorna a quantidade indexada."""
+    total = 0
+    last_id = 0
+    while True:
+        lote = connection.execute(
+            select(User.id, User.name, User.email, User.phone, User.church_id)
+            .where(User.id > last_id).order_by(User.id.asc()).limit(batch_size)
+        ).all()
+        if not lote:
+            break
+        for user in lote:
+            index_member(connection, user)
+            total += 1
+        last_id = lote[-1].id
+    return total
+
+
+def rebuild_member_index(batch_size=500):
+    """Recria o índice de membros. Retorna a quantidade indexada."""
+    connection = db.session.connection()
+    create_member_search_schema(connection)
+    if _backend(connection) != 'sqlite':
+        db.session.commit()
+        return User.query.count()
+
+    connection.execute(text(f"DELETE FROM {SQLITE_TABLE}"))
+    total = fill_member_index(connection, batch_size)
+    db.session.commit()
+    return total
+
+
+def _sync_after_flush(session, flush_context):
+    changed = []
+    removed = []
+    for obj in session.new:
+        if isinstance(obj, User):
+            changed.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            state = sa_inspect(obj)
+            if any(state.attrs[f].history.has_changes() for f in INDEXED_FIELDS):
+                changed.append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            removed.append(obj.id)
+
+    if not changed and not removed:
+        return
+
+    connection = session.connection()
+    if _backend(connection) != 'sqlite' or not is_index_ready(connection):
+        return
+
+    try:
+        with connection.begin_nested():
+            for user in changed:
+                index_member(connection, user)
+            for user_id in removed:
+                connection.execute(text(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = :id"), {'id': user_id})
+    except Exception as e:
+        print(f"Erro ao atualizar índice de membros: {e}")
+
+
+def init_member_search(app):
+    """Registra a sincronização do índice de membros com a sessão"""
+    global _listeners_registered
+    if not _listeners_registered:
+        event.listen(db.session, 'after_flush', _sync_after_flush)
+        _listeners_registered = True
+
+
+# ============================================
+# CONSULTA
+# ============================================
+
+def _fts_match_expr(termo):
+    """Frases trigram (um termo por palavra com 3+ letras); None se nenhuma servir"""
+    palavras = [p for p in termo.split() if len(p) >= 3]
+    if not palavras:
+        return None
+    return ' AND '.join('"' + p.replace('"', '""') + '"' for p in palavras)
+
+
+def _like_escape(valor):
+    return valor.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _sqlite_ids_select(termo, church_id=None, limit=None):
+    """SELECT textual dos ids de membros correspondentes, ordenados por relevância"""
+    match = _fts_match_expr(termo)
+    params = {'prefix': _like_escape(termo) + '%'}
+    if match:
+        where = f"{SQLITE_TABLE} MATCH :match"
+        order = f"(name LIKE :prefix ESCAPE '\\') DESC, bm25({SQLITE_TABLE}, 5.0, 1.0), name"
+        params['match'] = match
+    else:
+        # Menos de 3 letras: o trigram não indexa, usar prefixo do nome
+        where = "name LIKE :prefix ESCAPE '\\'"
+        order = "name"
+    if church_id:
+        where += " AND church_id = :church_id"
+        params['church_id'] = church_id
+    sql = f"SELECT rowid AS id FROM {SQLITE_TABLE} WHERE {where} ORDER BY {order}"
+    if limit:
+        sql += " LIMIT :limit"
+        params['limit'] = limit
+    return text(sql).bindparams(**params).columns(column('id'))
+
+
+def member_search_filter(q):
+    """
+    Critério SQLAlchemy para filtrar User por nome/email/telefone.
+    Usa o índice quando disponível; caso contrário, ILIKE.
+    """
+    termo = normalize_query(q)
+    if not termo:
+        return db.true()
+
+    if is_index_ready():
+        if _backend() == 'sqlite':
+            return User.id.in_(_sqlite_ids_select(termo))
+        if _backend() == 'postgresql':
+            return text(f"{PG_QUERY_EXPR} LIKE :member_pattern").bindparams(member_pattern=f'%{_like_escape(termo)}%')
+
+    return or_(
+        User.name.ilike(f'%{q}%'),
+        User.email.ilike(f'%{q}%'),
+        User.phone.ilike(f'%{q}%')
+    )
+
+
+def search_member_ids(q, church_id=None, limit=10):
+    """IDs dos membros mais relevantes para a busca (typeahead)"""
+    termo = normalize_query(q)
+    if not termo:
+        return []
+
+    if is_index_ready() and _backend() == 'sqlite':
+        return [row.id for row in db.session.execute(_sqlite_ids_select(termo, church_id, limit))]
+
+    query = db.session.query(User.id).filter(member_search_filter(q))
+    if church_id:
+        query = query.filter(User.church_id == church_id)
+    if is_index_ready() and _backend() == 'postgresql':
+        # Nomes que começam com o termo primeiro, depois por similaridade
+        query = query.order_by(
+            text("f_unaccent(lower(\"user\".name)) LIKE :member_prefix DESC").bindparams(
+                member_prefix=_like_escape(termo) + '%'),
+            text(f"similarity({PG_QUERY_EXPR}, :member_term) DESC").bindparams(
+                member_term=termo)
+        )
+    return [row.id for row in query.order_by(User.name).limit(limit).all()]
@@ -0,0 +1,237 @@
+# app/utils/metrics.py
+"""
+Métricas no formato do Prometheus em /metrics.
+
+- Requisições: latência por rota (histograma), total por rota/método/status,
+  consultas SQL por requisição, tempo de banco e bytes enviados (dados de
+  app/utils/request_metrics.py; com PERF_ENABLED=false ficam zerados)
+- Pool de conexões do banco: conexões em uso e tamanho do pool
+- Caches (configurações, respostas da IA): consultas por
+  resultado (hit/miss); a taxa de acerto sai da razão entre eles
+- Filas: e-mails por status (tabela email_outbox) e jobs de IA em execução
+- IA: latência das chamadas por provedor e erros por tipo
+- Processamento de uploads e geração de PDFs: duração por etapa/documento
+
+Com vários workers do Gunicorn, cada processo grava seus valores em arquivos
+na pasta PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py define e limpa a pasta)
+e /metrics soma todos. Sem essa variável, vale só o processo atual (flask run).
+Sem o pacote prometheus_client, /metrics responde 503 e o resto não faz nada.
+
+Acesso: com METRICS_TOKEN, exige "Authorization: Bearer <token>"; sem ele,
+só de 127.0.0.1/::1 e sem passar por proxy (X-Forwarded-For).
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from flask import Response, abort, request
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+try:
+    from prometheus_client import (CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+                                   CONTENT_TYPE_LATEST, generate_latest, multiprocess)
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:  # opcional: sem ele, /metrics fica indisponível
+    CollectorRegistry = None
+
+PREFIX = 'ecclesia'
+LOCAL_ADDRESSES = {'127.0.0.1', '::1'}
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+_listeners_registered = False
+
+
+class _Noop:
+    """Substitui as métricas quando o prometheus_client não está instalado"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def inc(self, *args, **kwargs):
+        pass
+
+    dec = set = observe = inc
+
+
+def _metric(kind, name, documentation, labels=(), **kwargs):
+    if CollectorRegistry is None:
+        return _Noop()
+    cls = {'counter': Counter, 'gauge': Gauge, 'histogram': Histogram}[kind]
+    return cls(f'{PREFIX}_{name}', documentation, labels, **kwargs)
+
+
+def _multiprocess():
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR') or os.environ.get('prometheus_multiproc_dir'))
+
+
+# ============================================
+# MÉTRICAS
+# ============================================
+
+REQUEST_LATENCY = _metric('histogram', 'request_duration_seconds',
+                          'Duração das requisições', ('endpoint',))
+REQUESTS = _metric('counter', 'requests_total',
+                   'Requisições atendidas', ('endpoint', 'method', 'status'))
+REQUEST_QUERIES = _metric('histogram', 'request_db_queries',
+                          'Consultas SQL por requisição', ('endpoint',), buckets=QUERY_BUCKETS)
+DB_TIME = _metric('counter', 'db_query_seconds_total',
+                  'Tempo gasto em consultas SQL nas requisições', ('endpoint',))
+RESPONSE_BYTES = _metric('counter', 'response_bytes_total',
+                         'Bytes enviados nas respostas', ('endpoint',))
+
+POOL_CHECKED_OUT = _metric('gauge', 'db_pool_checked_out',
+                           'Conexões do pool em uso', multiprocess_mode='livesum')
+POOL_SIZE = _metric('gauge', 'db_pool_size',
+                    'Tamanho configurado do pool de conexões', multiprocess_mode='livesum')
+
+CACHE_LOOKUPS = _metric('counter', 'cache_lookups_total',
+                        'Consultas aos caches por resultado', ('cache', 'result'))
+
+AI_LATENCY = _metric('histogram', 'ai_request_duration_seconds',
+                     'Duração das chamadas aos provedores de IA (com novas tentativas)',
+                     ('provider', 'outcome'), buckets=SLOW_BUCKETS)
+AI_ERRORS = _metric('counter', 'ai_errors_total',
+                    'Falhas nas chamadas aos provedores de IA', ('provider', 'kind'))
+
+UPLOAD_DURATION = _metric('histogram', 'upload_processing_seconds',
+                          'Processamento de arquivos enviados', ('step',), buckets=SLOW_BUCKETS)
+PDF_DURATION = _metric('histogram', 'pdf_render_seconds',
+                       'Geração de PDFs', ('document',), buckets=SLOW_BUCKETS)
+
+
+# ============================================
+# REGISTRO (chamado pelos módulos)
+# ============================================
+
+def count_cache(cache, result):
+    """result: 'hit', 'miss' ou outro estado do cache (ex.: 'check')"""
+    CACHE_LOOKUPS.labels(cache=cache, result=result).inc()
+
+
+def observe_ai(provider, seconds, error_kind=None):
+    """error_kind: None (sucesso), 'circuit_open', 'retryable' ou 'fatal'"""
+    AI_LATENCY.labels(provider=provider, outcome='error' if error_kind else 'ok').observe(seconds)
+    if error_kind:
+        AI_ERRORS.labels(provider=provider, kind=error_kind).inc()
+
+
+@contextmanager
+def track_upload(step):
+    """Mede uma etapa do processamento de um upload (também serve como decorador)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        UPLOAD_DURATION.labels(step=step).observe(time.perf_counter() - start)
+
+
+@contextmanager
+def track_pdf(document):
+    """Mede a geração de um PDF (também serve como decorador)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        PDF_DURATION.labels(document=document).observe(time.perf_counter() - start)
+
+
+def _observe_request(record):
+    endpoint = record['endpoint'] or 'none'
+    REQUESTS.labels(endpoint=endpoint, method=record['method'], status=str(record['status'])).inc()
+    REQUEST_LATENCY.labels(endpoint=endpoint).observe(record['duration_ms'] / 1000)
+    REQUEST_QUERIES.labels(endpoint=endpoint).observe(record['queries'])
+    DB_TIME.labels(endpoint=endpoint).inc(record['db_ms'] / 1000)
+    if record['size']:
+        RESPONSE_BYTES.labels(endpoint=endpoint).inc(record['size'])
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    POOL_CHECKED_OUT.inc()
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    POOL_CHECKED_OUT.dec()
+
+
+# ============================================
+# FILAS (lidas do banco/arquivos na hora da coleta)
+# ============================================
+
+class _QueueCollector:
+    """Valores compartilhados por todos os workers: lidos direto da fonte"""
+
+    def collect(self):
+        from app.core.models import db
+        from app.utils.email_outbox import outbox_status
+        from app.utils.ai_jobs import job_counts
+
+        emails = GaugeMetricFamily(f'{PREFIX}_email_outbox_messages', 'Mensagens na fila de e-mail por status',
+                                   labels=['status'])
+        try:
+            for status, total in sorted(outbox_status().items()):
+                emails.add_metric([status], total)
+        except Exception as e:
+            print(f"Erro ao ler a fila de e-mails para /metrics: {e}")
+            db.session.rollback()
+        yield emails
+
+        jobs = GaugeMetricFamily(f'{PREFIX}_ai_jobs', 'Jobs de IA recentes por status', labels=['status'])
+        for status, total in sorted(job_counts().items()):
+            jobs.add_metric([status], total)
+        yield jobs
+
+
+def render_metrics():
+    """Texto no formato do Prometheus (soma os workers no modo multiprocesso)"""
+    if _multiprocess():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    output = generate_latest(registry)
+    # As filas entram à parte para não serem registradas no REGISTRY global
+    queues = CollectorRegistry(auto_describe=False)
+    queues.register(_QueueCollector())
+    return output + generate_latest(queues)
+
+
+def _authorized(token):
+    if token:
+        return request.headers.get('Authorization', '') == f'Bearer {token}'
+    return request.remote_addr in LOCAL_ADDRESSES and 'X-Forwarded-For' not in request.headers
+
+
+def init_metrics(app):
+    """Registra /metrics e os ganchos (pool, requisições); METRICS_ENABLED=false desliga"""
+    global _listeners_registered
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+    if CollectorRegistry is not None and not _listeners_registered:
+        from app.utils import request_metrics
+        request_metrics.add_listener(_observe_request)
+        request_metrics.SKIP_ENDPOINTS.add('prometheus_metrics')
+        event.listen(Pool, 'checkout', _on_checkout)
+        event.listen(Pool, 'checkin', _on_checkin)
+        _listeners_registered = True
+
+        from app.core.models import db
+        with app.app_context():
+            size = getattr(db.engine.pool, 'size', None)
+            if callable(size):
+                POOL_SIZE.set(size())
+
+    def prometheus_metrics():
+        if not _authorized(app.config.get('METRICS_TOKEN')):
+            abort(403)
+        if CollectorRegistry is None:
+            return Response('prometheus_client não instalado\n', status=503, mimetype='text/plain')
+        return Response(render_metrics(), mimetype=CONTENT_TYPE_LATEST)
+
+    app.add_url_rule('/metrics', 'prometheus_metrics', prometheus_metrics)
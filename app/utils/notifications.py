@@ -0,0 +1,227 @@
+# app/utils/notifications.py
+"""
+Comunicados em massa e resumo semanal por e-mail.
+
+- Os destinatários saem de uma única consulta (igreja, ministério, cargo,
+  aniversariantes dos próximos dias)
+- Assunto e texto escritos pelo líder aceitam {{ nome }}, {{ primeiro_nome }}
+  e {{ igreja }}; são compilados uma vez (ambiente Jinja isolado, sem acesso a
+  nada do sistema) e renderizados por destinatário, junto com o layout do e-mail
+- Todas as mensagens entram na fila de e-mails num único INSERT; conexão por
+  igreja, limite por minuto e novas tentativas ficam com email_outbox
+- Resumo semanal (opt-in em User.weekly_digest): eventos dos próximos 7 dias,
+  estudos novos e o devocional do dia, montados uma vez por igreja
+"""
+from datetime import date, datetime, time, timedelta
+
+from flask import current_app, url_for
+from jinja2 import TemplateError
+from jinja2.sandbox import SandboxedEnvironment
+from sqlalchemy import insert
+
+from app.core.models import db, User, Church, Study, Devotional, EmailOutbox, SystemSetting, member_ministries
+from app.utils.birthdays import birthday_window_filter
+from app.utils.email_outbox import wake_sender, smtp_settings
+from app.utils.recurrence import get_occurrences
+
+AUDIENCES = {
+    'church': 'Toda a congregação',
+    'ministry': 'Membros de um ministério',
+    'role': 'Membros com um cargo',
+    'birthdays': 'Aniversariantes dos próximos dias',
+}
+INSERT_CHUNK = 500
+DIGEST_DAYS = 7
+DIGEST_MAX_EVENTS = 15
+DIGEST_MAX_STUDIES = 10
+DIGEST_BODY = "Olá {{ primeiro_nome }}!\n\n{{ resumo }}"  # resumo: texto montado uma vez por igreja
+
+# Textos dos líderes: só variáveis simples, sem acesso a objetos do sistema
+_sandbox = SandboxedEnvironment(autoescape=False)
+
+
+# ============================================
+# DESTINATÁRIOS
+# ============================================
+
+def resolve_recipients(church_id, ministry_id=None, role_id=None, birthday_days=None, today=None):
+    """Membros ativos com e-mail no público escolhido (uma consulta)"""
+    query = db.session.query(User.id, User.name, User.email).filter(
+        User.church_id == church_id,
+        User.status == 'active',
+        User.email.isnot(None),
+        User.email != ''
+    )
+    if ministry_id:
+        query = query.join(member_ministries, member_ministries.c.user_id == User.id).filter(
+            member_ministries.c.ministry_id == ministry_id)
+    if role_id:
+        query = query.filter(User.church_role_id == role_id)
+    if birthday_days is not None:
+        query = query.filter(birthday_window_filter(birthday_days, today))
+    return query.order_by(User.name).all()
+
+
+# ============================================
+# RENDERIZAÇÃO
+# ============================================
+
+def compile_message(subject, body):
+    """Compila assunto e texto uma vez; ValueError se o modelo for inválido"""
+    try:
+        return _sandbox.from_string(subject or ''), _sandbox.from_string(body or '')
+    except TemplateError as e:
+        raise ValueError(f"Modelo de mensagem inválido: {e}")
+
+
+def _variables(church, recipient):
+    name = recipient.name or ''
+    return {
+        'nome': name,
+        'primeiro_nome': name.split(' ')[0] if name else '',
+        'igreja': church.name,
+        'email': recipient.email,
+    }
+
+
+def render_messages(church, subject, body, recipients, category='notification',
+                    template='emails/notification.html', extra_variables=None, **context):
+    """
+    Linhas prontas para a fila (uma por destinatário).
+    extra_variables: valores comuns a todos, disponíveis no assunto/texto
+    """
+    subject_tpl, body_tpl = compile_message(subject, body)
+    layout = current_app.jinja_env.get_template(template)
+    now = datetime.utcnow()
+
+    rows = []
+    for recipient in recipients:
+        variables = dict(extra_variables or {}, **_variables(church, recipient))
+        try:
+            text = body_tpl.render(variables)
+            rendered_subject = ' '.join(subject_tpl.render(variables).split())
+        except TemplateError as e:
+            raise ValueError(f"Modelo de mensagem inválido: {e}")
+        rows.append({
+            'church_id': church.id,
+            'to_email': recipient.email,
+            'subject': rendered_subject[:255],
+            'text_content': text,
+            'html_content': layout.render(church=church, body=text, subject=rendered_subject, **variables, **context),
+            'category': category,
+            'status': 'pending',
+            'attempts': 0,
+            'next_attempt_at': now,
+            'created_at': now,
+        })
+    return rows
+
+
+def queue_messages(rows):
+    """Grava as mensagens na fila em lote e acorda o remetente"""
+    for start in range(0, len(rows), INSERT_CHUNK):
+        db.session.execute(insert(EmailOutbox), rows[start:start + INSERT_CHUNK])
+    db.session.commit()
+    if rows:
+        wake_sender()
+    return len(rows)
+
+
+def send_notification(church, subject, body, recipients, category='notification'):
+    """Renderiza e enfileira o comunicado; retorna quantas mensagens foram para a fila"""
+    if smtp_settings(church) is None:
+        raise ValueError("Configurações de email não configuradas para esta igreja")
+    return queue_messages(render_messages(church, subject, body, recipients, category=category))
+
+
+# ============================================
+# RESUMO SEMANAL
+# ============================================
+
+def _week_key(today):
+    year, week, _ = today.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _shared_digest_content(today):
+    """Estudos novos e devocional do dia (iguais para todas as igrejas)"""
+    studies = (db.session.query(Study.id, Study.title, Study.category)
+               .filter(Study.created_at >= datetime.combine(today - timedelta(days=DIGEST_DAYS), time.min))
+               .order_by(Study.created_at.desc()).limit(DIGEST_MAX_STUDIES).all())
+    devotional = Devotional.query.filter(Devotional.date == today).first()
+    return {
+        'studies': [{'title': s.title, 'category': s.category,
+                     'url': url_for('edification.study_detail', id=s.id, _external=True)} for s in studies],
+        'devotional': devotional,
+        'devotionals_url': url_for('edification.devotionals', _external=True),
+    }
+
+
+def _digest_text(church_name, events, shared):
+    """Resumo em texto (igual para todos da igreja; só a saudação é por pessoa)"""
+    lines = [f"Este é o resumo da semana da {church_name}.", ""]
+    if events:
+        lines.append("PRÓXIMOS EVENTOS")
+        lines += [f"- {e.start_time:%d/%m %H:%M} - {e.title}" + (f" ({e.location})" if e.location else '')
+                  for e in events]
+        lines.append("")
+    if shared['studies']:
+        lines.append("NOVOS ESTUDOS")
+        lines += [f"- {s['title']}: {s['url']}" for s in shared['studies']]
+        lines.append("")
+    if shared['devotional']:
+        lines += ["DEVOCIONAL DE HOJE", shared['devotional'].title or '', shared['devotional'].verse or '',
+                  shared['devotionals_url'], ""]
+    lines.append("Para deixar de receber este resumo, desmarque a opção no seu perfil.")
+    return '\n'.join(lines)
+
+
+def send_weekly_digests(church_id=None, today=None, dry_run=False, force=False):
+    """
+    Enfileira o resumo para quem optou por recebê-lo (uma vez por semana por igreja).
+    Retorna {igreja: quantidade ou motivo de não envio}
+    """
+    today = today or date.today()
+    week = _week_key(today)
+
+    query = db.session.query(User.id, User.name, User.email, User.church_id).filter(
+        User.weekly_digest.is_(True),
+        User.status == 'active',
+        User.email.isnot(None),
+        User.email != '',
+        User.church_id.isnot(None)
+    )
+    if church_id:
+        query = query.filter(User.church_id == church_id)
+
+    by_church = {}
+    for row in query.order_by(User.church_id, User.name):
+        by_church.setdefault(row.church_id, []).append(row)
+    if not by_church:
+        return {}
+
+    shared = _shared_digest_content(today)
+    start = datetime.combine(today, time.min)
+    results = {}
+    for church in Church.query.filter(Church.id.in_(by_church)).order_by(Church.name):
+        setting_key = f'weekly_digest_sent_{church.id}'
+        if not force and SystemSetting.get(setting_key) == week:
+            results[church.name] = 'já enviado nesta semana'
+            continue
+        if smtp_settings(church) is None:
+            results[church.name] = 'email não configurado'
+            continue
+
+        events = get_occurrences(start, start + timedelta(days=DIGEST_DAYS), church_id=church.id,
+                                 ministry_ids=[], include_general=True, limit=DIGEST_MAX_EVENTS)
+        rows = render_messages(church, 'Resumo da semana - {{ igreja }}', DIGEST_BODY, by_church[church.id],
+                               category='digest', template='emails/weekly_digest.html',
+                               extra_variables={'resumo': _digest_text(church.name, events, shared)},
+                               events=events, profile_url=url_for('members.edit_profile', _external=True),
+                               **shared)
+        if dry_run:
+            results[church.name] = len(rows)
+            continue
+        results[church.name] = queue_messages(rows)
+        SystemSetting.set(setting_key, week, description='Última semana com resumo enviado')
+    return results
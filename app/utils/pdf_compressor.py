@@ -0,0 +1,133 @@
+# app/utils/pdf_compressor.py
+"""
+Compressão de PDFs grandes (histórias kids, materiais enviados).
+
+Com PyMuPDF: as imagens acima de `dpi` são reduzidas e regravadas em JPEG com
+a `qualidade` informada, e o arquivo é salvo com coleta de lixo (garbage=4,
+que também junta objetos duplicados), deflate e fluxos de objetos.
+O trabalho roda em um processo separado para não travar a thread da
+requisição (e o GIL) com um PDF de 15 MB; sem processos disponíveis, roda
+no próprio processo. Se passar do `timeout`, o processo de trabalho é
+encerrado (não fica ocupando o pool nem gravando o arquivo depois). O
+original só é substituído se o resultado for menor.
+"""
+import glob
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from app.utils.lazy_imports import fitz
+from app.utils.metrics import track_upload
+
+DPI_PADRAO = 150
+QUALIDADE_PADRAO = 75
+TIMEOUT_PADRAO = 120
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _comprimir(origem, destino, dpi, qualidade):
+    """Executado no processo de trabalho: grava `destino` e retorna o tamanho"""
+    doc = fitz.open(origem)
+    try:
+        if dpi or qualidade:
+            # Só reduz imagens bem acima do alvo (evita regravar por poucos pixels)
+            doc.rewrite_images(
+                dpi_threshold=int(dpi * 1.2) if dpi else None,
+                dpi_target=dpi or 0,
+                quality=qualidade or 0,
+                lossless=True,
+                bitonal=False,
+            )
+        doc.save(destino, garbage=4, deflate=True, deflate_images=True,
+                 deflate_fonts=True, clean=True, use_objstms=1)
+    finally:
+        doc.close()
+    return os.path.getsize(destino)
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=int(os.environ.get('PDF_COMPRESS_WORKERS', 1)))
+        return _pool
+
+
+def _reset_pool(encerrar=False):
+    """Descarta o pool; com encerrar=True também mata os processos (shutdown não interrompe a tarefa em curso)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is None:
+        return
+    if encerrar:
+        for processo in list((getattr(pool, '_processes', None) or {}).values()):
+            processo.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _remover_sobras(base):
+    """Apaga arquivos temporários de compressões anteriores interrompidas"""
+    for sobra in glob.glob(f"{glob.escape(base)}_comprimido_*.pdf"):
+        try:
+            os.remove(sobra)
+        except OSError:
+            pass
+
+
+@track_upload('pdf_compress')
+def comprimir_pdf(caminho, dpi=DPI_PADRAO, qualidade=QUALIDADE_PADRAO, em_processo=True, timeout=TIMEOUT_PADRAO):
+    """
+    Comprime o PDF no lugar.
+    Retorna {'comprimido', 'tamanho_original', 'tamanho_final', 'reducao', 'segundos', 'erro'}
+    """
+    tamanho_original = os.path.getsize(caminho)
+    resultado = {
+        'comprimido': False,
+        'tamanho_original': tamanho_original,
+        'tamanho_final': tamanho_original,
+        'reducao': 0.0,
+        'segundos': 0.0,
+        'erro': None,
+    }
+    if fitz is None:
+        resultado['erro'] = 'PyMuPDF não está instalado'
+        return resultado
+
+    base, _ = os.path.splitext(caminho)
+    _remover_sobras(base)
+    destino = f"{base}_comprimido_{uuid.uuid4().hex[:8]}.pdf"
+    inicio = time.perf_counter()
+    try:
+        tamanho_final = None
+        if em_processo:
+            try:
+                futuro = _get_pool().submit(_comprimir, caminho, destino, dpi, qualidade)
+                tamanho_final = futuro.result(timeout=timeout)
+            except FuturesTimeoutError:
+                # Antes do OSError: no Python 3.11+ é o TimeoutError embutido, subclasse de OSError
+                _reset_pool(encerrar=True)
+                raise RuntimeError(f'Tempo esgotado ao comprimir o PDF ({timeout}s)')
+            except (BrokenProcessPool, OSError) as e:
+                # Processo de trabalho morreu ou não pôde ser criado: tenta aqui mesmo
+                print(f"⚠️ Compressão em processo separado falhou ({e}). Comprimindo no processo atual...")
+                _reset_pool()
+        if tamanho_final is None:
+            tamanho_final = _comprimir(caminho, destino, dpi, qualidade)
+
+        if tamanho_final < tamanho_original:
+            os.replace(destino, caminho)
+            resultado.update(comprimido=True, tamanho_final=tamanho_final,
+                             reducao=(1 - tamanho_final / tamanho_original) * 100)
+    except Exception as e:
+        resultado['erro'] = str(e)
+    finally:
+        resultado['segundos'] = time.perf_counter() - inicio
+        if os.path.exists(destino):
+            os.remove(destino)
+    return resultado
@@ -2,6 +2,7 @@ from fpdf import FPDF
 import os
 from flask import current_app
 from datetime import datetime
+from app.utils.metrics import track_pdf
 
 class ReceiptPDF(FPDF):
     def header(self):
@@ -13,6 +14,7 @@ class ReceiptPDF(FPDF):
         pass
 
 
+@track_pdf('receipt')
 def generate_receipt(transaction):
     """
     Gera recibo individual para uma única transação
@@ -243,6 +245,7 @@ def generate_receipt(transaction):
     return filename
 
 
+@track_pdf('consolidated_receipt')
 def generate_consolidated_receipt(user, transactions, start_date, end_date):
     """
     Gera recibo consolidado para múltiplas transações em um período.
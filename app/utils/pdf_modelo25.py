@@ -1,10 +1,12 @@
 # app/utils/pdf_modelo25.py
-import fitz  # PyMuPDF
 import os
 import math
 from datetime import datetime
 from flask import current_app
+from app.utils.lazy_imports import fitz  # PyMuPDF
+from app.utils.metrics import track_pdf
 
+@track_pdf('modelo25')
 def fill_modelo25_pdf(data, output_filename=None):
     """
     Preenche o Modelo 25 oficial, gerando múltiplas declarações se necessário.
@@ -0,0 +1,272 @@
+# app/utils/recurrence.py
+"""
+Eventos recorrentes armazenados como regra (estilo RRULE) e expandidos sob demanda.
+
+Regras suportadas (Event.recurrence_rule):
+- FREQ=WEEKLY;INTERVAL=n                 -> a cada n semanas, no dia da semana do início
+- FREQ=MONTHLY;INTERVAL=n;BYMONTHDAY=d   -> dia d do mês (29-31 caem no último dia dos meses curtos)
+- FREQ=MONTHLY;INTERVAL=n;BYDAY=2SU      -> 2º domingo do mês (-1SU = último domingo)
+
+Datas canceladas ficam em Event.recurrence_exceptions (lista 'YYYY-MM-DD') e o fim
+da série em Event.recurrence_until. As ocorrências expandidas são guardadas em
+cache por igreja/janela e invalidadas quando um evento da igreja muda.
+"""
+import calendar
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy import event as sa_event, or_
+from app.core.models import db, Event
+
+WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+# Até onde a agenda mostra ocorrências futuras de séries sem fim
+DEFAULT_HORIZON = timedelta(days=180)
+
+# Cache de ocorrências: (igreja, escopo, janela) -> (criado_em, [(event_id, início, fim)])
+CACHE_TTL = 60  # segundos (outros workers só veem mudanças após o TTL)
+CACHE_MAX_ENTRIES = 512
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+# ============================================
+# REGRAS
+# ============================================
+
+def build_rule(recurrence, start_time, interval=1):
+    """
+    Monta a regra a partir da opção do formulário:
+    'weekly', 'monthly' (mesmo dia do mês) ou 'monthly_weekday' (ex.: 2º domingo)
+    """
+    if recurrence == 'weekly':
+        return f"FREQ=WEEKLY;INTERVAL={interval}"
+    if recurrence == 'monthly':
+        return f"FREQ=MONTHLY;INTERVAL={interval};BYMONTHDAY={start_time.day}"
+    if recurrence == 'monthly_weekday':
+        nth = (start_time.day - 1) // 7 + 1
+        if nth == 5:
+            nth = -1
+        return f"FREQ=MONTHLY;INTERVAL={interval};BYDAY={nth}{WEEKDAYS[start_time.weekday()]}"
+    return None
+
+
+def parse_rule(rule):
+    """Converte 'FREQ=WEEKLY;INTERVAL=1' em dict"""
+    parts = {}
+    for item in (rule or '').split(';'):
+        if '=' in item:
+            key, value = item.split('=', 1)
+            parts[key.strip().upper()] = value.strip().upper()
+    return parts
+
+
+def form_value(event):
+    """Opção do formulário correspondente à regra do evento"""
+    rule = parse_rule(event.recurrence_rule)
+    if rule.get('FREQ') == 'WEEKLY':
+        return 'weekly'
+    if rule.get('FREQ') == 'MONTHLY':
+        return 'monthly_weekday' if 'BYDAY' in rule else 'monthly'
+    return 'none'
+
+
+def apply_recurrence(event, recurrence, until=None):
+    """Atualiza os campos de recorrência do evento a partir do formulário"""
+    rule = build_rule(recurrence, event.start_time)
+    event.recurrence_rule = rule
+    event.recurrence = 'none' if not rule else ('weekly' if recurrence == 'weekly' else 'monthly')
+    event.recurrence_until = until if rule else None
+    if not rule:
+        event.recurrence_exceptions = None
+
+
+# ============================================
+# EXPANSÃO
+# ============================================
+
+class EventOccurrence:
+    """Uma ocorrência de evento; repassa os demais atributos para o evento base"""
+
+    def __init__(self, event, start_time, end_time):
+        self._event = event
+        self.start_time = start_time
+        self.end_time = end_time
+        self.is_occurrence = event.recurrence_rule is not None
+        self.occurrence_date = start_time.date()
+
+    def __getattr__(self, name):
+        return getattr(self._event, name)
+
+    def __repr__(self):
+        return f"<EventOccurrence {self._event.id} {self.start_time:%Y-%m-%d %H:%M}>"
+
+
+def _add_months(year, month, n):
+    month_index = year * 12 + (month - 1) + n
+    return month_index // 12, month_index % 12 + 1
+
+
+def _monthly_date(year, month, rule, start_time):
+    """Data da ocorrência no mês (ou None se o mês não tiver, ex.: 5º domingo)"""
+    if 'BYDAY' in rule:
+        byday = rule['BYDAY']
+        nth, weekday = int(byday[:-2] or 1), WEEKDAYS.index(byday[-2:])
+        days_in_month = calendar.monthrange(year, month)[1]
+        days = [d for d in range(1, days_in_month + 1) if calendar.weekday(year, month, d) == weekday]
+        if nth > len(days) or nth < -len(days):
+            return None
+        day = days[nth - 1] if nth > 0 else days[nth]
+    else:
+        day = min(int(rule.get('BYMONTHDAY', start_time.day)), calendar.monthrange(year, month)[1])
+    return start_time.replace(year=year, month=month, day=day)
+
+
+def iter_occurrence_starts(event, window_start, window_end):
+    """Datas de início das ocorrências do evento dentro de [window_start, window_end]"""
+    start = event.start_time
+    rule = parse_rule(event.recurrence_rule)
+    freq = rule.get('FREQ')
+
+    if not freq:
+        if window_start <= start <= window_end:
+            yield start
+        return
+
+    until = event.recurrence_until
+    last = min(window_end, until) if until else window_end
+    exceptions = set(event.recurrence_exceptions or [])
+    interval = max(int(rule.get('INTERVAL', 1) or 1), 1)
+
+    if freq == 'WEEKLY':
+        step = timedelta(weeks=interval)
+        # Pular direto para a primeira ocorrência da janela
+        skip = max(0, int((window_start - start) / step)) if window_start > start else 0
+        current = start + step * skip
+        while current <= last:
+            if current >= window_start and current.date().isoformat() not in exceptions:
+                yield current
+            current += step
+
+    elif freq == 'MONTHLY':
+        months_ahead = (window_start.year - start.year) * 12 + window_start.month - start.month
+        n = max(0, months_ahead - 1)
+        n -= n % interval
+        while True:
+            year, month = _add_months(start.year, start.month, n)
+            if datetime(year, month, 1) > last:
+                break
+            current = _monthly_date(year, month, rule, start)
+            if current and start <= current <= last and current >= window_start \
+                    and current.date().isoformat() not in exceptions:
+                yield current
+            n += interval
+
+
+def expand_event(event, window_start, window_end):
+    """Ocorrências (EventOccurrence) do evento dentro da janela"""
+    duration = event.end_time - event.start_time if event.end_time else None
+    return [
+        EventOccurrence(event, occ_start, occ_start + duration if duration is not None else None)
+        for occ_start in iter_occurrence_starts(event, window_start, window_end)
+    ]
+
+
+# ============================================
+# CONSULTA COM CACHE
+# ============================================
+
+def _scope_filter(church_id, ministry_ids, include_general):
+    filters = []
+    if church_id is not None:
+        filters.append(Event.church_id == church_id)
+    if ministry_ids is not None:
+        ministry_cond = Event.ministry_id.in_(ministry_ids) if ministry_ids else db.false()
+        if include_general:
+            ministry_cond = or_(Event.ministry_id.is_(None), ministry_cond)
+        filters.append(ministry_cond)
+    return filters
+
+
+def _compute_occurrences(window_start, window_end, church_id, ministry_ids, include_general):
+    """Eventos únicos da janela + expansão das séries recorrentes ativas"""
+    scope = _scope_filter(church_id, ministry_ids, include_general)
+
+    single = Event.query.filter(
+        *scope,
+        Event.recurrence_rule.is_(None),
+        Event.start_time >= window_start,
+        Event.start_time <= window_end
+    ).all()
+
+    series = Event.query.filter(
+        *scope,
+        Event.recurrence_rule.isnot(None),
+        Event.start_time <= window_end,
+        or_(Event.recurrence_until.is_(None), Event.recurrence_until >= window_start)
+    ).all()
+
+    items = [(e.id, e.start_time, e.end_time) for e in single]
+    for e in series:
+        items.extend((o.id, o.start_time, o.end_time) for o in expand_event(e, window_start, window_end))
+    items.sort(key=lambda item: item[1])
+    return items
+
+
+def get_occurrences(start, end=None, church_id=None, ministry_ids=None, include_general=True, limit=None):
+    """
+    Ocorrências de eventos entre start e end, ordenadas por data.
+
+    - ministry_ids=None: todos os eventos (gerais e de ministérios)
+    - ministry_ids=[...]: só esses ministérios (+ gerais se include_general)
+    - ministry_ids=[] com include_general: só eventos gerais
+    """
+    end = end or start + DEFAULT_HORIZON
+
+    # Janela arredondada para a hora: requisições próximas reaproveitam o cache
+    cache_start = start.replace(minute=0, second=0, microsecond=0)
+    cache_end = end.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    scope_key = tuple(sorted(ministry_ids)) if ministry_ids is not None else None
+    key = (church_id, scope_key, include_general, cache_start, cache_end)
+
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and now - cached[0] < CACHE_TTL:
+            _cache.move_to_end(key)
+            items = cached[1]
+        else:
+            items = None
+
+    if items is None:
+        items = _compute_occurrences(cache_start, cache_end, church_id, ministry_ids, include_general)
+        with _cache_lock:
+            _cache[key] = (now, items)
+            _cache.move_to_end(key)
+            while len(_cache) > CACHE_MAX_ENTRIES:
+                _cache.popitem(last=False)
+
+    items = [item for item in items if start <= item[1] <= end]
+    if limit:
+        items = items[:limit]
+    if not items:
+        return []
+
+    events = {e.id: e for e in Event.query.filter(Event.id.in_({item[0] for item in items})).all()}
+    return [EventOccurrence(events[event_id], occ_start, occ_end)
+            for event_id, occ_start, occ_end in items if event_id in events]
+
+
+def invalidate_church(church_id):
+    """Remove do cache as janelas da igreja (e as consultas sem igreja)"""
+    with _cache_lock:
+        for key in [k for k in _cache if k[0] in (church_id, None)]:
+            del _cache[key]
+
+
+@sa_event.listens_for(Event, 'after_insert')
+@sa_event.listens_for(Event, 'after_update')
+@sa_event.listens_for(Event, 'after_delete')
+def _event_changed(mapper, connection, target):
+    invalidate_church(target.church_id)
@@ -0,0 +1,258 @@
+# app/utils/request_metrics.py
+"""
+Medição de cada requisição: tempo total, consultas SQL (quantidade, tempo e as
+mais lentas), tempo de renderização dos templates e tamanho da resposta.
+
+- Consultas: eventos before/after_cursor_execute do SQLAlchemy; só contam as
+  executadas na thread da requisição (fila de e-mails e jobs de IA ficam de fora)
+- Renderização: sinais before_render_template/template_rendered do Flask
+- As últimas PERF_BUFFER_SIZE requisições ficam num buffer circular por
+  processo; /admin/performance mostra os agregados por rota
+- Acima dos limites (PERF_SLOW_REQUEST_MS, PERF_QUERY_LIMIT,
+  PERF_SLOW_QUERY_MS) a requisição é registrada no log da aplicação
+- Custo por consulta: duas leituras de relógio; arquivos estáticos não são
+  medidos. PERF_ENABLED=false desliga
+"""
+import heapq
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import request, current_app, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUFFER_SIZE = 1000
+SLOWEST_PER_REQUEST = 3
+SQL_MAX_LENGTH = 300
+SKIP_ENDPOINTS = {'static'}
+
+_QUERY_START = 'request_metrics_start'
+_SPACES = re.compile(r'\s+')
+
+_local = threading.local()  # requisição em andamento nesta thread
+_buffer = deque(maxlen=DEFAULT_BUFFER_SIZE)
+_lock = threading.Lock()
+_started_at = datetime.now()
+_record_listeners = []  # chamados com cada registro (app/utils/metrics.py)
+_listeners_registered = False
+
+
+class _RequestStats:
+    __slots__ = ('start', 'queries', 'db_time', 'slowest', 'render_time', 'render_starts')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest = []  # heap (segundos, sql) com as mais lentas
+        self.render_time = 0.0
+        self.render_starts = []
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+def _clean_sql(statement):
+    statement = _SPACES.sub(' ', statement).strip()
+    return statement if len(statement) <= SQL_MAX_LENGTH else statement[:SQL_MAX_LENGTH] + '…'
+
+
+# ============================================
+# EVENTOS (SQL e templates)
+# ============================================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_local, 'stats', None) is not None:
+        conn.info.setdefault(_QUERY_START, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = getattr(_local, 'stats', None)
+    starts = conn.info.get(_QUERY_START)
+    if stats is None or not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats.queries += 1
+    stats.db_time += elapsed
+    if len(stats.slowest) < SLOWEST_PER_REQUEST:
+        heapq.heappush(stats.slowest, (elapsed, statement))
+    elif elapsed > stats.slowest[0][0]:
+        heapq.heapreplace(stats.slowest, (elapsed, statement))
+
+
+def _before_render(sender, template, context, **extra):
+    stats = getattr(_local, 'stats', None)
+    if stats is not None:
+        stats.render_starts.append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    stats = getattr(_local, 'stats', None)
+    if stats is not None and stats.render_starts:
+        stats.render_time += time.perf_counter() - stats.render_starts.pop()
+
+
+# ============================================
+# REQUISIÇÃO
+# ============================================
+
+def _start_request():
+    _local.stats = None if request.endpoint in SKIP_ENDPOINTS else _RequestStats()
+
+
+def _finish_request(response, config):
+    stats = getattr(_local, 'stats', None)
+    if stats is None:
+        return response
+    _local.stats = None
+
+    duration = time.perf_counter() - stats.start
+    slowest = sorted(stats.slowest, reverse=True)
+    record = {
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'blueprint': request.blueprint,
+        'status': response.status_code,
+        'duration_ms': _ms(duration),
+        'queries': stats.queries,
+        'db_ms': _ms(stats.db_time),
+        'render_ms': _ms(stats.render_time),
+        'size': response.content_length,
+        'slowest': [{'ms': _ms(seconds), 'sql': _clean_sql(sql)} for seconds, sql in slowest],
+    }
+    record['flags'] = _exceeded(record, config)
+    with _lock:
+        _buffer.append(record)
+    for listener in _record_listeners:
+        try:
+            listener(record)
+        except Exception as e:
+            current_app.logger.warning(f"Falha ao repassar métricas da requisição: {e}")
+    if record['flags']:
+        _log_slow(record)
+    return response
+
+
+def _exceeded(record, config):
+    flags = []
+    if record['duration_ms'] >= config.get('PERF_SLOW_REQUEST_MS', 1000):
+        flags.append('lenta')
+    if record['queries'] >= config.get('PERF_QUERY_LIMIT', 50):
+        flags.append('muitas consultas')
+    if record['slowest'] and record['slowest'][0]['ms'] >= config.get('PERF_SLOW_QUERY_MS', 250):
+        flags.append('consulta lenta')
+    return flags
+
+
+def _log_slow(record):
+    size = f"{record['size'] / 1024:.1f} KB" if record['size'] is not None else '-'
+    message = (f"Requisição {', '.join(record['flags'])}: {record['method']} {record['path']} "
+               f"({record['endpoint']}) {record['status']} em {record['duration_ms']} ms | "
+               f"{record['queries']} consultas ({record['db_ms']} ms) | render {record['render_ms']} ms | {size}")
+    if record['slowest']:
+        message += f" | mais lenta {record['slowest'][0]['ms']} ms: {record['slowest'][0]['sql']}"
+    current_app.logger.warning(message)
+
+
+def _teardown(exc):
+    _local.stats = None
+
+
+def add_listener(listener):
+    """listener(record) é chamado ao fim de cada requisição medida"""
+    if listener not in _record_listeners:
+        _record_listeners.append(listener)
+
+
+# ============================================
+# CONSULTA DOS DADOS
+# ============================================
+
+def records():
+    with _lock:
+        return list(_buffer)
+
+
+def clear():
+    with _lock:
+        removed = len(_buffer)
+        _buffer.clear()
+    return removed
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summary(slow_limit=50, statements_limit=20):
+    """Agregados por rota, consultas mais lentas e últimas requisições acima dos limites"""
+    items = records()
+    routes = {}
+    for record in items:
+        routes.setdefault(record['endpoint'] or '(sem rota)', []).append(record)
+
+    by_route = []
+    for endpoint, group in routes.items():
+        durations = [r['duration_ms'] for r in group]
+        queries = [r['queries'] for r in group]
+        sizes = [r['size'] for r in group if r['size'] is not None]
+        by_route.append({
+            'endpoint': endpoint,
+            'blueprint': group[-1]['blueprint'],
+            'count': len(group),
+            'errors': sum(1 for r in group if r['status'] >= 500),
+            'avg_ms': round(sum(durations) / len(group), 1),
+            'p95_ms': _percentile(durations, 0.95),
+            'max_ms': max(durations),
+            'total_ms': round(sum(durations), 1),
+            'avg_queries': round(sum(queries) / len(group), 1),
+            'max_queries': max(queries),
+            'avg_db_ms': round(sum(r['db_ms'] for r in group) / len(group), 1),
+            'avg_render_ms': round(sum(r['render_ms'] for r in group) / len(group), 1),
+            'avg_size': int(sum(sizes) / len(sizes)) if sizes else None,
+        })
+    by_route.sort(key=lambda route: route['total_ms'], reverse=True)
+
+    statements = [dict(query, endpoint=r['endpoint'], path=r['path'], time=r['time'])
+                  for r in items for query in r['slowest']]
+    statements.sort(key=lambda query: query['ms'], reverse=True)
+
+    return {
+        'since': _started_at.isoformat(timespec='seconds'),
+        'buffer_size': _buffer.maxlen,
+        'requests': len(items),
+        'oldest': items[0]['time'] if items else None,
+        'routes': by_route,
+        'slowest_queries': statements[:statements_limit],
+        'flagged': [r for r in reversed(items) if r['flags']][:slow_limit],
+    }
+
+
+def init_request_metrics(app):
+    """Deve ser chamado antes dos demais hooks: mede a requisição inteira, inclusive a compressão"""
+    global _buffer, _listeners_registered
+    if not app.config.get('PERF_ENABLED', True):
+        return
+
+    size = app.config.get('PERF_BUFFER_SIZE', DEFAULT_BUFFER_SIZE)
+    if size != _buffer.maxlen:
+        _buffer = deque(_buffer, maxlen=size)
+
+    if not _listeners_registered:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        before_render_template.connect(_before_render)
+        template_rendered.connect(_after_render)
+        _listeners_registered = True
+
+    app.before_request(_start_request)
+    # after_request roda na ordem inversa do registro: registrado primeiro, roda por último
+    app.after_request(lambda response: _finish_request(response, app.config))
+    app.teardown_request(_teardown)
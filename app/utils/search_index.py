@@ -0,0 +1,491 @@
+# app/utils/search_index.py
+"""
+Busca textual (full-text) para estudos, devocionais e histórias bíblicas.
+
+- SQLite: tabela virtual FTS5 com termos já normalizados (sem acento + radical PT)
+- PostgreSQL: tabela com tsvector + índice GIN (configuração pt_unaccent)
+
+O índice é preenchido pela migração e mantido pelos eventos da sessão
+(insert/update/delete).
+"""
+import re
+import time
+import unicodedata
+from markupsafe import escape
+from sqlalchemy import event, inspect as sa_inspect, select, text
+from app.core.models import db, Study, Devotional, BibleStory
+
+SQLITE_TABLE = 'search_index'
+PG_TABLE = 'search_documents'
+
+# Tipo de documento -> (modelo, código usado no rowid do FTS5)
+DOC_TYPES = {
+    'study': (Study, 1),
+    'devotional': (Devotional, 2),
+    'story': (BibleStory, 3),
+}
+CODE_TO_TYPE = {code: doc_type for doc_type, (_, code) in DOC_TYPES.items()}
+MODEL_TO_TYPE = {model: doc_type for doc_type, (model, _) in DOC_TYPES.items()}
+
+# Campos que, quando alterados, exigem reindexação
+INDEXED_FIELDS = {
+    'study': ('title', 'content', 'category'),
+    'devotional': ('title', 'content', 'verse'),
+    'story': ('title', 'content', 'reference'),
+}
+
+STOPWORDS = {
+    'a', 'o', 'e', 'as', 'os', 'de', 'da', 'do', 'das', 'dos', 'em', 'no', 'na',
+    'nos', 'nas', 'um', 'uma', 'uns', 'umas', 'ao', 'aos', 'para', 'pra', 'por',
+    'pelo', 'pela', 'com', 'sem', 'que', 'se', 'ou', 'mas', 'como', 'mais', 'foi',
+    'ser', 'sua', 'seu', 'suas', 'seus', 'ele', 'ela', 'eles', 'elas', 'isso', 'este',
+    'esta', 'esse', 'essa', 'nao', 'the', 'of', 'and',
+}
+
+MARK_OPEN = '[[mark]]'
+MARK_CLOSE = '[[/mark]]'
+
+# Estado do índice por engine (evita checar a existência da tabela a cada flush):
+# url -> (existe, verificado_em). "Não existe" expira: o índice pode ser criado
+# por `flask db upgrade`/reindexar_busca.py com os workers já rodando
+INDEX_RECHECK_SECONDS = 30
+_index_ready = {}
+_listeners_registered = False
+
+
+# ============================================
+# NORMALIZAÇÃO E RADICAL (PORTUGUÊS)
+# ============================================
+
+def fold(texto):
+    """Minúsculas e sem acentos"""
+    if not texto:
+        return ''
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def stem_pt(palavra):
+    """Redutor leve de radicais para o português (plural, grau, advérbios, vogal final)"""
+    if len(palavra) < 4 or palavra.isdigit():
+        return palavra
+
+    # Plural
+    if palavra.endswith('ns'):
+        palavra = palavra[:-2] + 'm'
+    elif palavra.endswith(('oes', 'aes')):
+        palavra = palavra[:-3] + 'ao'
+    elif palavra.endswith('ais') and len(palavra) > 4:
+        palavra = palavra[:-3] + 'al'
+    elif palavra.endswith('eis') and len(palavra) > 4:
+        palavra = palavra[:-3] + 'el'
+    elif palavra.endswith('ois'):
+        palavra = palavra[:-3] + 'ol'
+    elif palavra.endswith(('res', 'zes', 'les')) and len(palavra) > 4:
+        palavra = palavra[:-2]
+    elif palavra.endswith('s') and not palavra.endswith(('ss', 'us', 'is')):
+        palavra = palavra[:-1]
+
+    # Advérbios, superlativos e diminutivos
+    for sufixo in ('mente', 'issimo', 'issima', 'zinho', 'zinha', 'inho', 'inha'):
+        if palavra.endswith(sufixo) and len(palavra) - len(sufixo) >= 3:
+            palavra = palavra[:-len(sufixo)]
+            break
+
+    # Gênero / vogal temática
+    if len(palavra) > 3 and palavra[-1] in 'aeo':
+        palavra = palavra[:-1]
+
+    return palavra
+
+
+def analyze(texto):
+    """Lista de radicais normalizados de um texto"""
+    termos = []
+    for palavra in re.findall(r'\w+', fold(texto)):
+        if palavra in STOPWORDS or len(palavra) < 2:
+            continue
+        termos.append(stem_pt(palavra))
+    return termos
+
+
+# ============================================
+# DOCUMENTOS
+# ============================================
+
+def _document_fields(doc_type, obj):
+    """Retorna (título, corpo) indexáveis de um objeto"""
+    if doc_type == 'study':
+        return obj.title or '', f"{obj.category or ''}\n{obj.content or ''}"
+    if doc_type == 'devotional':
+        return obj.title or '', f"{obj.verse or ''}\n{obj.content or ''}"
+    return obj.title or '', f"{obj.reference or ''}\n{obj.content or ''}"
+
+
+def _backend(bind=None):
+    bind = bind or db.engine
+    name = bind.dialect.name
+    if name == 'postgresql':
+        return 'postgresql'
+    if name == 'sqlite':
+        return 'sqlite'
+    return None
+
+
+def _rowid(doc_type, doc_id):
+    return int(doc_id) * 10 + DOC_TYPES[doc_type][1]
+
+
+def is_index_ready(bind=None):
+    """Verifica se a tabela do índice existe (uma vez por engine; se não existir, de novo após INDEX_RECHECK_SECONDS)"""
+    bind = bind or db.engine
+    engine = getattr(bind, 'engine', bind)
+    key = str(engine.url)
+    ready, checked_at = _index_ready.get(key, (False, None))
+    if not ready and (checked_at is None or time.monotonic() - checked_at >= INDEX_RECHECK_SECONDS):
+        backend = _backend(engine)
+        table = PG_TABLE if backend == 'postgresql' else SQLITE_TABLE
+        try:
+            ready = backend is not None and sa_inspect(engine).has_table(table)
+        except Exception:
+            ready = False
+        _index_ready[key] = (ready, time.monotonic())
+    return ready
+
+
+def create_search_schema(connection):
+    """Cria as estruturas do índice conforme o banco configurado"""
+    backend = _backend(connection)
+    if backend == 'sqlite':
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} "
+            f"USING fts5(title, body, tokenize = 'unicode61')"
+        ))
+    elif backend == 'postgresql':
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
+        connection.execute(text("""
+            DO $$ BEGIN
+                IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'pt_unaccent') THEN
+                    CREATE TEXT SEARCH CONFIGURATION pt_unaccent (COPY = portuguese);
+                    ALTER TEXT SEARCH CONFIGURATION pt_unaccent
+                        ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+                END IF;
+            END $$;
+        """))
+        connection.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {PG_TABLE} (
+                doc_type VARCHAR(20) NOT NULL,
+                doc_id INTEGER NOT NULL,
+                title TEXT,
+                body TEXT,
+                tsv TSVECTOR,
+                PRIMARY KEY (doc_type, doc_id)
+            )
+        """))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{PG_TABLE}_tsv ON {PG_TABLE} USING GIN (tsv)"
+        ))
+    _index_ready.pop(str(connection.engine.url), None)
+
+
+def index_document(connection, doc_type, obj):
+    """Insere ou atualiza um documento no índice"""
+    title, body = _document_fields(doc_type, obj)
+    backend = _backend(connection)
+    if backend == 'sqlite':
+        rowid = _rowid(doc_type, obj.id)
+        connection.execute(text(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = :rowid"), {'rowid': rowid})
+        connection.execute(
+            text(f"INSERT INTO {SQLITE_TABLE} (rowid, title, body) VALUES (:rowid, :title, :body)"),
+            {'rowid': rowid, 'title': ' '.join(analyze(title)), 'body': ' '.join(analyze(body))}
+        )
+    elif backend == 'postgresql':
+        connection.execute(text(f"""
+            INSERT INTO {PG_TABLE} (doc_type, doc_id, title, body, tsv)
+            VALUES (:doc_type, :doc_id, :title, :body,
+                    setweight(to_tsvector('pt_unaccent', :title), 'A') ||
+                    setweight(to_tsvector('pt_unaccent', :body), 'B'))
+            ON CONFLICT (doc_type, doc_id) DO UPDATE
+            SET title = EXCLUDED.title, body = EXCLUDED.body, tsv = EXCLUDED.tsv
+        """), {'doc_type': doc_type, 'doc_id': obj.id, 'title': title, 'body': body})
+
+
+def remove_document(connection, doc_type, doc_id):
+    """Remove um documento do índice"""
+    backend = _backend(connection)
+    if backend == 'sqlite':
+        connection.execute(text(f"DELETE FROM {SQLITE_TABLE} WHERE rowid = :rowid"),
+                           {'rowid': _rowid(doc_type, doc_id)})
+    elif backend == 'postgresql':
+        connection.execute(text(f"DELETE FROM {PG_TABLE} WHERE doc_type = :doc_type AND doc_id = :doc_id"),
+                           {'doc_type': doc_type, 'doc_id': doc_id})
+
+
+def fill_search_index(connection, batch_size=200):
+    """Indexa todo o conteúdo numa conexão (app ou migração). Retorna quantidade indexada por tipo."""
+    totals = {}
+    for doc_type, (model, _) in DOC_TYPES.items():
+        columns = [model.id] + [getattr(model, field) for field in INDEXED_FIELDS[doc_type]]
+        totals[doc_type] = 0
+        last_id = 0
+        while True:
+            lote = connection.execute(
+                select(*columns).where(model.id > last_id).order_by(model.id.asc()).limit(batch_size)
+            ).all()
+            if not lote:
+                break
+            for row in lote:
+                index_document(connection, doc_type, row)
+                totals[doc_type] += 1
+            last_id = lote[-1].id
+    return totals
+
+
+def rebuild_search_index(batch_size=200):
+    """Recria o índice inteiro a partir das tabelas. Retorna quantidade indexada por tipo."""
+    connection = db.session.connection()
+    create_search_schema(connection)
+    if _backend(connection) == 'sqlite':
+        connection.execute(text(f"DELETE FROM {SQLITE_TABLE}"))
+    elif _backend(connection) == 'postgresql':
+        connection.execute(text(f"DELETE FROM {PG_TABLE}"))
+
+    totals = fill_search_index(connection, batch_size)
+    db.session.commit()
+    return totals
+
+
+# ============================================
+# SINCRONIZAÇÃO AUTOMÁTICA
+# ============================================
+
+def _needs_reindex(doc_type, obj):
+    state = sa_inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in INDEXED_FIELDS[doc_type])
+
+
+def _sync_after_flush(session, flush_context):
+    pending = []
+    for obj in session.new:
+        doc_type = MODEL_TO_TYPE.get(type(obj))
+        if doc_type:
+            pending.append(('index', doc_type, obj))
+    for obj in session.dirty:
+        doc_type = MODEL_TO_TYPE.get(type(obj))
+        if doc_type and _needs_reindex(doc_type, obj):
+            pending.append(('index', doc_type, obj))
+    for obj in session.deleted:
+        doc_type = MODEL_TO_TYPE.get(type(obj))
+        if doc_type:
+            pending.append(('remove', doc_type, obj))
+
+    if not pending:
+        return
+
+    connection = session.connection()
+    if not is_index_ready(connection):
+        return
+
+    try:
+        with connection.begin_nested():
+            for action, doc_type, obj in pending:
+                if action == 'index':
+                    index_document(connection, doc_type, obj)
+                else:
+                    remove_document(connection, doc_type, obj.id)
+    except Exception as e:
+        # Falha no índice não deve impedir o salvamento do conteúdo
+        print(f"Erro ao atualizar índice de busca: {e}")
+
+
+def init_search_index(app):
+    """Registra a sincronização do índice de busca com a sessão"""
+    global _listeners_registered
+    if not _listeners_registered:
+        event.listen(db.session, 'after_flush', _sync_after_flush)
+        _listeners_registered = True
+
+
+# ============================================
+# CONSULTA
+# ============================================
+
+def _sqlite_match_expr(query):
+    termos = [t for t in analyze(query) if re.fullmatch(r'\w+', t)]
+    if not termos:
+        return None, []
+    return ' '.join(f'"{t}"*' for t in termos), termos
+
+
+def _pg_tsquery(query):
+    palavras = [p for p in re.findall(r'\w+', fold(query)) if p not in STOPWORDS]
+    if not palavras:
+        return None
+    return ' & '.join(f"{p}:*" for p in palavras)
+
+
+def _safe_snippet(raw):
+    """Escapa o trecho mantendo apenas os marcadores de destaque"""
+    html = str(escape(raw))
+    return html.replace(MARK_OPEN, '<mark>').replace(MARK_CLOSE, '</mark>')
+
+
+def _matches_terms(palavra, termos):
+    """Palavra do texto original corresponde (por radical/prefixo) a algum termo da busca"""
+    radical = stem_pt(fold(palavra))
+    return any(radical.startswith(t) or fold(palavra).startswith(t) for t in termos)
+
+
+def build_snippet(body, termos, width=220):
+    """Trecho do texto original ao redor do primeiro termo encontrado, com destaque"""
+    if not body:
+        return ''
+    if not termos:
+        return _safe_snippet(body[:width] + ('...' if len(body) > width else ''))
+
+    palavras = list(re.finditer(r'\w+', body))
+    primeira = next((m for m in palavras if _matches_terms(m.group(), termos)), None)
+    inicio = max(0, primeira.start() - width // 3) if primeira else 0
+    fim = min(len(body), inicio + width)
+    # Ajustar para limites de palavras
+    if inicio > 0:
+        espaco = body.find(' ', inicio)
+        inicio = espaco + 1 if 0 <= espaco < fim else inicio
+    if fim < len(body):
+        espaco = body.rfind(' ', inicio, fim)
+        fim = espaco if espaco > inicio else fim
+
+    partes = []
+    cursor = inicio
+    for m in palavras:
+        if m.start() < inicio or m.end() > fim:
+            continue
+        if _matches_terms(m.group(), termos):
+            partes.append(body[cursor:m.start()])
+            partes.append(MARK_OPEN + m.group() + MARK_CLOSE)
+            cursor = m.end()
+    partes.append(body[cursor:fim])
+
+    trecho = ' '.join(''.join(partes).split())
+    return _safe_snippet(('...' if inicio > 0 else '') + trecho + ('...' if fim < len(body) else ''))
+
+
+def _result_url(doc_type, doc_id):
+    from flask import url_for
+    if doc_type == 'study':
+        return url_for('edification.study_detail', id=doc_id)
+    if doc_type == 'story':
+        return url_for('edification.view_bible_story', id=doc_id)
+    return url_for('edification.devotionals') + f'#devModal{doc_id}'
+
+
+def _search_sqlite(query, types, limit, offset):
+    match, termos = _sqlite_match_expr(query)
+    if not match:
+        return []
+    codes = [DOC_TYPES[t][1] for t in types]
+    rows = db.session.execute(text(f"""
+        SELECT rowid, bm25({SQLITE_TABLE}, 10.0, 1.0) AS rank
+        FROM {SQLITE_TABLE}
+        WHERE {SQLITE_TABLE} MATCH :match AND (rowid % 10) IN ({','.join(str(c) for c in codes)})
+        ORDER BY rank
+        LIMIT :limit OFFSET :offset
+    """), {'match': match, 'limit': limit, 'offset': offset}).fetchall()
+
+    hits = [(CODE_TO_TYPE[row.rowid % 10], row.rowid // 10, -row.rank) for row in rows]
+
+    # Carregar os textos originais só da página de resultados
+    originais = {}
+    for doc_type in types:
+        ids = [doc_id for t, doc_id, _ in hits if t == doc_type]
+        if ids:
+            model = DOC_TYPES[doc_type][0]
+            for obj in model.query.filter(model.id.in_(ids)).all():
+                originais[(doc_type, obj.id)] = (obj.title or '', obj.content or '')
+
+    resultados = []
+    for doc_type, doc_id, score in hits:
+        if (doc_type, doc_id) not in originais:
+            continue
+        title, body = originais[(doc_type, doc_id)]
+        resultados.append({
+            'type': doc_type,
+            'id': doc_id,
+            'title': title,
+            'snippet': build_snippet(body, termos),
+            'score': round(score, 6),
+            'url': _result_url(doc_type, doc_id),
+        })
+    return resultados
+
+
+def _search_postgresql(query, types, limit, offset):
+    tsquery = _pg_tsquery(query)
+    if not tsquery:
+        return []
+    options = f"StartSel={MARK_OPEN}, StopSel={MARK_CLOSE}, MaxWords=35, MinWords=15, MaxFragments=2"
+    rows = db.session.execute(text(f"""
+        SELECT doc_type, doc_id, title,
+               ts_rank_cd(tsv, q) AS score,
+               ts_headline('pt_unaccent', body, q, :options) AS snippet
+        FROM {PG_TABLE}, to_tsquery('pt_unaccent', :tsquery) q
+        WHERE tsv @@ q AND doc_type = ANY(:types)
+        ORDER BY score DESC
+        LIMIT :limit OFFSET :offset
+    """), {'tsquery': tsquery, 'options': options, 'types': list(types),
+           'limit': limit, 'offset': offset}).fetchall()
+
+    return [{
+        'type': row.doc_type,
+        'id': row.doc_id,
+        'title': row.title,
+        'snippet': _safe_snippet(row.snippet or ''),
+        'score': round(float(row.score), 6),
+        'url': _result_url(row.doc_type, row.doc_id),
+    } for row in rows]
+
+
+def _search_fallback(query, types, limit, offset):
+    """Busca simples com ILIKE quando o índice ainda não foi criado"""
+    from sqlalchemy import or_
+    resultados = []
+    termos = analyze(query)
+    for doc_type in types:
+        model = DOC_TYPES[doc_type][0]
+        objs = model.query.filter(or_(
+            model.title.ilike(f'%{query}%'),
+            model.content.ilike(f'%{query}%')
+        )).limit(limit + offset).all()
+        for obj in objs:
+            resultados.append({
+                'type': doc_type,
+                'id': obj.id,
+                'title': obj.title or '',
+                'snippet': build_snippet(obj.content or '', termos),
+                'score': 0,
+                'url': _result_url(doc_type, obj.id),
+            })
+    return resultados[offset:offset + limit]
+
+
+def search(query, types=None, limit=20, offset=0):
+    """
+    Busca ordenada por relevância em estudos, devocionais e histórias.
+    Retorna lista de dicts: type, id, title, snippet (HTML seguro), score, url
+    """
+    query = (query or '').strip()
+    types = [t for t in (types or DOC_TYPES.keys()) if t in DOC_TYPES]
+    if not query or not types:
+        return []
+
+    if not is_index_ready():
+        return _search_fallback(query, types, limit, offset)
+
+    if _backend() == 'postgresql':
+        return _search_postgresql(query, types, limit, offset)
+    return _search_sqlite(query, types, limit, offset)
+
+
+def search_ids(query, doc_type, limit=500):
+    """IDs de um tipo de documento ordenados por relevância (para filtrar listagens)"""
+    return [r['id'] for r in search(query, types=[doc_type], limit=limit)]
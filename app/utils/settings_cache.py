@@ -0,0 +1,234 @@
+# app/utils/settings_cache.py
+"""
+Cache em memória das configurações do sistema (SystemSetting) e das
+configurações de cada filial (SMTP, chave Gemini, modo manutenção, layouts
+do cartão, arquivo e logo do tema).
+
+- Tudo é carregado de uma vez (duas consultas) e servido da memória
+- Qualquer alteração em SystemSetting, Church ou ChurchTheme gravada pela sessão troca o
+  carimbo de versão (linha 'config_version' em system_settings) na mesma
+  transação e limpa o cache deste processo após o commit
+- Os demais workers (Gunicorn) conferem o carimbo no máximo a cada
+  SETTINGS_CHECK_INTERVAL segundos e recarregam quando ele mudou
+"""
+import threading
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, select, update, insert
+
+from app.core.models import db, Church, ChurchTheme, SystemSetting
+from app.utils.metrics import count_cache
+
+VERSION_KEY = 'config_version'
+DEFAULT_CHECK_INTERVAL = 5  # segundos
+
+CHURCH_FIELDS = (
+    'id', 'name', 'email', 'currency_symbol', 'logo_path',
+    'smtp_server', 'smtp_port', 'smtp_user', 'smtp_password', 'smtp_use_tls',
+    'email_from', 'email_from_name', 'gemini_api_key', 'maintenance_mode',
+    'card_front_layout', 'card_back_layout',
+)
+THEME_FIELDS = {'theme_custom': 'is_custom', 'theme_css': 'css_file', 'theme_logo': 'logo_light'}
+# Mesmos nomes de atributo de Church: pode ser usado no lugar do objeto (smtp_settings, build_message...)
+ChurchSettings = namedtuple('ChurchSettings', CHURCH_FIELDS + tuple(THEME_FIELDS))
+
+TRUE_VALUES = ('true', '1', 'on', 'yes', 'sim')
+
+_lock = threading.Lock()
+_state = {'settings': None, 'churches': None, 'version': None, 'checked': 0.0}
+_stats = {'loads': 0, 'checks': 0}
+_listeners_registered = False
+
+
+# ============================================
+# CARGA
+# ============================================
+
+def _check_interval():
+    if has_app_context():
+        return current_app.config.get('SETTINGS_CHECK_INTERVAL', DEFAULT_CHECK_INTERVAL)
+    return DEFAULT_CHECK_INTERVAL
+
+
+def _read_version(conn):
+    return conn.execute(
+        select(SystemSetting.value).where(SystemSetting.key == VERSION_KEY)
+    ).scalar()
+
+
+def _load():
+    """Lê configurações e filiais numa conexão própria (só dados já gravados)"""
+    table = SystemSetting.__table__
+    columns = [getattr(Church, f) for f in CHURCH_FIELDS] + [getattr(ChurchTheme, f) for f in THEME_FIELDS.values()]
+    with db.engine.connect() as conn:
+        version = _read_version(conn)
+        settings = {key: value for key, value in conn.execute(select(table.c.key, table.c.value))
+                    if key != VERSION_KEY}
+        churches = {row.id: ChurchSettings(*row) for row in conn.execute(
+            select(*columns).outerjoin(ChurchTheme, ChurchTheme.church_id == Church.id))}
+    return settings, churches, version
+
+
+def _ensure_loaded():
+    """Dados atuais do cache, recarregando se vazio ou se o carimbo mudou"""
+    now = time.monotonic()
+    with _lock:
+        settings, churches, version = _state['settings'], _state['churches'], _state['version']
+        if settings is not None and now - _state['checked'] < _check_interval():
+            count_cache('settings', 'hit')
+            return settings, churches
+
+    if settings is not None:
+        # Carimbo não mudou: continua valendo por mais um intervalo
+        try:
+            with db.engine.connect() as conn:
+                current = _read_version(conn)
+        except Exception as e:
+            print(f"Erro ao verificar versão das configurações: {e}")
+            return settings, churches
+        with _lock:
+            _stats['checks'] += 1
+            if current == version and _state['settings'] is settings:
+                _state['checked'] = now
+                count_cache('settings', 'check')
+                return settings, churches
+
+    try:
+        settings, churches, version = _load()
+    except Exception as e:
+        # Banco ainda sem as tabelas (instalação nova): não guarda nada
+        print(f"Erro ao carregar configurações: {e}")
+        return {}, {}
+
+    with _lock:
+        _state.update(settings=settings, churches=churches, version=version, checked=now)
+        _stats['loads'] += 1
+    count_cache('settings', 'miss')
+    return settings, churches
+
+
+def invalidate():
+    """Descarta o cache deste processo (a próxima leitura recarrega)"""
+    with _lock:
+        _state.update(settings=None, churches=None, version=None, checked=0.0)
+
+
+def stats():
+    with _lock:
+        return {
+            'loaded': _state['settings'] is not None,
+            'version': _state['version'],
+            'settings': len(_state['settings'] or {}),
+            'churches': len(_state['churches'] or {}),
+            **_stats,
+        }
+
+
+# ============================================
+# LEITURA
+# ============================================
+
+def get_setting(key, default=None):
+    """Valor (texto) de uma configuração do sistema"""
+    value = _ensure_loaded()[0].get(key)
+    return default if value is None else value
+
+
+def get_bool(key, default=False):
+    value = get_setting(key)
+    if value is None or value == '':
+        return default
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def get_int(key, default=0):
+    try:
+        return int(get_setting(key))
+    except (TypeError, ValueError):
+        return default
+
+
+def all_settings():
+    """Cópia de todas as configurações do sistema"""
+    return dict(_ensure_loaded()[0])
+
+
+def church_settings(church_id):
+    """Configurações da filial (ChurchSettings) ou None"""
+    if not church_id:
+        return None
+    churches = _ensure_loaded()[1]
+    church = churches.get(church_id)
+    if church is None:
+        # Filial criada depois da última carga: confere o carimbo antes de desistir
+        with _lock:
+            _state['checked'] = 0.0
+        church = _ensure_loaded()[1].get(church_id)
+    return church
+
+
+# ============================================
+# INVALIDAÇÃO
+# ============================================
+
+CONFIG_MODELS = (Church, ChurchTheme, SystemSetting)
+
+
+def _touches_config(session):
+    for obj in session.new:
+        if isinstance(obj, CONFIG_MODELS):
+            return True
+    for obj in session.deleted:
+        if isinstance(obj, CONFIG_MODELS):
+            return True
+    for obj in session.dirty:
+        if isinstance(obj, CONFIG_MODELS) and session.is_modified(obj, include_collections=False):
+            return True
+    return False
+
+
+def bump_version(connection):
+    """Troca o carimbo de versão (na transação da conexão informada)"""
+    table = SystemSetting.__table__
+    stamp = uuid.uuid4().hex
+    now = datetime.utcnow()
+    result = connection.execute(
+        update(table).where(table.c.key == VERSION_KEY).values(value=stamp, updated_at=now))
+    if not result.rowcount:
+        connection.execute(insert(table).values(
+            key=VERSION_KEY, value=stamp, description='Versão das configurações (cache dos workers)',
+            is_encrypted=False, created_at=now, updated_at=now))
+
+
+def _after_flush(session, flush_context):
+    if session.info.get('config_changed') or not _touches_config(session):
+        return
+    try:
+        bump_version(session.connection())
+        session.info['config_changed'] = True
+    except Exception as e:
+        print(f"Erro ao atualizar versão das configurações: {e}")
+
+
+def _after_commit(session):
+    if session.info.pop('config_changed', False):
+        invalidate()
+
+
+def _after_rollback(session, previous_transaction):
+    session.info.pop('config_changed', None)
+
+
+def init_settings_cache(app):
+    """Registra a invalidação do cache com a sessão"""
+    global _listeners_registered
+    app.config.setdefault('SETTINGS_CHECK_INTERVAL', DEFAULT_CHECK_INTERVAL)
+    if not _listeners_registered:
+        event.listen(db.session, 'after_flush', _after_flush)
+        event.listen(db.session, 'after_commit', _after_commit)
+        event.listen(db.session, 'after_soft_rollback', _after_rollback)
+        _listeners_registered = True
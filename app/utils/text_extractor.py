@@ -1,59 +1,127 @@
+"""
+Extração de texto de documentos (PDF, DOCX, PPTX, TXT/MD).
+
+As páginas/parágrafos são lidos por geradores e o texto é juntado uma única
+vez no final. PDFs usam PyMuPDF quando disponível (bem mais rápido) e PyPDF2
+como alternativa; first_page/last_page (1 = primeira, inclusive) limitam as
+páginas lidas. extract_texts processa vários documentos em paralelo (processos).
+"""
 import os
-import PyPDF2
-from docx import Document
-from pptx import Presentation
-import requests
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
 
-def extract_text_from_pdf(file_content):
-    pdf_file = BytesIO(file_content)
-    reader = PyPDF2.PdfReader(pdf_file)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() + "\n"
-    return text
+from app.utils.lazy_imports import fitz, requests
+from app.utils.metrics import track_upload
 
-def extract_text_from_docx(file_content):
-    docx_file = BytesIO(file_content)
-    doc = Document(docx_file)
-    text = ""
+DOWNLOAD_TIMEOUT = 30
+
+
+def _page_range(total, first_page=None, last_page=None):
+    start = max((first_page or 1) - 1, 0)
+    end = min(last_page or total, total)
+    return range(start, end)
+
+
+def iter_pdf_pages(source, first_page=None, last_page=None):
+    """Texto de cada página do PDF (source: caminho ou bytes)"""
+    if fitz is not None:
+        doc = fitz.open(source) if isinstance(source, str) else fitz.open(stream=source, filetype='pdf')
+        try:
+            for index in _page_range(doc.page_count, first_page, last_page):
+                yield doc.load_page(index).get_text()
+        finally:
+            doc.close()
+        return
+
+    import PyPDF2
+    reader = PyPDF2.PdfReader(source if isinstance(source, str) else BytesIO(source))
+    for index in _page_range(len(reader.pages), first_page, last_page):
+        yield reader.pages[index].extract_text() or ''
+
+
+def iter_docx_paragraphs(source):
+    from docx import Document
+    doc = Document(source if isinstance(source, str) else BytesIO(source))
     for para in doc.paragraphs:
-        text += para.text + "\n"
-    return text
-
-def extract_text_from_pptx(file_content):
-    pptx_file = BytesIO(file_content)
-    prs = Presentation(pptx_file)
-    text = ""
-    for slide in prs.slides:
-        for shape in slide.shapes:
+        yield para.text
+
+
+def iter_pptx_texts(source, first_page=None, last_page=None):
+    """Textos das formas de cada slide (first_page/last_page = slides)"""
+    from pptx import Presentation
+    prs = Presentation(source if isinstance(source, str) else BytesIO(source))
+    slides = list(prs.slides)
+    for index in _page_range(len(slides), first_page, last_page):
+        for shape in slides[index].shapes:
             if hasattr(shape, "text"):
-                text += shape.text + "\n"
-    return text
+                yield shape.text
+
+
+def _join(parts):
+    """Uma linha por parte, com quebra final (mesmo formato de antes)"""
+    text = "\n".join(parts)
+    return text + "\n" if text else ""
+
 
-def extract_text(file_path_or_url):
+def extract_text_from_pdf(file_content, first_page=None, last_page=None):
+    return _join(iter_pdf_pages(file_content, first_page, last_page))
+
+
+def extract_text_from_docx(file_content):
+    return _join(iter_docx_paragraphs(file_content))
+
+
+def extract_text_from_pptx(file_content, first_page=None, last_page=None):
+    return _join(iter_pptx_texts(file_content, first_page, last_page))
+
+
+@track_upload('text_extract')
+def extract_text(file_path_or_url, first_page=None, last_page=None):
     try:
         if file_path_or_url.startswith(('http://', 'https://')):
-            response = requests.get(file_path_or_url)
-            content = response.content
-            filename = file_path_or_url.split('/')[-1]
+            response = requests.get(file_path_or_url, timeout=DOWNLOAD_TIMEOUT)
+            source = response.content
+            filename = file_path_or_url.split('?')[0].split('/')[-1]
         else:
-            with open(file_path_or_url, 'rb') as f:
-                content = f.read()
+            # Arquivo local: as bibliotecas leem direto do disco
+            source = file_path_or_url
             filename = os.path.basename(file_path_or_url)
 
         ext = filename.split('.')[-1].lower()
-        
+
         if ext == 'pdf':
-            return extract_text_from_pdf(content)
+            return extract_text_from_pdf(source, first_page, last_page)
         elif ext == 'docx':
-            return extract_text_from_docx(content)
+            return extract_text_from_docx(source)
         elif ext == 'pptx':
-            return extract_text_from_pptx(content)
+            return extract_text_from_pptx(source, first_page, last_page)
         elif ext in ['txt', 'md']:
-            return content.decode('utf-8')
+            if isinstance(source, str):
+                with open(source, 'rb') as f:
+                    source = f.read()
+            return source.decode('utf-8', errors='replace')
         else:
             return ""
     except Exception as e:
         print(f"Erro na extração: {e}")
         return ""
+
+
+def _extract_job(args):
+    path, first_page, last_page = args
+    return extract_text(path, first_page, last_page)
+
+
+def extract_texts(paths, workers=None, first_page=None, last_page=None):
+    """
+    Extrai vários documentos em paralelo (um processo por núcleo, por padrão).
+    Retorna {caminho: texto}.
+    """
+    paths = list(paths)
+    if len(paths) <= 1 or workers == 1:
+        return {path: extract_text(path, first_page, last_page) for path in paths}
+
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        texts = pool.map(_extract_job, [(path, first_page, last_page) for path in paths])
+        return dict(zip(paths, texts))
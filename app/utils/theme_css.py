@@ -0,0 +1,177 @@
+# app/utils/theme_css.py
+"""
+Tema da igreja compilado em arquivo CSS.
+
+- Ao salvar o tema (edit_church_theme) o CSS é gerado uma vez a partir de
+  templates/themes/theme.css e gravado como church-<id>-<hash>.css
+- Igrejas sem tema personalizado usam um único arquivo default-<hash>.css
+- O nome muda junto com o conteúdo, então o arquivo é servido com cache
+  imutável; base.html só emite o <link> (o nome vem do cache de configurações,
+  sem carregar church/theme a cada página)
+- Arquivo ausente (outro servidor, pasta limpa) é recompilado na primeira
+  requisição
+"""
+import hashlib
+import os
+import re
+import threading
+
+from flask import current_app, abort, redirect, send_from_directory, url_for
+from flask_login import current_user
+from sqlalchemy import update
+
+from app.core.models import db, ChurchTheme
+from app.utils.settings_cache import church_settings, bump_version, invalidate as invalidate_settings
+
+THEME_TEMPLATE = 'themes/theme.css'
+CACHE_MAX_AGE = 365 * 24 * 3600  # um ano (o nome do arquivo muda com o conteúdo)
+FILE_PATTERN = re.compile(r'(default|church-(\d+))-[0-9a-f]{12}\.css')
+
+_default_file = {}  # pasta -> nome do arquivo padrão (compilado uma vez por processo)
+_checked = {}       # church_id -> arquivo já conferido com o template atual neste processo
+_lock = threading.Lock()
+
+
+def theme_dir():
+    path = current_app.config.get('THEME_CSS_DIR') or os.path.join(current_app.instance_path, 'theme_css')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def compile_theme_css(theme=None):
+    """CSS do tema (None ou tema não personalizado = padrão)"""
+    template = current_app.jinja_env.get_template(THEME_TEMPLATE)
+    if theme is None or not theme.is_custom:
+        return template.render(t=None)
+    # Só as colunas gravadas: o mesmo tema gera sempre o mesmo arquivo
+    values = {column.key: getattr(theme, column.key) for column in ChurchTheme.__table__.columns}
+    return template.render(t=values)
+
+
+def _write(prefix, css):
+    """Grava o arquivo (se ainda não existir) e retorna o nome"""
+    digest = hashlib.sha256(css.encode('utf-8')).hexdigest()[:12]
+    filename = f'{prefix}-{digest}.css'
+    path = os.path.join(theme_dir(), filename)
+    if not os.path.exists(path):
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(css)
+        os.replace(tmp, path)
+    return filename
+
+
+def _remove_old_files(church_id, keep=None):
+    prefix = f'church-{church_id}-'
+    folder = theme_dir()
+    for name in os.listdir(folder):
+        if name.startswith(prefix) and name != keep:
+            try:
+                os.remove(os.path.join(folder, name))
+            except OSError:
+                pass
+
+
+def build_theme_css(theme):
+    """
+    Compila o tema da igreja e retorna o nome do arquivo (None se não for
+    personalizado). Quem chama grava o nome em theme.css_file.
+    """
+    if theme is None or not theme.is_custom:
+        if theme is not None:
+            _remove_old_files(theme.church_id)
+        return None
+    filename = _write(f'church-{theme.church_id}', compile_theme_css(theme))
+    _remove_old_files(theme.church_id, keep=filename)
+    return filename
+
+
+def default_css_file():
+    folder = theme_dir()
+    with _lock:
+        filename = _default_file.get(folder)
+    if filename is None or not os.path.exists(os.path.join(folder, filename)):
+        filename = _write('default', compile_theme_css(None))
+        with _lock:
+            _default_file[folder] = filename
+    return filename
+
+
+def _rebuild_church_file(church_id):
+    """Compila o tema da igreja e atualiza theme.css_file se o nome mudou"""
+    theme = ChurchTheme.query.filter_by(church_id=church_id).first()
+    filename = build_theme_css(theme)
+    if theme is not None and filename != theme.css_file:
+        # Conexão própria: não mistura com o que a requisição tem pendente na sessão
+        with db.engine.begin() as conn:
+            conn.execute(update(ChurchTheme.__table__)
+                         .where(ChurchTheme.__table__.c.church_id == church_id)
+                         .values(css_file=filename))
+            bump_version(conn)
+        invalidate_settings()
+    return filename
+
+
+def stylesheet_file(church_id):
+    """Nome do arquivo de tema da igreja (ou o padrão)"""
+    church = church_settings(church_id)
+    if church is None or not church.theme_custom:
+        return default_css_file()
+
+    stored = church.theme_css
+    with _lock:
+        checked = stored and _checked.get(church_id) == stored
+    if checked:
+        return stored
+    # Primeira vez neste processo (ou tema sem arquivo): confere se o arquivo
+    # corresponde ao template atual, recompilando após uma atualização do sistema
+    filename = _rebuild_church_file(church_id) or default_css_file()
+    with _lock:
+        _checked[church_id] = filename
+    return filename
+
+
+def stylesheet_url(church_id=None):
+    return url_for('theme_css', filename=stylesheet_file(church_id))
+
+
+def serve_theme_css(filename):
+    match = FILE_PATTERN.fullmatch(filename)
+    if not match:
+        abort(404)
+
+    folder = theme_dir()
+    if not os.path.exists(os.path.join(folder, filename)):
+        if match.group(1) == 'default':
+            current = default_css_file()
+        else:
+            church_id = int(match.group(2))
+            with _lock:
+                _checked.pop(church_id, None)
+            current = stylesheet_file(church_id)
+        if current != filename:
+            # Página antiga apontando para um tema que já mudou
+            response = redirect(url_for('theme_css', filename=current))
+            response.cache_control.no_cache = True
+            return response
+
+    response = send_from_directory(folder, filename, mimetype='text/css', max_age=CACHE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def init_theme_css(app):
+    """Rota dos arquivos de tema e variáveis usadas em base.html"""
+    app.add_url_rule('/theme/<filename>', 'theme_css', serve_theme_css)
+
+    @app.context_processor
+    def inject_theme():
+        church = None
+        if current_user.is_authenticated and current_user.church_id:
+            church = church_settings(current_user.church_id)
+        church_id = church.id if church else None
+        return dict(
+            theme_stylesheet_url=lambda: stylesheet_url(church_id),
+            theme_logo=church.theme_logo if church else None,
+        )
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos bytes trafegados: as dez páginas mais acessadas sem compressão,
+com gzip e com Brotli (banco SQLite temporário com dados sintéticos), e os
+arquivos estáticos originais x minificados/comprimidos (compilar_assets.py).
+Uso: python3 benchmark_compressao.py [--members 80] [--transactions 400] [--repeat 5]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+
+# Adicionar o diretório do projeto ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+PAGINAS = [
+    '/',
+    '/login',
+    '/members/dashboard',
+    '/members/profile',
+    '/members/ministries',
+    '/finance/dashboard',
+    '/finance/export-report',
+    '/edification/gallery',
+    '/edification/studies',
+    '/admin/dashboard',
+]
+CODIFICACOES = ('identity', 'gzip', 'br')
+
+
+def preparar_ambiente(pasta):
+    """Variáveis de ambiente lidas na importação da aplicação"""
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(pasta, 'benchmark.db')
+    os.environ['EMAIL_OUTBOX_WORKER'] = 'false'
+    os.environ['THEME_CSS_DIR'] = os.path.join(pasta, 'theme_css')
+
+
+def popular(args):
+    """Igreja com membros, ministérios, lançamentos, eventos, estudos e mídias"""
+    from app.core.models import (db, Church, ChurchRole, User, Ministry, Transaction, Event,
+                                 Study, Devotional, Media)
+
+    igreja = Church(name='Igreja Benchmark', city='Lisboa', country='Portugal', currency_symbol='€')
+    db.session.add(igreja)
+    db.session.flush()
+    cargo = ChurchRole(name='Administrador Global', church_id=igreja.id, is_lead_pastor=True)
+    db.session.add(cargo)
+    db.session.flush()
+
+    admin = User(name='Administrador', email='admin@benchmark.local', status='active', is_email_verified=True,
+                 church_id=igreja.id, church_role_id=cargo.id, can_manage_finance=True)
+    admin.set_password('benchmark')
+    membros = [User(name=f'Membro {i:03d} da Silva', email=f'membro{i}@benchmark.local', status='active',
+                    church_id=igreja.id, birth_date=datetime(1980 + i % 30, 1 + i % 12, 1 + i % 28).date(),
+                    phone=f'+351 91{i:07d}') for i in range(args.members)]
+    db.session.add_all([admin] + membros)
+    db.session.flush()
+
+    ministerios = [Ministry(name=f'Ministério {n}', description='Servindo a igreja com alegria.',
+                            church_id=igreja.id, leader_id=admin.id) for n in ('Louvor', 'Jovens', 'Infantil', 'Intercessão')]
+    db.session.add_all(ministerios)
+    db.session.flush()
+    for i, membro in enumerate(membros):
+        membro.ministries.append(ministerios[i % len(ministerios)])
+    admin.ministries.extend(ministerios)
+
+    agora = datetime.now()
+    db.session.add_all([Transaction(type='income' if i % 3 else 'expense', amount=10 + i % 90,
+                                    category_name='Dízimo' if i % 3 else 'Manutenção', payment_method_name='MB Way',
+                                    date=agora - timedelta(days=i % 60), description=f'Lançamento {i}',
+                                    user_id=membros[i % len(membros)].id if membros else None, church_id=igreja.id)
+                        for i in range(args.transactions)])
+    db.session.add_all([Event(title=f'Culto {i}', description='Culto de celebração', location='Templo',
+                              start_time=agora + timedelta(days=i), church_id=igreja.id) for i in range(12)])
+    db.session.add_all([Study(title=f'Estudo {i}: Fé e obras', content='<p>Conteúdo do estudo.</p>' * 40,
+                              category='Doutrina', author_id=admin.id) for i in range(20)])
+    db.session.add(Devotional(title='Devocional do dia', content='Texto do devocional. ' * 30,
+                              verse='João 3:16', date=agora.date()))
+    db.session.add_all([Media(title=f'Foto {i}', description='Retiro de jovens', file_path=f'uploads/media/foto{i}.jpg',
+                              event_name='Retiro', church_id=igreja.id) for i in range(30)])
+    db.session.commit()
+
+
+def medir_paginas(app, cliente, repeticoes):
+    """Bytes por página em cada codificação e tempo médio de compressão"""
+    from app.utils.compression import brotli
+
+    resultados = []
+    for pagina in PAGINAS:
+        linha = {'pagina': pagina}
+        for codificacao in CODIFICACOES:
+            if codificacao == 'br' and brotli is None:
+                linha[codificacao] = None
+                continue
+            tempos = []
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                resposta = cliente.get(pagina, headers={'Accept-Encoding': codificacao})
+                tempos.append(time.perf_counter() - inicio)
+            linha['status'] = resposta.status_code
+            linha[codificacao] = len(resposta.get_data())
+            linha[f'{codificacao}_ms'] = min(tempos) * 1000
+        resultados.append(linha)
+    return resultados
+
+
+def medir_estaticos(pasta):
+    """Compila uma cópia de app/static/css e js (não altera o projeto)"""
+    from app.utils.assets import build_assets
+    origem = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'static')
+    destino = os.path.join(pasta, 'static')
+    for subpasta in ('css', 'js'):
+        shutil.copytree(os.path.join(origem, subpasta), os.path.join(destino, subpasta))
+    return build_assets(destino)
+
+
+def _kb(valor):
+    return f"{valor / 1024:7.1f}" if valor is not None else '      -'
+
+
+def executar(args):
+    pasta = tempfile.mkdtemp(prefix='benchmark_compressao_')
+    try:
+        preparar_ambiente(pasta)
+        from app import create_app
+        from app.core.models import db
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            popular(args)
+
+        cliente = app.test_client()
+        cliente.post('/login', data={'email': 'admin@benchmark.local', 'password': 'benchmark'})
+        for pagina in PAGINAS:  # aquece caches (configurações, tema, usuário)
+            cliente.get(pagina)
+
+        paginas = medir_paginas(app, cliente, args.repeat)
+        estaticos = medir_estaticos(pasta)
+
+        print(f"📄 Dez páginas (KB trafegados; limite de compressão: {app.config.get('COMPRESS_MIN_SIZE')} bytes)")
+        print(f"   {'página':<26} {'status':>6} {'sem':>7} {'gzip':>7} {'br':>7}   tempo sem/gzip/br (ms)")
+        totais = dict.fromkeys(CODIFICACOES, 0)
+        for linha in paginas:
+            for codificacao in CODIFICACOES:
+                totais[codificacao] += linha.get(codificacao) or 0
+            tempos = '/'.join(f"{linha.get(f'{c}_ms', 0):.1f}" for c in CODIFICACOES)
+            print(f"   {linha['pagina']:<26} {linha['status']:>6} {_kb(linha['identity'])} {_kb(linha['gzip'])} "
+                  f"{_kb(linha['br'])}   {tempos}")
+        print(f"   {'TOTAL':<26} {'':>6} {_kb(totais['identity'])} {_kb(totais['gzip'])} {_kb(totais['br'] or None)}")
+        if totais['identity']:
+            print(f"📉 gzip: -{100 - totais['gzip'] * 100 / totais['identity']:.0f}%"
+                  + (f" | br: -{100 - totais['br'] * 100 / totais['identity']:.0f}%" if totais['br'] else ''))
+
+        print("🧰 Estáticos (KB): original | minificado | gzip | br")
+        for nome, dados in sorted(estaticos.items()):
+            print(f"   {nome:<26} {_kb(dados['source'])} {_kb(dados['minified'])} {_kb(dados['gzip'])} {_kb(dados['br'])}")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark de bytes trafegados (compressão e estáticos)')
+    parser.add_argument('--members', type=int, default=80, help='Membros sintéticos')
+    parser.add_argument('--transactions', type=int, default=400, help='Lançamentos financeiros sintéticos')
+    parser.add_argument('--repeat', type=int, default=5, help='Repetições por página (menor tempo)')
+
+    args = parser.parse_args()
+    executar(args)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark do envio de e-mails com o servidor SMTP local (sem acesso à rede):
+envio antigo (uma conexão + login por mensagem, dentro da requisição) x fila
+(requisição só grava; o remetente reaproveita uma conexão por igreja).
+Uso: python3 benchmark_email.py [--messages 200] [--churches 4] [--connect-latency 0.1] [--failure-rate 0]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+from datetime import datetime
+
+# Adicionar o diretório do projeto ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from servidor_smtp_local import start_smtp_sink
+
+
+def preparar_ambiente(args, pasta):
+    """Variáveis de ambiente lidas na importação da aplicação"""
+    servidor = start_smtp_sink(connect_latency=args.connect_latency, failure_rate=args.failure_rate,
+                               keep_messages=False)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(pasta, 'benchmark.db')
+    os.environ['SMTP_SINK'] = servidor.address
+    os.environ['SMTP_RPM'] = str(args.rpm)
+    os.environ['EMAIL_OUTBOX_WORKER'] = 'false'  # o lote é enviado pelo próprio benchmark
+    return servidor
+
+
+def envio_legado(church, destino, assunto, html):
+    """Como send_email funcionava: conecta, envia e desconecta a cada mensagem"""
+    from app.utils.email_outbox import smtp_settings, connect, build_message
+    servidor = connect(smtp_settings(church))
+    try:
+        servidor.send_message(build_message(church, destino, assunto, html), to_addrs=[destino])
+        return True
+    except Exception:
+        return False  # sem fila, a mensagem simplesmente se perdia
+    finally:
+        servidor.quit()
+
+
+def executar(args):
+    pasta = tempfile.mkdtemp(prefix='benchmark_email_')
+    try:
+        servidor = preparar_ambiente(args, pasta)
+        from app import create_app
+        from app.core.models import db, Church, EmailOutbox
+        from app.utils.email_utils import send_email
+        from app.utils.email_outbox import drain_outbox, close_idle_connections, outbox_status
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            igrejas = [Church(name=f'Igreja {i}', email_from=f'igreja{i}@local') for i in range(args.churches)]
+            db.session.add_all(igrejas)
+            db.session.commit()
+
+            mensagens = [(igrejas[i % len(igrejas)], f'membro{i}@local', f'Mensagem {i}',
+                          f'<p>Olá, membro {i}!</p>' * 20) for i in range(args.messages)]
+
+            # 1) Envio antigo, dentro da requisição
+            inicio = time.perf_counter()
+            perdidas = sum(1 for igreja, destino, assunto, html in mensagens
+                           if not envio_legado(igreja, destino, assunto, html))
+            t_legado = time.perf_counter() - inicio
+            conexoes_legado = servidor.state.counters['connections']
+
+            # 2) Fila: tempo que a requisição espera (gravar) + tempo do remetente
+            inicio = time.perf_counter()
+            for igreja, destino, assunto, html in mensagens:
+                send_email(igreja.id, destino, assunto, html)
+            t_enfileirar = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            totais = drain_outbox()
+            if args.failure_rate:
+                # Falhas temporárias voltam para a fila: libera e envia de novo até esvaziar
+                for _ in range(10):
+                    if not EmailOutbox.query.filter_by(status='pending').count():
+                        break
+                    EmailOutbox.query.filter_by(status='pending').update(
+                        {'next_attempt_at': datetime.utcnow()}, synchronize_session=False)
+                    db.session.commit()
+                    parcial = drain_outbox()
+                    totais = {k: totais[k] + parcial[k] for k in totais}
+            t_envio = time.perf_counter() - inicio
+            close_idle_connections(0)
+            conexoes_fila = servidor.state.counters['connections'] - conexoes_legado
+            status = outbox_status()
+
+        servidor.shutdown()
+        n = args.messages
+        print(f"✉️  {n} mensagens, {args.churches} igreja(s), abertura de conexão simulada: {args.connect_latency}s")
+        print(f"⏱️  Antigo: {t_legado:.2f}s | {t_legado / n * 1000:.1f} ms de espera por requisição | "
+              f"{conexoes_legado} conexões | {perdidas} perdida(s)")
+        print(f"⏱️  Fila: {t_enfileirar / n * 1000:.1f} ms de espera por requisição | envio do lote {t_envio:.2f}s | "
+              f"{conexoes_fila} conexões")
+        print(f"📊 Resultado da fila: {totais} | status: {status}")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark do envio de e-mails com o servidor SMTP local')
+    parser.add_argument('--messages', type=int, default=200, help='Quantidade de mensagens')
+    parser.add_argument('--churches', type=int, default=4, help='Igrejas (uma conexão aquecida por igreja)')
+    parser.add_argument('--connect-latency', type=float, default=0.1, help='Custo simulado de conexão + login (s)')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fração de mensagens recusadas com 451')
+    parser.add_argument('--rpm', type=int, default=60000, help='Limite de mensagens/minuto por igreja')
+
+    args = parser.parse_args()
+    executar(args)
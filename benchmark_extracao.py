@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark da extração de texto: implementação antiga (PyPDF2 + concatenação)
+x extrator atual (PyMuPDF por páginas), e lote sequencial x pool de processos.
+Sem --pdf, gera um PDF sintético com PyMuPDF.
+Uso: python3 benchmark_extracao.py [--pdf arquivo.pdf] [--pages 300] [--batch 8] [--workers 4]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+from io import BytesIO
+
+# Adicionar o diretório do projeto ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.text_extractor import extract_text, extract_texts, fitz
+
+
+def extrair_legado(caminho):
+    """Implementação anterior: lê tudo em memória e concatena com +="""
+    import PyPDF2
+    with open(caminho, 'rb') as f:
+        reader = PyPDF2.PdfReader(BytesIO(f.read()))
+    text = ""
+    for page in reader.pages:
+        text += page.extract_text() + "\n"
+    return text
+
+
+def gerar_pdf(caminho, paginas):
+    """PDF com texto corrido em todas as páginas"""
+    doc = fitz.open()
+    paragrafo = ("No princípio criou Deus os céus e a terra. E a terra era sem forma e vazia; "
+                 "e havia trevas sobre a face do abismo. ") * 6
+    for i in range(paginas):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 550, 800), f"Página {i + 1}\n\n" + paragrafo * 4, fontsize=10)
+    doc.save(caminho)
+    doc.close()
+
+
+def medir(funcao, *args, repeticoes=1, **kwargs):
+    melhor = None
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(*args, **kwargs)
+        duracao = time.perf_counter() - inicio
+        melhor = duracao if melhor is None else min(melhor, duracao)
+    return melhor, resultado
+
+
+def executar(args):
+    pasta = tempfile.mkdtemp(prefix='benchmark_extracao_')
+    try:
+        caminho = args.pdf
+        if not caminho:
+            caminho = os.path.join(pasta, 'sintetico.pdf')
+            gerar_pdf(caminho, args.pages)
+        print(f"📄 Documento: {caminho} ({os.path.getsize(caminho) / 1024:.0f} KB)")
+
+        t_legado, texto_legado = medir(extrair_legado, caminho, repeticoes=args.repeat)
+        t_atual, texto_atual = medir(extract_text, caminho, repeticoes=args.repeat)
+        t_faixa, _ = medir(extract_text, caminho, repeticoes=args.repeat, first_page=1, last_page=args.range_pages)
+        print(f"⏱️  Legado (PyPDF2 + +=): {t_legado:.3f}s | {len(texto_legado)} caracteres")
+        print(f"⏱️  Atual ({'PyMuPDF' if fitz else 'PyPDF2'}): {t_atual:.3f}s | {len(texto_atual)} caracteres "
+              f"| {t_legado / t_atual:.1f}x mais rápido")
+        print(f"⏱️  Atual, páginas 1-{args.range_pages}: {t_faixa:.3f}s")
+
+        if args.batch > 1:
+            copias = []
+            for i in range(args.batch):
+                destino = os.path.join(pasta, f'copia_{i}.pdf')
+                shutil.copyfile(caminho, destino)
+                copias.append(destino)
+            t_seq, _ = medir(extract_texts, copias, workers=1)
+            t_pool, _ = medir(extract_texts, copias, workers=args.workers)
+            print(f"📚 Lote de {args.batch}: sequencial {t_seq:.3f}s | pool ({args.workers or os.cpu_count()} processos) "
+                  f"{t_pool:.3f}s | {t_seq / t_pool:.1f}x")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark da extração de texto de PDFs')
+    parser.add_argument('--pdf', type=str, help='PDF a usar (padrão: gera um sintético)')
+    parser.add_argument('--pages', type=int, default=300, help='Páginas do PDF sintético')
+    parser.add_argument('--range-pages', type=int, default=20, help='Páginas lidas no teste de faixa')
+    parser.add_argument('--batch', type=int, default=8, help='Documentos no teste de lote')
+    parser.add_argument('--workers', type=int, help='Processos no teste de lote (padrão: núcleos)')
+    parser.add_argument('--repeat', type=int, default=1, help='Repetições (vale o melhor tempo)')
+
+    args = parser.parse_args()
+    executar(args)
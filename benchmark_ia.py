@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Benchmark dos fluxos com IA (novo estudo e nova história kids) com usuários
+simultâneos, usando o servidor de IA local (sem acesso à rede) e um banco
+SQLite temporário.
+Uso: python3 benchmark_ia.py [--users 8] [--requests 3] [--latency 0.5] [--failure-rate 0]
+                             [--rpm 6000] [--concurrency 4] [--json saida.json]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import threading
+import statistics
+
+# Adicionar o diretório do projeto ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from servidor_ia_local import start_stub_server
+
+
+def preparar_ambiente(args, pasta):
+    """Variáveis de ambiente lidas na importação da aplicação"""
+    servidor = start_stub_server(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(pasta, 'benchmark.db')
+    os.environ['GEMINI_BASE_URL'] = servidor.url
+    os.environ['POLLINATIONS_BASE_URL'] = servidor.url
+    os.environ['GEMINI_API_KEY'] = 'benchmark'
+    os.environ['AI_CACHE_DIR'] = os.path.join(pasta, 'ai_cache')
+    # Limites do provedor (o padrão da aplicação, 15 req/min, dominaria o tempo medido)
+    for provedor in ('GEMINI', 'POLLINATIONS'):
+        os.environ[f'{provedor}_RPM'] = str(args.rpm)
+        if args.concurrency:
+            os.environ[f'{provedor}_MAX_CONCURRENCY'] = str(args.concurrency)
+    return servidor
+
+
+def criar_app(pasta, usuarios):
+    from app import create_app
+    from app.core.models import db, User, Church, ChurchRole
+
+    app = create_app()
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.config['UPLOAD_FOLDER'] = os.path.join(pasta, 'uploads')
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+
+    with app.app_context():
+        db.create_all()
+        igreja = Church(name='Igreja Benchmark')
+        db.session.add(igreja)
+        db.session.flush()
+        cargo = ChurchRole(name='Administrador Global', church_id=igreja.id, is_lead_pastor=True)
+        db.session.add(cargo)
+        db.session.flush()
+        for i in range(usuarios):
+            u = User(name=f'Usuário {i}', email=f'bench{i}@local', status='active', is_email_verified=True,
+                     church_id=igreja.id, church_role_id=cargo.id)
+            u.set_password('benchmark')
+            db.session.add(u)
+        db.session.commit()
+    return app
+
+
+def texto_longo(n, paragrafos):
+    """Conteúdo único por requisição (sem acertos no cache de IA)"""
+    return '\n\n'.join(
+        f'Parágrafo {i} do texto {n}. ' + 'No princípio criou Deus os céus e a terra. ' * 12
+        for i in range(paragrafos)
+    )
+
+
+def usuario(app, indice, args, resultados, lock):
+    cliente = app.test_client()
+    cliente.post('/login', data={'email': f'bench{indice}@local', 'password': 'benchmark'})
+
+    for n in range(args.requests):
+        chave = f'{indice}-{n}'
+        fluxos = []
+        if args.flow in ('study', 'both'):
+            fluxos.append(('add_study', '/edification/study/add', {
+                'title': f'Estudo {chave}', 'category': 'Benchmark',
+                'content': texto_longo(chave, args.paragraphs), 'generate_ai_questions': 'on',
+            }))
+        if args.flow in ('story', 'both'):
+            fluxos.append(('add_bible_story', '/edification/kids/story/add', {
+                'title': f'História {chave}', 'content': texto_longo(chave, args.paragraphs),
+                'generate_ai_questions': 'on', 'generate_puzzle_image': 'on',
+            }))
+
+        for nome, url, dados in fluxos:
+            inicio = time.perf_counter()
+            resposta = cliente.post(url, data=dados)
+            duracao = time.perf_counter() - inicio
+            with lock:
+                resultados.append({'flow': nome, 'seconds': duracao, 'status': resposta.status_code})
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    if not valores:
+        return None
+    k = min(len(valores) - 1, int(round(p / 100 * (len(valores) - 1))))
+    return valores[k]
+
+
+def executar(args):
+    pasta = tempfile.mkdtemp(prefix='benchmark_ia_')
+    try:
+        servidor = preparar_ambiente(args, pasta)
+        app = criar_app(pasta, args.users)
+
+        resultados = []
+        lock = threading.Lock()
+        threads = [threading.Thread(target=usuario, args=(app, i, args, resultados, lock)) for i in range(args.users)]
+
+        inicio = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        total = time.perf_counter() - inicio
+
+        with servidor.state.lock:
+            chamadas = dict(servidor.state.counters)
+        servidor.shutdown()
+
+        relatorio = {
+            'users': args.users,
+            'requests_per_user': args.requests,
+            'latency': args.latency,
+            'failure_rate': args.failure_rate,
+            'wall_seconds': round(total, 3),
+            'throughput_rps': round(len(resultados) / total, 3) if total else None,
+            'errors': sum(1 for r in resultados if r['status'] >= 400),
+            'provider_calls': chamadas,
+            'flows': {},
+        }
+        for fluxo in sorted({r['flow'] for r in resultados}):
+            tempos = [r['seconds'] for r in resultados if r['flow'] == fluxo]
+            relatorio['flows'][fluxo] = {
+                'count': len(tempos),
+                'mean': round(statistics.mean(tempos), 3),
+                'p50': round(percentil(tempos, 50), 3),
+                'p95': round(percentil(tempos, 95), 3),
+                'max': round(max(tempos), 3),
+            }
+        return relatorio
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def imprimir(relatorio):
+    print(f"👥 {relatorio['users']} usuário(s) x {relatorio['requests_per_user']} rodada(s), "
+          f"latência simulada {relatorio['latency']}s, falhas {relatorio['failure_rate']:.0%}")
+    print(f"⏱️  Tempo total: {relatorio['wall_seconds']}s | Vazão: {relatorio['throughput_rps']} req/s | "
+          f"Erros HTTP: {relatorio['errors']}")
+    for fluxo, dados in relatorio['flows'].items():
+        print(f"  - {fluxo}: {dados['count']} req | média {dados['mean']}s | p50 {dados['p50']}s | "
+              f"p95 {dados['p95']}s | máx {dados['max']}s")
+    print(f"🤖 Chamadas ao servidor de IA: {relatorio['provider_calls']}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark dos fluxos com IA usando o servidor local')
+    parser.add_argument('--users', type=int, default=8, help='Usuários simultâneos')
+    parser.add_argument('--requests', type=int, default=3, help='Rodadas por usuário')
+    parser.add_argument('--flow', choices=['study', 'story', 'both'], default='both', help='Fluxo a medir')
+    parser.add_argument('--paragraphs', type=int, default=30, help='Parágrafos do texto enviado (tamanho do conteúdo)')
+    parser.add_argument('--latency', type=float, default=0.5, help='Latência simulada por chamada de IA (s)')
+    parser.add_argument('--jitter', type=float, default=0.1, help='Variação aleatória da latência (s)')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fração de chamadas com erro 503')
+    parser.add_argument('--rpm', type=int, default=6000, help='Limite de requisições/minuto por provedor')
+    parser.add_argument('--concurrency', type=int, help='Chamadas simultâneas por provedor (padrão: o da aplicação)')
+    parser.add_argument('--json', type=str, help='Salvar o relatório em JSON neste arquivo')
+
+    args = parser.parse_args()
+
+    relatorio = executar(args)
+    imprimir(relatorio)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, indent=2, ensure_ascii=False)
+        print(f"💾 Relatório salvo em {args.json}")
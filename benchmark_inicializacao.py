@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark do tempo de subida de um worker: `python -X importtime -c "import run"`
+(imports + create_app) em processos novos, com banco SQLite temporário.
+Falha (código 1) se a mediana passar do orçamento ou se alguma biblioteca
+pesada (app/utils/lazy_imports.py: HEAVY_MODULES) for carregada na subida.
+Uso: python3 benchmark_inicializacao.py [--repeat 5] [--budget-ms 1500] [--top 15]
+"""
+
+import os
+import sys
+import time
+import shutil
+import statistics
+import subprocess
+import tempfile
+
+# Adicionar o diretório do projeto ao path
+PASTA_PROJETO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, PASTA_PROJETO)
+
+ORCAMENTO_PADRAO_MS = 1500
+
+
+def ambiente(pasta):
+    """Mesmo ambiente de um worker, sem tocar no banco nem nos arquivos do projeto"""
+    env = dict(os.environ)
+    env['DATABASE_URL'] = 'sqlite:///' + os.path.join(pasta, 'benchmark.db')
+    env['EMAIL_OUTBOX_WORKER'] = 'false'
+    env['THEME_CSS_DIR'] = os.path.join(pasta, 'theme_css')
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    env.pop('PYTHONPROFILEIMPORTTIME', None)
+    return env
+
+
+def ler_importtime(saida):
+    """{módulo: (self_us, cumulativo_us)} a partir da saída de -X importtime"""
+    modulos = {}
+    for linha in saida.splitlines():
+        if not linha.startswith('import time:') or 'self [us]' in linha:
+            continue
+        try:
+            proprio, cumulativo, nome = linha[len('import time:'):].split('|')
+            modulos[nome.strip()] = (int(proprio), int(cumulativo))
+        except ValueError:
+            continue
+    return modulos
+
+
+def medir_uma_vez(env):
+    inicio = time.perf_counter()
+    processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import run'],
+                              cwd=PASTA_PROJETO, env=env, capture_output=True, text=True)
+    total_ms = (time.perf_counter() - inicio) * 1000
+    if processo.returncode != 0:
+        erros = [l for l in processo.stderr.splitlines() if not l.startswith('import time:')]
+        raise RuntimeError('Falha ao subir a aplicação:\n' + '\n'.join(erros[-20:]))
+    return total_ms, ler_importtime(processo.stderr)
+
+
+def pacotes_mais_caros(modulos, quantidade):
+    """Pacotes de primeiro nível ordenados pelo tempo próprio somado"""
+    por_pacote = {}
+    for nome, (proprio, _) in modulos.items():
+        raiz = nome.split('.')[0]
+        por_pacote[raiz] = por_pacote.get(raiz, 0) + proprio
+    return sorted(por_pacote.items(), key=lambda item: item[1], reverse=True)[:quantidade]
+
+
+def executar(args):
+    from app.utils.lazy_imports import HEAVY_MODULES
+
+    pasta = tempfile.mkdtemp(prefix='benchmark_inicializacao_')
+    try:
+        env = ambiente(pasta)
+        medir_uma_vez(env)  # aquecimento (cache de disco do sistema)
+
+        totais, imports, ultima = [], [], {}
+        for _ in range(args.repeat):
+            total_ms, modulos = medir_uma_vez(env)
+            totais.append(total_ms)
+            imports.append(sum(proprio for proprio, _ in modulos.values()) / 1000)
+            ultima = modulos
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    mediana = statistics.median(totais)
+    pesados = [nome for nome in HEAVY_MODULES if nome in ultima]
+
+    print(f"🚀 Subida do worker ({args.repeat} execuções, processo novo a cada uma)")
+    print(f"   total (interpretador + imports + create_app): mediana {mediana:.0f} ms | "
+          f"mín {min(totais):.0f} ms | máx {max(totais):.0f} ms")
+    print(f"   só imports: mediana {statistics.median(imports):.0f} ms | {len(ultima)} módulos")
+    print(f"📦 Pacotes mais caros (tempo próprio dos imports)")
+    for pacote, microssegundos in pacotes_mais_caros(ultima, args.top):
+        print(f"   {pacote:<28} {microssegundos / 1000:7.1f} ms")
+
+    falhou = False
+    if pesados:
+        print(f"❌ Bibliotecas pesadas carregadas na subida: {', '.join(pesados)}")
+        falhou = True
+    if mediana > args.budget_ms:
+        print(f"❌ Mediana de {mediana:.0f} ms acima do orçamento de {args.budget_ms:.0f} ms")
+        falhou = True
+    if not falhou:
+        print(f"✅ Dentro do orçamento ({args.budget_ms:.0f} ms) e sem bibliotecas pesadas na subida")
+    return 1 if falhou else 0
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark do tempo de subida (python -X importtime)')
+    parser.add_argument('--repeat', type=int, default=5, help='Execuções medidas (usa a mediana)')
+    parser.add_argument('--budget-ms', type=float, default=ORCAMENTO_PADRAO_MS,
+                        help='Orçamento da mediana em ms (falha acima dele)')
+    parser.add_argument('--top', type=int, default=15, help='Quantos pacotes listar')
+
+    args = parser.parse_args()
+    sys.exit(executar(args))
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Benchmark das rotas mais acessadas em vários tamanhos de base: para cada
+tamanho, um banco SQLite temporário é preenchido por gerar_dados_sinteticos.py
+e as páginas são chamadas pelo test client do Flask (como administrador e como
+membro comum). Mede latência (mín/mediana/p95/máx), consultas SQL, tempo de
+banco e de renderização (app/utils/request_metrics.py) e tamanho da resposta.
+
+Cada tamanho roda num processo novo (caches e conexões não passam de um para
+outro). O relatório JSON fica em --output; com --compare, as medianas e as
+consultas são comparadas com um relatório anterior e o código de saída é 1
+se alguma rota mudou de status, passou a fazer mais consultas ou ficou mais
+lenta além de --threshold (%) e de --min-delta-ms (páginas rápidas oscilam
+muito em termos relativos).
+Uso: python3 benchmark_rotas.py [--sizes pequeno,medio,grande] [--repeat 5] [--output benchmark_rotas.json]
+                                [--compare relatorio_anterior.json] [--threshold 25] [--min-delta-ms 5]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime
+
+# Adicionar o diretório do projeto ao path
+PASTA_PROJETO = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, PASTA_PROJETO)
+
+# igrejas, membros da igreja medida (média das demais), anos de histórico e estudos
+TAMANHOS = {
+    'pequeno': {'igrejas': 1, 'membros': 50, 'anos': 1, 'estudos': 10},
+    'medio': {'igrejas': 3, 'membros': 300, 'anos': 2, 'estudos': 40},
+    'grande': {'igrejas': 10, 'membros': 1500, 'anos': 3, 'estudos': 150},
+}
+# (perfil, URL); {nome} vem das referências devolvidas pelo gerador
+ROTAS = [
+    ('admin', '/'),
+    ('admin', '/members/dashboard'),
+    ('admin', '/members/ministries'),
+    ('admin', '/members/agenda'),
+    ('admin', '/members/my-church/members'),
+    ('admin', '/members/birthdays'),
+    ('admin', '/members/api/search?q=silva'),
+    ('admin', '/finance/dashboard'),
+    ('admin', '/finance/report'),
+    ('admin', '/finance/export-report'),
+    ('admin', '/finance/bills'),
+    ('admin', '/finance/suppliers'),
+    ('admin', '/edification/gallery'),
+    ('admin', '/edification/gallery/album/{album}'),
+    ('admin', '/edification/studies'),
+    ('admin', '/edification/study/{estudo}'),
+    ('admin', '/edification/search?q=graça'),
+    ('admin', '/admin/dashboard'),
+    ('admin', '/admin/church-dashboard'),
+    ('admin', '/admin/ministry-dashboard/{ministerio}'),
+    ('admin', '/admin/members'),
+    ('admin', '/admin/logs'),
+    ('membro', '/members/dashboard'),
+    ('membro', '/members/profile'),
+    ('membro', '/members/agenda'),
+    ('membro', '/finance/my-contributions'),
+    ('membro', '/edification/studies'),
+]
+
+
+def preparar_ambiente(pasta):
+    """Variáveis de ambiente lidas na importação da aplicação"""
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(pasta, 'benchmark.db')
+    os.environ['EMAIL_OUTBOX_WORKER'] = 'false'
+    os.environ['THEME_CSS_DIR'] = os.path.join(pasta, 'theme_css')
+    os.environ['PERF_ENABLED'] = 'true'
+    os.environ['PERF_SLOW_REQUEST_MS'] = '1000000'  # sem avisos no log a cada requisição
+    os.environ['PERF_QUERY_LIMIT'] = '1000000'
+    os.environ['PERF_SLOW_QUERY_MS'] = '1000000'
+
+
+def _percentil(valores, fracao):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * fracao))]
+
+
+def medir_rota(cliente, url, repeticoes):
+    """Aquece uma vez e mede as repetições; consultas e tempos vêm do request_metrics"""
+    from app.utils import request_metrics
+
+    cliente.get(url)
+    tempos, consultas, banco, render = [], [], [], []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resposta = cliente.get(url)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        registro = request_metrics.records()[-1]
+        consultas.append(registro['queries'])
+        banco.append(registro['db_ms'])
+        render.append(registro['render_ms'])
+    return {
+        'status': resposta.status_code,
+        'endpoint': registro['endpoint'],
+        'min_ms': round(min(tempos), 1),
+        'median_ms': round(statistics.median(tempos), 1),
+        'p95_ms': round(_percentil(tempos, 0.95), 1),
+        'max_ms': round(max(tempos), 1),
+        'queries': int(statistics.median(consultas)),
+        'max_queries': max(consultas),
+        'db_ms': round(statistics.median(banco), 1),
+        'render_ms': round(statistics.median(render), 1),
+        'bytes': len(resposta.get_data()),
+    }
+
+
+def medir_tamanho(nome, repeticoes, semente):
+    """Roda no processo filho: gera a base, entra com os dois perfis e mede as rotas"""
+    pasta = tempfile.mkdtemp(prefix=f'benchmark_rotas_{nome}_')
+    try:
+        preparar_ambiente(pasta)
+        from app import create_app
+        from app.core.models import db
+        from gerar_dados_sinteticos import gerar, SENHA
+
+        app = create_app()
+        parametros = TAMANHOS[nome]
+        with app.app_context():
+            db.create_all()
+            inicio = time.perf_counter()
+            dados = gerar(semente=semente, **parametros)
+            geracao = time.perf_counter() - inicio
+
+        referencias = dados['referencias']
+        clientes = {}
+        for perfil in ('admin', 'membro'):
+            clientes[perfil] = app.test_client()
+            resposta = clientes[perfil].post('/login', data={'email': referencias[perfil], 'password': SENHA})
+            if resposta.status_code != 302:
+                raise RuntimeError(f'Falha ao entrar como {perfil} ({referencias[perfil]})')
+
+        rotas = []
+        for perfil, modelo in ROTAS:
+            url = modelo.format(**referencias)
+            rotas.append(dict(medir_rota(clientes[perfil], url, repeticoes), perfil=perfil, url=modelo))
+        return {'parametros': parametros, 'totais': dados['totais'],
+                'geracao_s': round(geracao, 1), 'rotas': rotas}
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PASTA_PROJETO,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _chave(rota):
+    return f"{rota['perfil']} {rota['url']}"
+
+
+def comparar(atual, anterior, limite, diferenca_minima):
+    """Imprime as diferenças por tamanho/rota; devolve a quantidade de pioras"""
+    pioras = 0
+    print(f"\n🔁 Comparação com {anterior.get('commit') or '?'} de {anterior.get('generated_at', '?')}")
+    for nome, dados in atual['sizes'].items():
+        antes = {_chave(r): r for r in anterior.get('sizes', {}).get(nome, {}).get('rotas', [])}
+        if not antes:
+            print(f"   {nome}: sem medição anterior")
+            continue
+        print(f"   [{nome}] {'rota':<52} {'mediana (ms)':>20} {'consultas':>12}")
+        for rota in dados['rotas']:
+            velha = antes.get(_chave(rota))
+            if not velha:
+                continue
+            diferenca = rota['median_ms'] - velha['median_ms']
+            variacao = diferenca * 100 / velha['median_ms'] if velha['median_ms'] else 0
+            piorou = (rota['status'] != velha['status'] or rota['queries'] > velha['queries']
+                      or (variacao > limite and diferenca > diferenca_minima))
+            pioras += piorou
+            print(f"   {'❌' if piorou else '  '} {_chave(rota):<52} {velha['median_ms']:>7} → {rota['median_ms']:>7} "
+                  f"({variacao:+4.0f}%) {velha['queries']:>4} → {rota['queries']:<4}"
+                  + (f" status {velha['status']} → {rota['status']}" if rota['status'] != velha['status'] else ''))
+    return pioras
+
+
+def imprimir(relatorio):
+    for nome, dados in relatorio['sizes'].items():
+        totais = dados['totais']
+        print(f"\n📊 {nome}: {totais['igrejas']} igreja(s), {totais['membros']} membros, "
+              f"{totais['lancamentos']} lançamentos, {totais['logs']} logs (gerados em {dados['geracao_s']} s)")
+        print(f"   {'rota':<52} {'status':>6} {'mediana':>8} {'p95':>8} {'consultas':>9} {'SQL ms':>7} {'KB':>7}")
+        for rota in dados['rotas']:
+            print(f"   {_chave(rota):<52} {rota['status']:>6} {rota['median_ms']:>8} {rota['p95_ms']:>8} "
+                  f"{rota['queries']:>9} {rota['db_ms']:>7} {rota['bytes'] / 1024:>7.1f}")
+
+
+def executar(args):
+    nomes = [nome.strip() for nome in args.sizes.split(',') if nome.strip()]
+    desconhecidos = [nome for nome in nomes if nome not in TAMANHOS]
+    if desconhecidos:
+        print(f"❌ Tamanho(s) desconhecido(s): {', '.join(desconhecidos)} (use {', '.join(TAMANHOS)})")
+        return 2
+
+    relatorio = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit_atual(),
+        'python': platform.python_version(),
+        'database': 'sqlite',
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'sizes': {},
+    }
+    for nome in nomes:
+        print(f"⏳ {nome}: gerando dados e medindo {len(ROTAS)} rotas...")
+        with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as arquivo:
+            saida = arquivo.name
+        try:
+            processo = subprocess.run([sys.executable, os.path.abspath(__file__), '--size', nome,
+                                       '--repeat', str(args.repeat), '--seed', str(args.seed), '--output', saida],
+                                      cwd=PASTA_PROJETO)
+            if processo.returncode != 0:
+                print(f"❌ Falha ao medir o tamanho {nome}")
+                return 1
+            with open(saida, encoding='utf-8') as arquivo:
+                relatorio['sizes'][nome] = json.load(arquivo)
+        finally:
+            os.remove(saida)
+
+    imprimir(relatorio)
+    with open(args.output, 'w', encoding='utf-8') as arquivo:
+        json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+    print(f"\n💾 Relatório salvo em {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as arquivo:
+            pioras = comparar(relatorio, json.load(arquivo), args.threshold, args.min_delta_ms)
+        if pioras:
+            print(f"❌ {pioras} rota(s) pioraram (status, consultas ou mediana +{args.threshold:.0f}% "
+                  f"e +{args.min_delta_ms:.0f} ms)")
+            return 1
+        print("✅ Nenhuma rota piorou")
+    return 0
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark das rotas principais com bases sintéticas de vários tamanhos')
+    parser.add_argument('--sizes', default='pequeno,medio,grande',
+                        help=f"Tamanhos separados por vírgula ({', '.join(TAMANHOS)})")
+    parser.add_argument('--repeat', type=int, default=5, help='Repetições medidas por rota')
+    parser.add_argument('--seed', type=int, default=42, help='Semente dos dados sintéticos')
+    parser.add_argument('--output', default='benchmark_rotas.json', help='Arquivo JSON do relatório')
+    parser.add_argument('--compare', help='Relatório anterior para comparar')
+    parser.add_argument('--threshold', type=float, default=25, help='Piora aceitável da mediana em %%')
+    parser.add_argument('--min-delta-ms', type=float, default=5,
+                        help='Piora mínima da mediana em ms para contar como regressão')
+    parser.add_argument('--size', help=argparse.SUPPRESS)  # uso interno: mede um tamanho no processo filho
+
+    args = parser.parse_args()
+    if args.size:
+        with open(args.output, 'w', encoding='utf-8') as arquivo:
+            json.dump(medir_tamanho(args.size, args.repeat, args.seed), arquivo, ensure_ascii=False)
+        sys.exit(0)
+    sys.exit(executar(args))
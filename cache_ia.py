@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Script para consultar ou limpar o cache de respostas da IA
+Uso: python3 cache_ia.py [--clear]
+"""
+
+import os
+import sys
+
+# Adicionar o diretório do projeto ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.utils import ai_cache
+
+app = create_app()
+
+def mostrar_estatisticas():
+    """Mostra ocupação do cache em disco"""
+    with app.app_context():
+        dados = ai_cache.stats()
+        print(f"📁 Diretório: {ai_cache.cache_dir()}")
+        print(f"📊 Entradas: {dados['entries']}")
+        print(f"📊 Tamanho: {dados['size_bytes'] / 1024:.1f} KB (limite {app.config.get('AI_CACHE_MAX_MB')} MB)")
+
+def limpar_cache():
+    """Remove todas as respostas guardadas"""
+    with app.app_context():
+        removidas = ai_cache.clear()
+        print(f"🗑️ {removidas} resposta(s) removida(s) do cache")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Cache de respostas da IA')
+    parser.add_argument('--clear', action='store_true', help='Apagar todas as respostas em cache')
+
+    args = parser.parse_args()
+
+    if args.clear:
+        limpar_cache()
+    else:
+        mostrar_estatisticas()
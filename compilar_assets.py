@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Minifica e gera os arquivos estáticos com hash (app/static/dist + manifest.json).
+Rodar a cada deploy; a aplicação passa a usar os nomes com hash ao reiniciar.
+Uso: python3 compilar_assets.py [--clear]
+"""
+
+import os
+import sys
+import shutil
+
+# Adicionar o diretório do projeto ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.assets import build_assets, DIST_DIR, rcssmin, rjsmin
+from app.utils.compression import brotli
+
+STATIC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'static')
+
+
+def _kb(valor):
+    return f"{valor / 1024:.1f} KB" if valor is not None else '-'
+
+
+def compilar():
+    """Gera static/dist e mostra o ganho por arquivo"""
+    relatorio = build_assets(STATIC_FOLDER)
+    print(f"🧰 Minificação: CSS {'rcssmin' if rcssmin else 'interna'}, JS {'rjsmin' if rjsmin else 'interna'}"
+          f" | Brotli: {'sim' if brotli else 'não instalado'}")
+    for nome, dados in sorted(relatorio.items()):
+        print(f"📄 {nome} -> {dados['hashed']}: {_kb(dados['source'])} | minificado {_kb(dados['minified'])}"
+              f" | gzip {_kb(dados['gzip'])} | br {_kb(dados['br'])}")
+    print(f"✅ {len(relatorio)} arquivo(s) em {os.path.join(STATIC_FOLDER, DIST_DIR)}")
+
+
+def limpar():
+    """Remove static/dist (a aplicação volta a usar os arquivos originais)"""
+    shutil.rmtree(os.path.join(STATIC_FOLDER, DIST_DIR), ignore_errors=True)
+    print("🗑️ Arquivos compilados removidos")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compilar arquivos estáticos (minificar + hash no nome)')
+    parser.add_argument('--clear', action='store_true', help='Remover os arquivos compilados')
+
+    args = parser.parse_args()
+
+    if args.clear:
+        limpar()
+    else:
+        compilar()
@@ -21,6 +21,17 @@ class Config:
     UPLOAD_FOLDER = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'app/static/uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
     
+    # Cache de respostas da IA (padrão: instance/ai_cache)
+    AI_CACHE_DIR = os.environ.get('AI_CACHE_DIR')
+    AI_CACHE_MAX_MB = int(os.environ.get('AI_CACHE_MAX_MB', 50))
+    
+    # Jobs de IA em segundo plano (estado em instance/ai_jobs)
+    AI_JOB_WORKERS = int(os.environ.get('AI_JOB_WORKERS', 4))
+    
+    # Compressão de PDFs enviados acima de 10 MB (imagens reduzidas para esse DPI, JPEG nessa qualidade)
+    PDF_COMPRESS_DPI = int(os.environ.get('PDF_COMPRESS_DPI', 150))
+    PDF_COMPRESS_QUALITY = int(os.environ.get('PDF_COMPRESS_QUALITY', 75))
+    
     # Configurações de E-mail (SMTP)
     MAIL_SERVER = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
     MAIL_PORT = int(os.environ.get('MAIL_PORT', 587))
@@ -29,3 +40,37 @@ class Config:
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER', MAIL_USERNAME)
+    
+    # Fila de e-mails (tabela email_outbox). Limite por igreja: SMTP_RPM (padrão 60/min) por processo de envio
+    # (no Gunicorn, um só: gunicorn.conf.py desliga a thread dos workers e inicia enviar_emails.py --loop)
+    EMAIL_OUTBOX_WORKER = os.environ.get('EMAIL_OUTBOX_WORKER', 'true').lower() == 'true'  # false = usar enviar_emails.py
+    EMAIL_BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', 50))
+    EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 5))
+    SMTP_IDLE_TIMEOUT = int(os.environ.get('SMTP_IDLE_TIMEOUT', 60))
+    SMTP_SINK = os.environ.get('SMTP_SINK')  # host:porta - servidor local de testes (servidor_smtp_local.py)
+    
+    # Intervalo (s) em que cada worker confere se as configurações mudaram (app/utils/settings_cache.py)
+    SETTINGS_CHECK_INTERVAL = float(os.environ.get('SETTINGS_CHECK_INTERVAL', 5))
+    
+    # Compressão das respostas (gzip; Brotli se o pacote brotli estiver instalado)
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))  # bytes
+    COMPRESS_GZIP_LEVEL = int(os.environ.get('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_LEVEL = int(os.environ.get('COMPRESS_BROTLI_LEVEL', 4))
+    
+    # Medição das requisições (app/utils/request_metrics.py, /admin/performance)
+    PERF_ENABLED = os.environ.get('PERF_ENABLED', 'true').lower() == 'true'
+    PERF_BUFFER_SIZE = int(os.environ.get('PERF_BUFFER_SIZE', 1000))  # últimas requisições por processo
+    PERF_SLOW_REQUEST_MS = float(os.environ.get('PERF_SLOW_REQUEST_MS', 1000))  # acima disso vai para o log
+    PERF_QUERY_LIMIT = int(os.environ.get('PERF_QUERY_LIMIT', 50))  # consultas por requisição
+    PERF_SLOW_QUERY_MS = float(os.environ.get('PERF_SLOW_QUERY_MS', 250))  # uma única consulta
+    
+    # /metrics (Prometheus). Sem token, só acessos locais; vários workers: PROMETHEUS_MULTIPROC_DIR (gunicorn.conf.py)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    
+    # Pasta dos arquivos de tema compilados (padrão: instance/theme_css)
+    THEME_CSS_DIR = os.environ.get('THEME_CSS_DIR')
+    
+    # Endereço público do sistema, usado nos links dos e-mails gerados fora de uma requisição (resumo semanal)
+    APP_BASE_URL = os.environ.get('APP_BASE_URL', 'http://localhost:5000')
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Script para enviar a fila de e-mails (tabela email_outbox) fora do servidor web
+Útil com EMAIL_OUTBOX_WORKER=false (ex.: um único processo de envio via cron/systemd).
+Com o Gunicorn, o gunicorn.conf.py já inicia um --loop (único para todos os workers)
+Uso: python3 enviar_emails.py [--loop] [--interval 5] [--status] [--retry-failed]
+"""
+
+import os
+import sys
+import time
+import signal
+import threading
+
+# Adicionar o diretório do projeto ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.core.models import db, EmailOutbox
+from app.utils import email_outbox
+
+app = create_app()
+parar = threading.Event()  # SIGTERM: termina o lote atual e sai
+
+def mostrar_status():
+    """Quantidade de mensagens por status"""
+    with app.app_context():
+        contagem = email_outbox.outbox_status()
+        if not contagem:
+            print("📭 Fila vazia")
+        for status, total in sorted(contagem.items()):
+            print(f"📊 {status}: {total}")
+
+def reenviar_falhas():
+    """Devolve as mensagens com falha para a fila"""
+    with app.app_context():
+        total = EmailOutbox.query.filter_by(status='failed').update(
+            {'status': 'pending', 'attempts': 0, 'next_attempt_at': db.func.now()}, synchronize_session=False)
+        db.session.commit()
+        print(f"🔁 {total} mensagem(ns) de volta à fila")
+
+def enviar(loop=False, intervalo=5):
+    """Envia o que estiver liberado na fila (continuamente com loop=True)"""
+    with app.app_context():
+        while not parar.is_set():
+            inicio = time.perf_counter()
+            totais = email_outbox.drain_outbox()
+            if totais['claimed']:
+                print(f"📨 Enviadas: {totais['sent']} | Para nova tentativa: {totais['retry']} | "
+                      f"Falhas: {totais['failed']} ({time.perf_counter() - inicio:.1f}s)")
+            if not loop:
+                break
+            db.session.remove()
+            email_outbox.close_idle_connections(app.config.get('SMTP_IDLE_TIMEOUT'))
+            parar.wait(intervalo)
+        email_outbox.close_idle_connections(0)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Envio da fila de e-mails')
+    parser.add_argument('--loop', action='store_true', help='Continuar verificando a fila')
+    parser.add_argument('--interval', type=float, default=5, help='Intervalo entre verificações no modo --loop (s)')
+    parser.add_argument('--status', action='store_true', help='Mostrar a quantidade de mensagens por status')
+    parser.add_argument('--retry-failed', action='store_true', help='Devolver as mensagens com falha para a fila')
+
+    args = parser.parse_args()
+
+    if args.status:
+        mostrar_status()
+    elif args.retry_failed:
+        reenviar_falhas()
+    else:
+        signal.signal(signal.SIGTERM, lambda *_: parar.set())
+        enviar(args.loop, args.interval)
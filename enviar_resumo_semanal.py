@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Script para enviar o resumo semanal por e-mail (membros que optaram no perfil)
+Agende uma vez por semana (ex.: cron de domingo). Cada igreja recebe no máximo
+um resumo por semana, mesmo que o script rode de novo.
+Uso: python3 enviar_resumo_semanal.py [--church ID] [--dry-run] [--force] [--base-url https://...]
+"""
+
+import os
+import sys
+
+# Adicionar o diretório do projeto ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.utils.notifications import send_weekly_digests
+
+app = create_app()
+
+def enviar_resumos(church_id=None, dry_run=False, force=False, base_url=None):
+    """Enfileira os resumos (o envio em si é feito pela fila de e-mails)"""
+    base_url = base_url or app.config.get('APP_BASE_URL')
+    # Contexto de requisição só para montar os links com url_for(_external=True)
+    with app.app_context(), app.test_request_context('/', base_url=base_url):
+        resultados = send_weekly_digests(church_id=church_id, dry_run=dry_run, force=force)
+
+    if not resultados:
+        print("📭 Nenhum membro optou pelo resumo semanal")
+    for igreja, resultado in resultados.items():
+        if isinstance(resultado, int):
+            acao = "seriam enviados" if dry_run else "na fila"
+            print(f"✉️  {igreja}: {resultado} resumo(s) {acao}")
+        else:
+            print(f"⏭️  {igreja}: {resultado}")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Resumo semanal por e-mail')
+    parser.add_argument('--church', type=int, help='Apenas esta igreja (ID)')
+    parser.add_argument('--dry-run', action='store_true', help='Só contar, sem enfileirar')
+    parser.add_argument('--force', action='store_true', help='Enviar mesmo se já foi enviado nesta semana')
+    parser.add_argument('--base-url', type=str, help='Endereço do sistema nos links (padrão: APP_BASE_URL)')
+
+    args = parser.parse_args()
+    enviar_resumos(args.church, args.dry_run, args.force, args.base_url)
@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+"""
+Gera dados sintéticos em escala para testes de carga e benchmarks: N igrejas
+com membros, ministérios e participações, eventos (recorrentes e avulsos),
+anos de lançamentos financeiros, fornecedores e contas a pagar, álbuns e
+mídias, estudos com progresso de leitura e logs de auditoria.
+
+As quantidades seguem distribuições aproximadas de uma igreja real (tamanho
+das igrejas, idades, dizimistas, ministérios mais e menos procurados...) e
+são reproduzíveis pela semente. A primeira igreja gerada tem exatamente
+--members membros; as demais variam em torno desse valor.
+
+Grava só no banco passado em --database-url (o DATABASE_URL do ambiente é
+ignorado) e não apaga nada. Se o banco já tiver igrejas, recusa sem --force.
+Os e-mails são <membro>.i<igreja>@sintetico.local e a senha de todos é
+"sintetico".
+Uso: python3 gerar_dados_sinteticos.py --database-url sqlite:////tmp/carga.db [--force]
+     [--churches 3] [--members 200] [--years 2] [--studies 30] [--seed 42]
+"""
+
+import os
+import sys
+import math
+import random
+import calendar
+from datetime import date, datetime, timedelta
+
+# Adicionar o diretório do projeto ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SENHA = 'sintetico'
+DOMINIO = 'sintetico.local'
+LOTE = 1000  # linhas por INSERT
+
+CIDADES = [('Lisboa', 'Portugal', '€'), ('Porto', 'Portugal', '€'), ('Braga', 'Portugal', '€'),
+           ('Coimbra', 'Portugal', '€'), ('São Paulo', 'Brasil', 'R$'), ('Belo Horizonte', 'Brasil', 'R$'),
+           ('Curitiba', 'Brasil', 'R$'), ('Luanda', 'Angola', 'Kz')]
+NOMES_F = ['Ana', 'Maria', 'Joana', 'Beatriz', 'Carla', 'Sofia', 'Raquel', 'Débora', 'Sara', 'Rute',
+           'Marta', 'Helena', 'Inês', 'Lúcia', 'Patrícia', 'Priscila', 'Ester', 'Lídia', 'Tânia', 'Vera']
+NOMES_M = ['João', 'Pedro', 'Paulo', 'Tiago', 'André', 'Filipe', 'Lucas', 'Marcos', 'Mateus', 'Daniel',
+           'Samuel', 'David', 'Rui', 'Nuno', 'Carlos', 'Miguel', 'Rafael', 'Gabriel', 'Josué', 'Elias']
+SOBRENOMES = ['Silva', 'Santos', 'Ferreira', 'Pereira', 'Oliveira', 'Costa', 'Rodrigues', 'Martins',
+              'Sousa', 'Fernandes', 'Gonçalves', 'Gomes', 'Lopes', 'Marques', 'Almeida', 'Ribeiro',
+              'Pinto', 'Carvalho', 'Teixeira', 'Moreira']
+# Do mais para o menos procurado (o peso cai com a posição)
+MINISTERIOS = ['Louvor', 'Jovens', 'Infantil', 'Intercessão', 'Mulheres', 'Homens', 'Casais',
+               'Acolhimento', 'Ação Social', 'Missões', 'Comunicação', 'Som e Imagem', 'Teatro',
+               'Dança', 'Terceira Idade']
+CARGOS = [('Administrador Global', True), ('Pastor', False), ('Diácono', False), ('Tesoureiro', False)]
+CATEGORIAS_ENTRADA = ['Dízimo', 'Oferta', 'Missões']
+CATEGORIAS_SAIDA = ['Renda', 'Água', 'Luz', 'Internet', 'Manutenção', 'Ação Social', 'Material']
+FORMAS_PAGAMENTO = [('Numerário', False), ('MB Way', True), ('Transferência', True)]
+# (fornecedor, categoria, valor médio mensal); os últimos só têm contas avulsas
+FORNECEDORES = [('Senhorio Imóveis Lda', 'Renda', 850), ('Águas Municipais', 'Água', 45),
+                ('Energia Elétrica SA', 'Luz', 120), ('Telecom Fibra', 'Internet', 35),
+                ('Construções Pedra Viva', 'Manutenção', None), ('Papelaria Central', 'Material', None),
+                ('Banco Alimentar', 'Ação Social', None), ('Som & Luz Equipamentos', 'Material', None)]
+CATEGORIAS_ESTUDO = ['Doutrina', 'Família', 'Discipulado', 'Evangelho', 'Antigo Testamento', 'Oração']
+LOG_ACOES = [('UPDATE', 45), ('CREATE', 35), ('DELETE', 10), ('PUBLISH', 4), ('GENERATE', 3),
+             ('CHANGE_PASSWORD', 3)]
+LOG_MODULOS = [('MEMBERS', 30), ('FINANCE', 30), ('EVENT', 12), ('MINISTRY', 10), ('MEDIA', 8),
+               ('STUDY', 6), ('CHURCH', 2), ('ROLE', 2)]
+
+
+def _escolha_ponderada(rng, pares):
+    return rng.choices([valor for valor, _ in pares], weights=[peso for _, peso in pares])[0]
+
+
+def _inserir(modelo_ou_tabela, linhas):
+    """INSERT em lotes (sem passar pelo ORM: bem mais rápido para milhares de linhas)"""
+    from sqlalchemy import insert
+    from app.core.models import db
+
+    tabela = getattr(modelo_ou_tabela, '__table__', modelo_ou_tabela)
+    for inicio in range(0, len(linhas), LOTE):
+        db.session.execute(insert(tabela), linhas[inicio:inicio + LOTE])
+    return len(linhas)
+
+
+def _meses(inicio, fim):
+    """Primeiro dia de cada mês entre as datas"""
+    atual = date(inicio.year, inicio.month, 1)
+    while atual <= fim:
+        yield atual
+        atual = date(atual.year + atual.month // 12, atual.month % 12 + 1, 1)
+
+
+def _domingos(inicio, fim):
+    atual = inicio + timedelta(days=(6 - inicio.weekday()) % 7)
+    while atual <= fim:
+        yield atual
+        atual += timedelta(days=7)
+
+
+def _valor(rng, media, dispersao=0.5):
+    """Valores monetários com cauda longa (lognormal com a média pedida)"""
+    return round(rng.lognormvariate(math.log(media) - dispersao ** 2 / 2, dispersao), 2)
+
+
+def _momento(rng, inicio, fim):
+    """Instante aleatório entre as datas (aceita date ou datetime)"""
+    inicio, fim = (d if isinstance(d, datetime) else datetime.combine(d, datetime.min.time()) for d in (inicio, fim))
+    segundos = int((fim - inicio).total_seconds())
+    return inicio + timedelta(seconds=rng.randint(0, max(segundos, 0)))
+
+
+# ============================================
+# IGREJA, CARGOS E MEMBROS
+# ============================================
+
+def _criar_igreja(rng, indice):
+    from app.core.models import db, Church, ChurchRole, TransactionCategory, PaymentMethod
+
+    cidade, pais, moeda = CIDADES[indice % len(CIDADES)]
+    igreja = Church(name=f'Igreja Sintética {indice + 1} - {cidade}', city=cidade, country=pais,
+                    currency_symbol=moeda, nif=f'5{rng.randint(0, 99999999):08d}', is_main=indice == 0,
+                    email=f'secretaria.i{indice + 1}@{DOMINIO}')
+    db.session.add(igreja)
+    db.session.flush()
+
+    cargos = {}
+    for ordem, (nome, pastor) in enumerate(CARGOS):
+        cargos[nome] = ChurchRole(name=nome, church_id=igreja.id, is_lead_pastor=pastor, order=ordem)
+    categorias = {nome: TransactionCategory(name=nome, type='income', church_id=igreja.id)
+                  for nome in CATEGORIAS_ENTRADA}
+    categorias.update({nome: TransactionCategory(name=nome, type='expense', church_id=igreja.id)
+                       for nome in CATEGORIAS_SAIDA})
+    formas = [PaymentMethod(name=nome, is_electronic=eletronico, church_id=igreja.id)
+              for nome, eletronico in FORMAS_PAGAMENTO]
+    db.session.add_all(list(cargos.values()) + list(categorias.values()) + formas)
+    db.session.flush()
+    return igreja, cargos, categorias, formas
+
+
+def _criar_membros(rng, igreja, cargos, quantidade, inicio, hoje, senha_hash):
+    """Linhas de usuário: idades, gênero, status e data de cadastro variados"""
+    from app.core.models import db, User
+
+    linhas = []
+    for i in range(quantidade):
+        feminino = rng.random() < 0.54
+        nome = (f"{rng.choice(NOMES_F if feminino else NOMES_M)} "
+                f"{rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}")
+        administrador = i == 0
+        idade = min(90, max(30 if administrador else 1, int(rng.gauss(38, 19))))
+        nascimento = date(hoje.year - idade, rng.randint(1, 12), rng.randint(1, 28))
+        linhas.append({
+            'name': 'Administrador ' + nome if administrador else nome,
+            'email': f'{"admin" if administrador else f"membro{i}"}.i{igreja.id}@{DOMINIO}',
+            'password_hash': senha_hash,
+            'birth_date': nascimento,
+            'birthday_key': nascimento.month * 100 + nascimento.day,
+            'gender': 'Feminino' if feminino else 'Masculino',
+            'phone': f'+351 9{rng.randint(10000000, 69999999)}',
+            'status': 'active' if administrador else _escolha_ponderada(
+                rng, [('active', 90), ('pending', 7), ('rejected', 3)]),
+            'is_email_verified': True,
+            'data_consent': True,
+            'church_id': igreja.id,
+            'church_role_id': cargos['Administrador Global'].id if administrador else (
+                cargos['Diácono'].id if rng.random() < 0.03 else None),
+            'can_manage_finance': administrador,
+            'created_at': _momento(rng, inicio, hoje),
+        })
+    _inserir(User, linhas)
+    resultado = db.session.execute(
+        db.select(User.id, User.status, User.birth_date).where(User.church_id == igreja.id).order_by(User.id))
+    return [(id_, status, nascimento) for id_, status, nascimento in resultado]
+
+
+def _criar_ministerios(rng, igreja, membros, hoje):
+    """Quantidade cresce com a igreja; participações concentradas nos primeiros"""
+    from app.core.models import db, Ministry, member_ministries
+
+    ativos = [m for m in membros if m[1] == 'active']
+    adultos = [m for m in ativos if (hoje - m[2]).days > 18 * 365] or ativos
+    quantidade = min(len(MINISTERIOS), 4 + len(membros) // 40)
+    ministerios = []
+    for nome in MINISTERIOS[:quantidade]:
+        ministerios.append(Ministry(name=f'Ministério {nome}', church_id=igreja.id,
+                                    description=f'Ministério {nome} da {igreja.name}.',
+                                    leader_id=rng.choice(adultos)[0], is_kids_ministry=nome == 'Infantil',
+                                    extra_leaders=[]))
+    db.session.add_all(ministerios)
+    db.session.flush()
+
+    pesos = [1 / (posicao + 1) for posicao in range(len(ministerios))]
+    participacoes = set()
+    for membro_id, _, _ in ativos:
+        quantos = _escolha_ponderada(rng, [(0, 35), (1, 40), (2, 18), (3, 7)])
+        for ministerio in rng.choices(ministerios, weights=pesos, k=quantos):
+            participacoes.add((membro_id, ministerio.id))
+    # O administrador participa de todos (vê o máximo de conteúdo nas páginas)
+    participacoes.update((membros[0][0], ministerio.id) for ministerio in ministerios)
+    participacoes.update((ministerio.leader_id, ministerio.id) for ministerio in ministerios)
+    _inserir(member_ministries, [{'user_id': u, 'ministry_id': m} for u, m in sorted(participacoes)])
+    return ministerios, len(participacoes)
+
+
+# ============================================
+# AGENDA, FINANÇAS, MÍDIAS E LOGS
+# ============================================
+
+def _criar_eventos(rng, igreja, ministerios, inicio, hoje):
+    """Cultos semanais, reunião mensal de cada ministério e eventos avulsos"""
+    from app.core.models import Event
+    from app.utils.recurrence import build_rule
+
+    linhas = []
+    primeiro_domingo = next(_domingos(inicio, hoje))
+    for titulo, dia, hora in (('Culto de Celebração', primeiro_domingo, 10),
+                              ('Culto de Oração', primeiro_domingo + timedelta(days=3), 20)):
+        momento = datetime.combine(dia, datetime.min.time()).replace(hour=hora)
+        linhas.append({'title': titulo, 'description': 'Culto semanal.', 'location': 'Templo',
+                       'start_time': momento, 'end_time': momento + timedelta(hours=2),
+                       'church_id': igreja.id, 'ministry_id': None, 'recurrence': 'weekly',
+                       'recurrence_rule': build_rule('weekly', momento)})
+    for ministerio in ministerios:
+        dia = inicio + timedelta(days=rng.randint(0, 27))
+        momento = datetime.combine(dia, datetime.min.time()).replace(hour=rng.choice([15, 19, 20]))
+        linhas.append({'title': f'Reunião do {ministerio.name}', 'description': 'Reunião mensal.',
+                       'location': 'Sala 2', 'start_time': momento, 'end_time': momento + timedelta(hours=1),
+                       'church_id': igreja.id, 'ministry_id': ministerio.id, 'recurrence': 'monthly',
+                       'recurrence_rule': build_rule('monthly_weekday', momento)})
+    for mes in _meses(inicio, hoje + timedelta(days=60)):
+        for _ in range(rng.randint(1, 5)):
+            ultimo_dia = calendar.monthrange(mes.year, mes.month)[1]
+            momento = datetime(mes.year, mes.month, rng.randint(1, ultimo_dia), rng.choice([10, 15, 19]))
+            ministerio = rng.choice(ministerios) if rng.random() < 0.6 else None
+            linhas.append({'title': rng.choice(['Retiro', 'Conferência', 'Jantar de Comunhão', 'Batismos',
+                                                'Ação Evangelística', 'Ensaio Geral', 'Vigília']),
+                           'description': 'Evento especial.', 'location': rng.choice(['Templo', 'Salão', 'Exterior']),
+                           'start_time': momento, 'end_time': momento + timedelta(hours=rng.randint(1, 4)),
+                           'church_id': igreja.id, 'ministry_id': ministerio.id if ministerio else None,
+                           'recurrence': 'none', 'recurrence_rule': None})
+    return _inserir(Event, linhas)
+
+
+def _criar_lancamentos(rng, igreja, membros, categorias, formas, inicio, hoje):
+    """Dízimos mensais (~35% dos adultos), ofertas de domingo e despesas do mês"""
+    from app.core.models import Transaction
+
+    adultos = [m for m in membros if m[1] == 'active' and (hoje - m[2]).days > 18 * 365]
+    dizimistas = [(m[0], _valor(rng, 60, 0.7)) for m in adultos if rng.random() < 0.35]
+    linhas = []
+
+    def lancamento(tipo, categoria, valor, momento, descricao, membro_id=None):
+        forma = rng.choice(formas)
+        linhas.append({'type': tipo, 'amount': valor, 'date': momento, 'description': descricao,
+                       'category_id': categorias[categoria].id, 'category_name': categoria,
+                       'payment_method_id': forma.id, 'payment_method_name': forma.name,
+                       'user_id': membro_id, 'church_id': igreja.id})
+
+    for mes in _meses(inicio, hoje):
+        ultimo_dia = min(calendar.monthrange(mes.year, mes.month)[1], 28)
+        for membro_id, valor in dizimistas:
+            if rng.random() < 0.85:  # nem todo mês
+                dia = datetime(mes.year, mes.month, rng.randint(1, ultimo_dia), rng.randint(9, 21))
+                if dia.date() <= hoje:
+                    lancamento('income', 'Dízimo', round(valor * rng.uniform(0.9, 1.1), 2), dia,
+                               'Dízimo mensal', membro_id)
+        for categoria in ('Renda', 'Água', 'Luz', 'Internet'):
+            dia = datetime(mes.year, mes.month, min(8, ultimo_dia), 12)
+            if dia.date() <= hoje:
+                lancamento('expense', categoria, _valor(rng, {'Renda': 850, 'Água': 45, 'Luz': 120,
+                                                              'Internet': 35}[categoria], 0.15),
+                           dia, f'{categoria} - {mes:%m/%Y}')
+        for _ in range(rng.randint(0, 4)):
+            dia = datetime(mes.year, mes.month, rng.randint(1, ultimo_dia), 15)
+            if dia.date() <= hoje:
+                categoria = rng.choice(['Manutenção', 'Ação Social', 'Material'])
+                lancamento('expense', categoria, _valor(rng, 150, 0.9), dia, f'{categoria} diversa')
+    for domingo in _domingos(inicio, hoje):
+        momento = datetime.combine(domingo, datetime.min.time()).replace(hour=12)
+        lancamento('income', 'Oferta', _valor(rng, 8 * max(len(adultos), 1) ** 0.8, 0.3), momento, 'Ofertas do culto')
+        if rng.random() < 0.25:
+            oferta = rng.choice(adultos)[0] if adultos else None
+            lancamento('income', 'Missões', _valor(rng, 40, 0.8), momento, 'Oferta missionária', oferta)
+    return _inserir(Transaction, linhas)
+
+
+def _criar_contas(rng, igreja, categorias, formas, administrador_id, inicio, hoje):
+    """Contas mensais dos fornecedores fixos e avulsas dos demais (pagas, em aberto e vencidas)"""
+    from app.core.models import db, Supplier, Bill
+
+    fornecedores = [Supplier(name=nome, church_id=igreja.id, tax_id=f'5{rng.randint(0, 99999999):08d}',
+                             city=igreja.city, country=igreja.country, email=f'faturas{i}@{DOMINIO}')
+                    for i, (nome, _, _) in enumerate(FORNECEDORES)]
+    db.session.add_all(fornecedores)
+    db.session.flush()
+
+    linhas = []
+
+    def conta(fornecedor, categoria, valor, vencimento, descricao):
+        if vencimento < hoje - timedelta(days=20):
+            status = 'paid' if rng.random() < 0.95 else 'overdue'
+        elif vencimento < hoje:
+            status = _escolha_ponderada(rng, [('paid', 60), ('overdue', 30), ('partial', 10)])
+        else:
+            status = 'pending'
+        pago = {'paid': valor, 'partial': round(valor / 2, 2)}.get(status, 0)
+        linhas.append({'supplier_id': fornecedor.id, 'description': descricao, 'amount': valor,
+                       'amount_paid': pago, 'issue_date': vencimento - timedelta(days=15), 'due_date': vencimento,
+                       'payment_date': vencimento if status == 'paid' else None,
+                       'invoice_number': f'FT {vencimento.year}/{len(linhas) + 1}',
+                       'category_id': categorias[categoria].id, 'payment_method_id': rng.choice(formas).id,
+                       'status': status, 'church_id': igreja.id, 'created_by': administrador_id})
+
+    for mes in _meses(inicio, hoje + timedelta(days=45)):
+        for fornecedor, (_, categoria, media) in zip(fornecedores, FORNECEDORES):
+            if media:
+                conta(fornecedor, categoria, _valor(rng, media, 0.15), mes.replace(day=8),
+                      f'{categoria} {mes:%m/%Y}')
+            elif rng.random() < 0.3:
+                conta(fornecedor, categoria, _valor(rng, 200, 1.0), mes.replace(day=rng.randint(1, 28)),
+                      f'Fatura {fornecedor.name}')
+    return len(fornecedores), _inserir(Bill, linhas)
+
+
+def _criar_midias(rng, igreja, ministerios, inicio, hoje):
+    """Cerca de um álbum por mês (5 a 40 fotos) e algumas mídias soltas"""
+    from app.core.models import db, Album, Media
+
+    albuns = []
+    for mes in _meses(inicio, hoje):
+        if rng.random() < 0.8:
+            ministerio = rng.choice(ministerios) if rng.random() < 0.3 else None
+            albuns.append(Album(title=f'{rng.choice(["Retiro", "Batismos", "Conferência", "Natal", "Páscoa"])} '
+                                      f'{mes:%m/%Y}', description='Fotos do evento.', church_id=igreja.id,
+                                created_at=datetime(mes.year, mes.month, 20),
+                                ministry_id=ministerio.id if ministerio else None))
+    db.session.add_all(albuns)
+    db.session.flush()
+
+    linhas = []
+    for album in albuns:
+        for i in range(rng.randint(5, 40)):
+            linhas.append({'title': f'{album.title} ({i + 1})', 'description': None,
+                           'file_path': f'uploads/media/sintetico/a{album.id}_{i}.jpg', 'media_type': 'image',
+                           'event_name': album.title, 'created_at': album.created_at, 'church_id': igreja.id,
+                           'ministry_id': album.ministry_id, 'album_id': album.id})
+    for i in range(rng.randint(5, 20)):
+        video = rng.random() < 0.2
+        linhas.append({'title': f'Mídia avulsa {i + 1}', 'description': 'Registro do culto.',
+                       'file_path': f'uploads/media/sintetico/i{igreja.id}_{i}.{"mp4" if video else "jpg"}',
+                       'media_type': 'video' if video else 'image', 'event_name': rng.choice(['Culto', None]),
+                       'created_at': _momento(rng, inicio, hoje),
+                       'church_id': igreja.id, 'ministry_id': None, 'album_id': None})
+    return len(albuns), _inserir(Media, linhas)
+
+
+def _criar_logs(rng, igreja, membros, inicio, hoje):
+    """Em média três ações auditadas por membro por ano, feitas pela liderança"""
+    from app.core.models import SystemLog
+
+    autores = [membros[0][0]] + [m[0] for m in rng.sample(membros, min(5, len(membros)))]
+    anos = max((hoje - inicio).days / 365, 0.1)
+    fim = datetime.combine(hoje, datetime.min.time())
+    linhas = []
+    for _ in range(int(len(membros) * anos * 3)):
+        acao = _escolha_ponderada(rng, LOG_ACOES)
+        modulo = _escolha_ponderada(rng, LOG_MODULOS)
+        linhas.append({'user_id': rng.choice(autores), 'church_id': igreja.id, 'action': acao, 'module': modulo,
+                       'description': f'{acao.title()} em {modulo.lower()} (registro {rng.randint(1, 9999)})',
+                       'old_values': {'status': 'pending'} if acao == 'UPDATE' else None,
+                       'new_values': {'status': 'active'} if acao in ('UPDATE', 'CREATE') else None,
+                       'ip_address': f'10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}',
+                       'created_at': _momento(rng, inicio, fim)})
+    linhas.sort(key=lambda linha: linha['created_at'])
+    return _inserir(SystemLog, linhas)
+
+
+# ============================================
+# ESTUDOS (globais) E PROGRESSO DE LEITURA
+# ============================================
+
+def _criar_estudos(rng, quantidade, autor_id, inicio, hoje):
+    from app.core.models import Study
+    from app.utils.content_render import content_hash, render_markdown_safe
+
+    paragrafo = ('<p>Porque Deus amou o mundo de tal maneira que deu o seu Filho unigênito, para que todo '
+                 'aquele que nele crê não pereça, mas tenha a vida eterna.</p>')
+    linhas = [{'title': f'Estudo {i + 1}: {rng.choice(["Fé", "Graça", "Esperança", "Perdão", "Oração", "Serviço"])} '
+                        f'e {rng.choice(["obras", "família", "comunhão", "missão", "caráter"])}',
+               'content': f'<h2>Estudo {i + 1}</h2>' + paragrafo * rng.randint(5, 120),
+               'category': rng.choice(CATEGORIAS_ESTUDO), 'author_id': autor_id,
+               'created_at': _momento(rng, inicio, hoje)}
+              for i in range(quantidade)]
+    # Cache do HTML já preenchido, como ao criar um estudo pela tela
+    for linha in linhas:
+        linha.update(content_html=render_markdown_safe(linha['content']), content_hash=content_hash(linha['content']))
+    _inserir(Study, linhas)
+
+
+def _criar_progresso(rng, membros, estudos_ids, hoje):
+    """~30% dos membros ativos leem; poucos estudos por leitor, parte concluída"""
+    from app.core.models import StudyProgress
+
+    if not estudos_ids:
+        return 0
+    linhas = []
+    fim = datetime.combine(hoje, datetime.min.time())
+    for membro_id, status, _ in membros:
+        if status != 'active' or rng.random() >= 0.3:
+            continue
+        for estudo_id in rng.sample(estudos_ids, min(len(estudos_ids), 1 + int(rng.expovariate(0.4)))):
+            concluido = rng.random() < 0.4
+            acesso = _momento(rng, fim - timedelta(days=365), fim)
+            linhas.append({'user_id': membro_id, 'study_id': estudo_id, 'completed': concluido,
+                           'last_page': rng.randint(1, 12), 'last_position': 0 if concluido else rng.randint(0, 5000),
+                           'last_access': acesso, 'created_at': acesso - timedelta(days=rng.randint(0, 60))})
+    return _inserir(StudyProgress, linhas)
+
+
+def gerar(igrejas=3, membros=200, anos=2, estudos=30, semente=42, hoje=None):
+    """
+    Gera os dados no banco da aplicação atual (precisa de app_context).
+    Retorna as quantidades por tabela e, em 'referencias', e-mails e ids da
+    primeira igreja (usados pelo benchmark_rotas.py para montar as URLs).
+    """
+    from werkzeug.security import generate_password_hash
+    from app.core.models import db, Study
+    from app.utils.search_index import rebuild_search_index
+    from app.utils.member_search import rebuild_member_index
+
+    rng = random.Random(semente)
+    hoje = hoje or date.today()
+    inicio = hoje - timedelta(days=int(365 * anos))
+    senha_hash = generate_password_hash(SENHA)  # um hash só: gerar milhares custaria minutos
+    totais = dict.fromkeys(['igrejas', 'membros', 'ministerios', 'participacoes', 'eventos', 'lancamentos',
+                            'fornecedores', 'contas', 'albuns', 'midias', 'estudos', 'progresso_estudos',
+                            'logs'], 0)
+    referencias = {}
+    todos_membros = []
+
+    for indice in range(igrejas):
+        quantidade = membros if indice == 0 else max(10, int(rng.lognormvariate(math.log(membros) - 0.18, 0.6)))
+        igreja, cargos, categorias, formas = _criar_igreja(rng, indice)
+        lista = _criar_membros(rng, igreja, cargos, quantidade, inicio, hoje, senha_hash)
+        ministerios, participacoes = _criar_ministerios(rng, igreja, lista, hoje)
+        totais['igrejas'] += 1
+        totais['membros'] += len(lista)
+        totais['ministerios'] += len(ministerios)
+        totais['participacoes'] += participacoes
+        totais['eventos'] += _criar_eventos(rng, igreja, ministerios, inicio, hoje)
+        totais['lancamentos'] += _criar_lancamentos(rng, igreja, lista, categorias, formas, inicio, hoje)
+        fornecedores, contas = _criar_contas(rng, igreja, categorias, formas, lista[0][0], inicio, hoje)
+        totais['fornecedores'] += fornecedores
+        totais['contas'] += contas
+        albuns, midias = _criar_midias(rng, igreja, ministerios, inicio, hoje)
+        totais['albuns'] += albuns
+        totais['midias'] += midias
+        totais['logs'] += _criar_logs(rng, igreja, lista, inicio, hoje)
+        todos_membros.extend(lista)
+
+        if indice == 0:
+            from app.core.models import Album
+            maior_album = (db.session.query(Album.id).filter(Album.church_id == igreja.id)
+                           .order_by(Album.id.desc()).first())
+            referencias.update({
+                'igreja': igreja.id,
+                'admin': f'admin.i{igreja.id}@{DOMINIO}',
+                'membro': next(f'membro{i}.i{igreja.id}@{DOMINIO}' for i, m in enumerate(lista)
+                               if i and m[1] == 'active'),
+                'ministerio': ministerios[0].id,
+                'album': maior_album[0] if maior_album else None,
+            })
+        db.session.commit()
+
+    if todos_membros:
+        _criar_estudos(rng, estudos, todos_membros[0][0], inicio, hoje)
+        estudos_ids = [id_ for (id_,) in db.session.query(Study.id).order_by(Study.id.desc()).limit(estudos)]
+        totais['estudos'] = len(estudos_ids)
+        totais['progresso_estudos'] = _criar_progresso(rng, todos_membros, estudos_ids, hoje)
+        referencias['estudo'] = max(estudos_ids) if estudos_ids else None
+        db.session.commit()
+
+    # Os INSERTs em lote não passam pelos ganchos do ORM que mantêm os índices de busca
+    rebuild_search_index()
+    rebuild_member_index()
+    db.session.commit()
+    return {'totais': totais, 'referencias': referencias}
+
+
+def _banco_tem_dados():
+    """O banco já tem igrejas cadastradas (provavelmente não é um banco de testes)"""
+    from sqlalchemy import inspect as sa_inspect
+    from app.core.models import db, Church
+
+    return sa_inspect(db.engine).has_table(Church.__tablename__) and db.session.query(Church.id).first() is not None
+
+
+def executar(args):
+    # Lida na importação da aplicação: definir antes de create_app
+    os.environ['DATABASE_URL'] = args.database_url
+    from app import create_app
+    from app.core.models import db
+
+    app = create_app()
+    with app.app_context():
+        print(f"🔎 Banco: {db.engine.url.render_as_string(hide_password=True)}")
+        if _banco_tem_dados() and not args.force:
+            print("❌ O banco já tem igrejas cadastradas. Use um banco de testes vazio ou --force.")
+            sys.exit(1)
+        db.create_all()
+        resultado = gerar(args.churches, args.members, args.years, args.studies, args.seed)
+
+    for tabela, total in resultado['totais'].items():
+        print(f"  ✅ {tabela}: {total}")
+    referencias = resultado['referencias']
+    print("\n" + "="*50)
+    print(f"✅ Dados sintéticos gerados! Entre com {referencias.get('admin')} / {SENHA} "
+          f"(administrador) ou {referencias.get('membro')} / {SENHA} (membro).")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Gera dados sintéticos em escala (use um banco de testes)')
+    parser.add_argument('--database-url', required=True,
+                        help='Banco de testes que vai receber os dados (ex.: sqlite:////tmp/carga.db)')
+    parser.add_argument('--force', action='store_true', help='Gravar mesmo se o banco já tiver igrejas')
+    parser.add_argument('--churches', type=int, default=3, help='Quantidade de igrejas')
+    parser.add_argument('--members', type=int, default=200, help='Membros da primeira igreja (média das demais)')
+    parser.add_argument('--years', type=float, default=2, help='Anos de histórico (lançamentos, contas, logs...)')
+    parser.add_argument('--studies', type=int, default=30, help='Estudos bíblicos (compartilhados)')
+    parser.add_argument('--seed', type=int, default=42, help='Semente (mesma semente, mesmos dados)')
+
+    args = parser.parse_args()
+    executar(args)
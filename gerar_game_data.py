@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """
 Script para gerar game_data (palavras para os jogos) para histórias existentes
+Roda em modo lote: no máximo GEMINI_BATCH_RPM requisições/min (padrão 1/4 de
+GEMINI_RPM), contadas só neste processo (ver app/utils/ai_limits.py)
 Uso: python3 gerar_game_data.py
 """
 
@@ -14,13 +16,14 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from app import create_app
 from app.core.models import db, BibleStory
 from app.utils.gemini_service import generate_questions
+from app.utils.ai_limits import batch_mode
 
 app = create_app()
 
-def gerar_game_data():
+def gerar_game_data(fresh=False):
     """Gera game_data para histórias que não têm ou estão vazias"""
     
-    with app.app_context():
+    with app.app_context(), batch_mode():
         # Buscar histórias sem game_data ou com game_data vazio
         stories = BibleStory.query.filter(
             db.or_(
@@ -44,7 +47,7 @@ def gerar_game_data():
                 # Tentar gerar palavras via IA
                 if story.content and len(story.content) > 50:
                     try:
-                        result = generate_questions(story.content, type='kids', count=5)
+                        result = generate_questions(story.content, type='kids', count=5, fresh=fresh)
                         if result and "game_words" in result and result["game_words"]:
                             # Usar as palavras geradas pela IA
                             game_words = result["game_words"]
@@ -106,9 +109,9 @@ def extrair_palavras_do_titulo(titulo):
     
     return palavras_filtradas[:10]  # Limitar a 10 palavras
 
-def gerar_game_data_para_historia_especifica(historia_id):
+def gerar_game_data_para_historia_especifica(historia_id, fresh=False):
     """Gera game_data para uma história específica"""
-    with app.app_context():
+    with app.app_context(), batch_mode():
         story = BibleStory.query.get(historia_id)
         if not story:
             print(f"❌ História com ID {historia_id} não encontrada!")
@@ -119,7 +122,7 @@ def gerar_game_data_para_historia_especifica(historia_id):
         try:
             if story.content and len(story.content) > 50:
                 try:
-                    result = generate_questions(story.content, type='kids', count=5)
+                    result = generate_questions(story.content, type='kids', count=5, fresh=fresh)
                     if result and "game_words" in result and result["game_words"]:
                         game_words = result["game_words"]
                         story.game_data = json.dumps(game_words)
@@ -148,12 +151,13 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Gerar game_data para histórias bíblicas')
     parser.add_argument('--id', type=int, help='ID específico de uma história')
     parser.add_argument('--check', action='store_true', help='Apenas verificar quais histórias não têm game_data')
+    parser.add_argument('--fresh', action='store_true', help='Ignorar o cache de respostas da IA')
     
     args = parser.parse_args()
     
     if args.id:
         # Gerar para uma história específica
-        gerar_game_data_para_historia_especifica(args.id)
+        gerar_game_data_para_historia_especifica(args.id, fresh=args.fresh)
     elif args.check:
         # Apenas verificar
         with app.app_context():
@@ -173,4 +177,4 @@ if __name__ == "__main__":
                     print(f"  - ID {s.id}: {s.title}")
     else:
         # Gerar para todas
-        gerar_game_data()
\ No newline at end of file
+        gerar_game_data(fresh=args.fresh)
\ No newline at end of file
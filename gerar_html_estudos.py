@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Script para gerar o cache de HTML renderizado dos estudos existentes
+Uso: python3 gerar_html_estudos.py [--id ID] [--force] [--check]
+"""
+
+import os
+import sys
+
+# Adicionar o diretório do projeto ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.core.models import db, Study
+from app.utils.content_render import refresh_study_html, content_hash
+
+app = create_app()
+
+def gerar_html_estudos(force=False, batch_size=50):
+    """Renderiza o HTML dos estudos sem cache ou com cache desatualizado"""
+
+    with app.app_context():
+        total = Study.query.count()
+        print(f"📚 {total} estudos encontrados\n")
+
+        atualizados = 0
+        # Processa em lotes por id para não carregar todos os conteúdos de uma vez
+        last_id = 0
+        while True:
+            lote = Study.query.filter(Study.id > last_id).order_by(Study.id.asc()).limit(batch_size).all()
+            if not lote:
+                break
+
+            for study in lote:
+                try:
+                    if refresh_study_html(study, force=force):
+                        atualizados += 1
+                        print(f"  ✅ ID {study.id}: {study.title}")
+                except Exception as e:
+                    print(f"  ❌ ID {study.id}: {e}")
+
+            db.session.commit()
+            last_id = lote[-1].id
+            db.session.expunge_all()
+
+        print("\n" + "="*50)
+        print(f"✅ Processamento concluído! {atualizados} estudo(s) atualizado(s).")
+
+def gerar_html_estudo_especifico(study_id, force=False):
+    """Renderiza o HTML de um estudo específico"""
+    with app.app_context():
+        study = Study.query.get(study_id)
+        if not study:
+            print(f"❌ Estudo com ID {study_id} não encontrado!")
+            return
+
+        if refresh_study_html(study, force=force):
+            db.session.commit()
+            print(f"✅ HTML gerado para: {study.title}")
+        else:
+            print(f"→ Cache já atualizado para: {study.title}")
+
+def verificar_cache():
+    """Lista estudos sem cache ou com cache desatualizado"""
+    with app.app_context():
+        rows = db.session.query(Study.id, Study.title, Study.content, Study.content_hash).all()
+        pendentes = [r for r in rows if r.content_hash != content_hash(r.content)]
+
+        print(f"📊 Total de estudos: {len(rows)}")
+        print(f"📊 Com cache válido: {len(rows) - len(pendentes)}")
+        print(f"📊 Sem cache / desatualizado: {len(pendentes)}")
+
+        if pendentes:
+            print("\n📚 Estudos pendentes:")
+            for r in pendentes:
+                print(f"  - ID {r.id}: {r.title}")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Gerar cache de HTML dos estudos')
+    parser.add_argument('--id', type=int, help='ID específico de um estudo')
+    parser.add_argument('--force', action='store_true', help='Renderizar novamente mesmo com cache válido')
+    parser.add_argument('--check', action='store_true', help='Apenas verificar quais estudos estão sem cache')
+
+    args = parser.parse_args()
+
+    if args.id:
+        gerar_html_estudo_especifico(args.id, force=args.force)
+    elif args.check:
+        verificar_cache()
+    else:
+        gerar_html_estudos(force=args.force)
@@ -0,0 +1,101 @@
+# gunicorn.conf.py
+"""
+Configuração lida automaticamente pelo Gunicorn (gunicorn run:app).
+
+Workers gthread: cada processo atende GUNICORN_THREADS requisições ao mesmo
+tempo, então o acompanhamento dos jobs de IA (SSE e long-poll, que ficam
+abertos por alguns segundos) não trava o worker inteiro. Esses fluxos duram
+menos que o timeout (app/utils/ai_jobs.py: STREAM_TIMEOUT e MAX_POLL_WAIT) e
+o navegador reconecta sozinho.
+
+Fila de e-mails: em vez de uma thread de envio por worker (o limite SMTP_RPM e
+as conexões SMTP abertas seriam multiplicados pelo número de workers), o
+master inicia um único processo "enviar_emails.py --loop" e os workers só
+gravam na fila. Uma thread do master confere o processo a cada
+EMAIL_SENDER_CHECK segundos e o reinicia (com espera crescente) se ele sair.
+EMAIL_OUTBOX_WORKER=false desliga também esse processo (para rodar o envio à
+parte, via cron/systemd).
+
+Métricas do Prometheus com vários workers (app/utils/metrics.py): cada
+worker grava seus valores em PROMETHEUS_MULTIPROC_DIR e /metrics soma todos.
+A pasta é limpa ao iniciar o servidor e os valores "ao vivo" de um worker
+que saiu (conexões em uso no pool) deixam de ser somados.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+worker_class = 'gthread'
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+
+# Os workers não iniciam a thread de envio; o processo único fica a cargo do master
+EMAIL_SENDER = os.environ.get('EMAIL_OUTBOX_WORKER', 'true').lower() == 'true'
+os.environ['EMAIL_OUTBOX_WORKER'] = 'false'
+EMAIL_SENDER_CHECK = 5  # segundos
+EMAIL_SENDER_MAX_BACKOFF = 300  # segundos
+
+# Precisa estar definida antes de a aplicação importar o prometheus_client
+PROMETHEUS_MULTIPROC_DIR = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'ecclesia_prometheus'))
+
+
+def on_starting(server):
+    shutil.rmtree(PROMETHEUS_MULTIPROC_DIR, ignore_errors=True)
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def _start_email_sender(server):
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'enviar_emails.py')
+    server.email_sender = subprocess.Popen([sys.executable, script, '--loop'])
+    server.log.info(f"Envio de e-mails em processo único (pid {server.email_sender.pid})")
+
+
+def _supervise_email_sender(server, stop):
+    """Reinicia o processo de envio quando ele sai (espera dobra a cada queda seguida)"""
+    backoff = EMAIL_SENDER_CHECK
+    while not stop.wait(EMAIL_SENDER_CHECK):
+        # Se o arbiter já colheu o processo (SIGCHLD), poll() devolve 0 em vez de None
+        code = server.email_sender.poll()
+        if code is None:
+            backoff = EMAIL_SENDER_CHECK
+            continue
+        server.log.error(f"Processo de envio de e-mails saiu (código {code}); reiniciando em {backoff}s")
+        if stop.wait(backoff):
+            break
+        _start_email_sender(server)
+        backoff = min(backoff * 2, EMAIL_SENDER_MAX_BACKOFF)
+
+
+def when_ready(server):
+    if EMAIL_SENDER:
+        # Guardado no arbiter: este módulo é executado de novo num reload (HUP)
+        _start_email_sender(server)
+        server.email_sender_stop = threading.Event()
+        threading.Thread(target=_supervise_email_sender, args=(server, server.email_sender_stop),
+                         name='email-sender-monitor', daemon=True).start()
+
+
+def on_exit(server):
+    stop = getattr(server, 'email_sender_stop', None)
+    if stop is not None:
+        stop.set()
+    sender = getattr(server, 'email_sender', None)
+    if sender is not None and sender.poll() is None:
+        sender.terminate()
+        try:
+            sender.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            sender.kill()
@@ -45,6 +45,18 @@ target_db = current_app.extensions['migrate'].db
 # ... etc.
 
 
+# Estruturas criadas por SQL próprio (fora dos modelos): o autogenerate não
+# pode propor apagá-las. O FTS5 do SQLite cria tabelas-sombra com o mesmo
+# prefixo (search_index_data, _idx, _config, _docsize, _content)
+IGNORED_NAME_PREFIXES = ('search_index', 'search_documents', 'member_search', 'ix_user_search_trgm')
+
+
+def include_name(name, type_, parent_names):
+    if type_ in ('table', 'index') and name and name.startswith(IGNORED_NAME_PREFIXES):
+        return False
+    return True
+
+
 def get_metadata():
     if hasattr(target_db, 'metadatas'):
         return target_db.metadatas[None]
@@ -65,7 +77,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_name=include_name
     )
 
     with context.begin_transaction():
@@ -93,6 +106,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_name", include_name)
 
     connectable = get_engine()
 
@@ -0,0 +1,44 @@
+"""Add rendered HTML cache to Study
+
+Revision ID: a1c3e5f7b901
+Revises: e18eaa16e127
+Create Date: 2026-10-19 09:12:40.118233
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c3e5f7b901'
+down_revision = 'e18eaa16e127'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('study', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('content_html', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+    # Preenche o cache dos estudos existentes (as páginas não gravam no GET)
+    from app.utils.content_render import content_hash, render_markdown_safe
+    bind = op.get_bind()
+    study = sa.table('study', sa.column('id', sa.Integer), sa.column('content', sa.Text),
+                     sa.column('content_html', sa.Text), sa.column('content_hash', sa.String))
+    last_id = 0
+    while True:
+        lote = bind.execute(sa.select(study.c.id, study.c.content)
+                            .where(study.c.id > last_id).order_by(study.c.id).limit(50)).all()
+        if not lote:
+            break
+        for row in lote:
+            bind.execute(study.update().where(study.c.id == row.id).values(
+                content_html=render_markdown_safe(row.content), content_hash=content_hash(row.content)))
+        last_id = lote[-1].id
+
+
+def downgrade():
+    with op.batch_alter_table('study', schema=None) as batch_op:
+        batch_op.drop_column('content_hash')
+        batch_op.drop_column('content_html')
@@ -0,0 +1,26 @@
+"""Add weekly digest opt-in to user
+
+Revision ID: a7c9e1f3b264
+Revises: f2b4d6e8a153
+Create Date: 2026-10-19 21:02:51.207315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c9e1f3b264'
+down_revision = 'f2b4d6e8a153'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('weekly_digest', sa.Boolean(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('weekly_digest')
@@ -0,0 +1,26 @@
+"""Add compiled stylesheet file to church theme
+
+Revision ID: b3d5f7a9c186
+Revises: a7c9e1f3b264
+Create Date: 2026-10-19 22:14:37.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d5f7a9c186'
+down_revision = 'a7c9e1f3b264'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('church_themes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('css_file', sa.String(length=100), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('church_themes', schema=None) as batch_op:
+        batch_op.drop_column('css_file')
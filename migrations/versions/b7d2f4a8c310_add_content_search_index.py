@@ -0,0 +1,34 @@
+"""Add full-text search index for studies, devotionals and Bible stories
+
+Revision ID: b7d2f4a8c310
+Revises: a1c3e5f7b901
+Create Date: 2026-10-19 11:03:27.540912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d2f4a8c310'
+down_revision = 'a1c3e5f7b901'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 (SQLite) ou tsvector + GIN (PostgreSQL), conforme o banco
+    # e já indexado com o conteúdo existente (a busca não fica vazia após o upgrade)
+    from app.utils.search_index import create_search_schema, fill_search_index
+    bind = op.get_bind()
+    create_search_schema(bind)
+    fill_search_index(bind)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP TABLE IF EXISTS search_documents")
+        op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS pt_unaccent")
+    else:
+        op.execute("DROP TABLE IF EXISTS search_index")
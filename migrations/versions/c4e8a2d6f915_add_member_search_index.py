@@ -0,0 +1,35 @@
+"""Add trigram search index for members
+
+Revision ID: c4e8a2d6f915
+Revises: b7d2f4a8c310
+Create Date: 2026-10-19 14:22:51.307416
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a2d6f915'
+down_revision = 'b7d2f4a8c310'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 trigram (SQLite) ou pg_trgm + unaccent (PostgreSQL), conforme o banco
+    # SQLite: já indexado com os membros existentes (a busca não fica vazia após o upgrade)
+    from app.utils.member_search import create_member_search_schema, fill_member_index
+    bind = op.get_bind()
+    create_member_search_schema(bind)
+    if bind.dialect.name == 'sqlite':
+        fill_member_index(bind)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_user_search_trgm")
+        op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
+    else:
+        op.execute("DROP TABLE IF EXISTS member_search")
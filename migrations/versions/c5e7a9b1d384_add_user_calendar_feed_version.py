@@ -0,0 +1,26 @@
+"""Add calendar feed version to user
+
+Revision ID: c5e7a9b1d384
+Revises: b3d5f7a9c186
+Create Date: 2026-10-20 09:12:41.204117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e7a9b1d384'
+down_revision = 'b3d5f7a9c186'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('calendar_feed_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('calendar_feed_version')
@@ -0,0 +1,38 @@
+"""Add indexed birthday key to User
+
+Revision ID: d9b1c3e5a727
+Revises: c4e8a2d6f915
+Create Date: 2026-10-19 16:40:12.884105
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9b1c3e5a727'
+down_revision = 'c4e8a2d6f915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('birthday_key', sa.SmallInteger(), nullable=True))
+        batch_op.create_index('ix_user_church_birthday', ['church_id', 'birthday_key'], unique=False)
+
+    # Preencher a chave MMDD a partir das datas de nascimento existentes
+    bind = op.get_bind()
+    user_table = sa.table('user', sa.column('id', sa.Integer), sa.column('birth_date', sa.Date),
+                          sa.column('birthday_key', sa.SmallInteger))
+    rows = bind.execute(sa.select(user_table.c.id, user_table.c.birth_date)
+                        .where(user_table.c.birth_date.isnot(None))).fetchall()
+    for row in rows:
+        bind.execute(user_table.update().where(user_table.c.id == row.id)
+                     .values(birthday_key=row.birth_date.month * 100 + row.birth_date.day))
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_church_birthday')
+        batch_op.drop_column('birthday_key')
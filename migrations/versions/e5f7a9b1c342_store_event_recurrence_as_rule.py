@@ -0,0 +1,63 @@
+"""Store event recurrence as a rule instead of materialized copies
+
+Revision ID: e5f7a9b1c342
+Revises: d9b1c3e5a727
+Create Date: 2026-10-19 18:05:33.671920
+
+"""
+from datetime import timedelta
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5f7a9b1c342'
+down_revision = 'd9b1c3e5a727'
+branch_labels = None
+depends_on = None
+
+# Quantidade de cópias que create_recurring_events gerava por série
+LEGACY_COPIES = 12
+
+
+def upgrade():
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('recurrence_rule', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('recurrence_until', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('recurrence_exceptions', sa.JSON(), nullable=True))
+        batch_op.create_index('ix_event_church_start', ['church_id', 'start_time'], unique=False)
+
+    bind = op.get_bind()
+    event = sa.table('event',
+                     sa.column('id', sa.Integer), sa.column('title', sa.String),
+                     sa.column('start_time', sa.DateTime), sa.column('church_id', sa.Integer),
+                     sa.column('ministry_id', sa.Integer), sa.column('recurrence', sa.String),
+                     sa.column('recurrence_rule', sa.String))
+
+    series = bind.execute(sa.select(event).where(event.c.recurrence.in_(['weekly', 'monthly']))).fetchall()
+    for base in series:
+        if base.recurrence == 'weekly':
+            rule = "FREQ=WEEKLY;INTERVAL=1"
+            copies = [base.start_time + timedelta(weeks=i) for i in range(1, LEGACY_COPIES)]
+        else:
+            rule = f"FREQ=MONTHLY;INTERVAL=1;BYMONTHDAY={base.start_time.day}"
+            copies = [base.start_time + timedelta(days=30 * i) for i in range(1, LEGACY_COPIES)]
+
+        bind.execute(event.update().where(event.c.id == base.id).values(recurrence_rule=rule))
+
+        # Remover as cópias geradas pelo modelo antigo (agora calculadas pela regra)
+        bind.execute(event.delete().where(
+            event.c.title == base.title,
+            event.c.church_id == base.church_id,
+            (event.c.ministry_id == base.ministry_id) if base.ministry_id is not None else event.c.ministry_id.is_(None),
+            event.c.recurrence == 'none',
+            event.c.start_time.in_(copies)
+        ))
+
+
+def downgrade():
+    with op.batch_alter_table('event', schema=None) as batch_op:
+        batch_op.drop_index('ix_event_church_start')
+        batch_op.drop_column('recurrence_exceptions')
+        batch_op.drop_column('recurrence_until')
+        batch_op.drop_column('recurrence_rule')
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Script para (re)criar os índices de busca (conteúdo e membros)
+Uso: python3 reindexar_busca.py [--check] [--query TEXTO] [--membro TEXTO]
+"""
+
+import os
+import sys
+
+# Adicionar o diretório do projeto ao path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.core.models import db
+from app.core.models import User
+from app.utils.search_index import rebuild_search_index, is_index_ready, search, DOC_TYPES
+from app.utils.member_search import rebuild_member_index, search_member_ids
+from app.utils import member_search
+
+app = create_app()
+
+def reindexar():
+    """Cria o índice (se necessário) e indexa todo o conteúdo"""
+    with app.app_context():
+        print(f"🔎 Banco: {db.engine.dialect.name}")
+        totais = rebuild_search_index()
+        for doc_type, total in totais.items():
+            print(f"  ✅ {doc_type}: {total} documento(s) indexado(s)")
+        membros = rebuild_member_index()
+        print(f"  ✅ membros: {membros} indexado(s)")
+        print("\n" + "="*50)
+        print(f"✅ Índices reconstruídos! {sum(totais.values())} documento(s) e {membros} membro(s).")
+
+def verificar_indice():
+    """Mostra se o índice existe e quantos documentos há em cada tabela"""
+    with app.app_context():
+        print(f"📊 Índice disponível: {'sim' if is_index_ready() else 'não'}")
+        for doc_type, (model, _) in DOC_TYPES.items():
+            print(f"📊 {doc_type}: {model.query.count()} registro(s)")
+        print(f"📊 Índice de membros disponível: {'sim' if member_search.is_index_ready() else 'não'}")
+        print(f"📊 membros: {User.query.count()} registro(s)")
+
+def testar_busca(texto):
+    """Executa uma busca e mostra os resultados"""
+    with app.test_request_context():
+        resultados = search(texto, limit=10)
+        print(f"🔎 {len(resultados)} resultado(s) para '{texto}':")
+        for r in resultados:
+            print(f"  - [{r['type']}] {r['title']} (score {r['score']})")
+
+def testar_busca_membros(texto):
+    """Executa uma busca de membros e mostra os resultados"""
+    with app.app_context():
+        ids = search_member_ids(texto, limit=10)
+        membros = {u.id: u for u in User.query.filter(User.id.in_(ids)).all()} if ids else {}
+        print(f"🔎 {len(ids)} membro(s) para '{texto}':")
+        for user_id in ids:
+            print(f"  - {membros[user_id].name} <{membros[user_id].email}>")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Reconstruir os índices de busca')
+    parser.add_argument('--check', action='store_true', help='Apenas verificar o estado do índice')
+    parser.add_argument('--query', type=str, help='Testar uma busca no índice')
+    parser.add_argument('--membro', type=str, help='Testar uma busca de membros')
+
+    args = parser.parse_args()
+
+    if args.check:
+        verificar_indice()
+    elif args.query:
+        testar_busca(args.query)
+    elif args.membro:
+        testar_busca_membros(args.membro)
+    else:
+        reindexar()
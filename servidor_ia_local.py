@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Servidor HTTP local que imita os provedores de IA (sem acesso à internet)
+- Gemini: geração de conteúdo em JSON + upload de arquivos (Files API)
+- Pollinations: geração de imagens
+
+Uso: python3 servidor_ia_local.py [--port 8765] [--latency 0.5] [--failure-rate 0.1]
+Depois aponte a aplicação para ele:
+    GEMINI_BASE_URL=http://127.0.0.1:8765 POLLINATIONS_BASE_URL=http://127.0.0.1:8765 GEMINI_API_KEY=local
+"""
+
+import io
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+class StubState:
+    """Configuração e contadores do servidor"""
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, processing_polls=1):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.processing_polls = processing_polls
+        self.lock = threading.Lock()
+        self.counters = {'generate': 0, 'upload': 0, 'file_get': 0, 'image': 0, 'failures': 0}
+        self.files = {}  # id -> número de consultas de estado
+        self.next_id = 0
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def new_file(self):
+        with self.lock:
+            self.next_id += 1
+            self.files[self.next_id] = 0
+            return self.next_id
+
+
+def _png_bytes():
+    """Imagem pequena para as respostas de geração de imagem"""
+    try:
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 64), (255, 200, 80)).save(buffer, format='PNG')
+        return buffer.getvalue()
+    except ImportError:
+        return b'\x89PNG\r\n\x1a\n'
+
+
+PNG = _png_bytes()
+
+
+def _fake_questions(prompt, kids):
+    """Questões fictícias no formato esperado pelo gemini_service"""
+    match = re.search(r'(?:Crie|Gere)\s+(\d+)', prompt)
+    count = int(match.group(1)) if match else 7
+    tag = random.randint(1000, 9999)
+    letters = ['A', 'B', 'C'] if kids else ['A', 'B', 'C', 'D']
+    data = {'questions': [
+        {
+            'question': f'Pergunta de teste {tag}-{i + 1}?',
+            'options': {letter: f'Opção {letter}' for letter in letters},
+            'correct_option': random.choice(letters),
+            'explanation': 'Resposta gerada pelo servidor local.'
+        }
+        for i in range(count)
+    ]}
+    if kids:
+        data['game_words'] = ['ARCA', 'NOE', 'CHUVA', 'POMBA', 'ARCOIRIS', 'ANIMAIS', 'DEUS', 'FAMILIA']
+    return data
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def _delay_or_fail(self):
+        """Aplica a latência configurada; retorna True se deve simular falha"""
+        delay = self.state.latency + random.uniform(0, self.state.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if self.state.failure_rate and random.random() < self.state.failure_rate:
+            self.state.count('failures')
+            self._send(503, {'error': {'code': 503, 'message': 'Falha simulada', 'status': 'UNAVAILABLE'}})
+            return True
+        return False
+
+    def _send(self, status, payload=None, body=None, content_type='application/json', headers=None):
+        if body is None:
+            body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _file_payload(self, file_id, state):
+        return {
+            'name': f'files/stub{file_id}',
+            'uri': f'http://{self.headers.get("Host")}/v1beta/files/stub{file_id}',
+            'mimeType': 'application/pdf',
+            'state': state,
+        }
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+
+        if path == '/_stats':
+            with self.state.lock:
+                return self._send(200, dict(self.state.counters))
+
+        # Pollinations: GET /prompt/<texto>
+        if path.startswith('/prompt/'):
+            self.state.count('image')
+            if self._delay_or_fail():
+                return
+            return self._send(200, body=PNG, content_type='image/png')
+
+        # Gemini Files API: estado do arquivo
+        match = re.match(r'^/v1beta/files/stub(\d+)$', path)
+        if match:
+            self.state.count('file_get')
+            file_id = int(match.group(1))
+            with self.state.lock:
+                polls = self.state.files.get(file_id)
+                if polls is not None:
+                    self.state.files[file_id] = polls + 1
+            if polls is None:
+                return self._send(404, {'error': {'code': 404, 'message': 'Arquivo não encontrado', 'status': 'NOT_FOUND'}})
+            state = 'ACTIVE' if polls + 1 >= self.state.processing_polls else 'PROCESSING'
+            return self._send(200, self._file_payload(file_id, state))
+
+        self._send(404, {'error': {'code': 404, 'message': 'Rota não encontrada', 'status': 'NOT_FOUND'}})
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+
+        # Gemini Files API: upload em duas etapas (início + envio/finalização)
+        if path == '/upload/v1beta/files':
+            session = f'http://{self.headers.get("Host")}/upload/session/{random.getrandbits(32)}'
+            return self._send(200, {}, headers={'X-Goog-Upload-URL': session})
+        if path.startswith('/upload/session/'):
+            self.state.count('upload')
+            if self._delay_or_fail():
+                return
+            file_id = self.state.new_file()
+            state = 'PROCESSING' if self.state.processing_polls else 'ACTIVE'
+            return self._send(200, {'file': self._file_payload(file_id, state)},
+                              headers={'X-Goog-Upload-Status': 'final'})
+
+        # Gemini: generateContent
+        if path.endswith(':generateContent'):
+            self.state.count('generate')
+            if self._delay_or_fail():
+                return
+            try:
+                request_data = json.loads(raw or b'{}')
+            except ValueError:
+                request_data = {}
+            prompt = ' '.join(
+                part.get('text', '')
+                for content in request_data.get('contents', [])
+                for part in content.get('parts', [])
+            )
+            kids = 'crianças' in prompt
+            text = json.dumps(_fake_questions(prompt, kids), ensure_ascii=False)
+            return self._send(200, {
+                'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}, 'finishReason': 'STOP'}],
+                'modelVersion': 'stub'
+            })
+
+        self._send(404, {'error': {'code': 404, 'message': 'Rota não encontrada', 'status': 'NOT_FOUND'}})
+
+
+def start_stub_server(port=0, latency=0.0, jitter=0.0, failure_rate=0.0, processing_polls=1):
+    """Inicia o servidor em uma thread; retorna o servidor (server.url, server.state)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    server.daemon_threads = True
+    server.state = StubState(latency, jitter, failure_rate, processing_polls)
+    server.url = f'http://127.0.0.1:{server.server_port}'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Servidor local que imita os provedores de IA')
+    parser.add_argument('--port', type=int, default=8765, help='Porta (padrão 8765)')
+    parser.add_argument('--latency', type=float, default=0.5, help='Latência por chamada em segundos')
+    parser.add_argument('--jitter', type=float, default=0.2, help='Variação aleatória extra da latência')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fração de chamadas que retornam 503 (0 a 1)')
+    parser.add_argument('--processing-polls', type=int, default=1, help='Consultas até o arquivo ficar ACTIVE')
+
+    args = parser.parse_args()
+
+    servidor = start_stub_server(args.port, args.latency, args.jitter, args.failure_rate, args.processing_polls)
+    print(f"🤖 Servidor de IA local em {servidor.url}")
+    print(f"   GEMINI_BASE_URL={servidor.url} POLLINATIONS_BASE_URL={servidor.url} GEMINI_API_KEY=local")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        servidor.shutdown()
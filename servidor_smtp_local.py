@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Servidor SMTP local que só recebe e conta as mensagens (não entrega nada)
+- sem TLS/login; aceita qualquer remetente/destinatário
+- latência opcional na abertura da conexão (simula STARTTLS + login)
+- taxa opcional de falhas temporárias (451) no DATA
+
+Uso: python3 servidor_smtp_local.py [--port 8025] [--connect-latency 0.2] [--failure-rate 0.1]
+Depois aponte a aplicação para ele:
+    SMTP_SINK=127.0.0.1:8025
+(o aiosmtpd também serve: python -m aiosmtpd -n -l 127.0.0.1:8025)
+"""
+
+import random
+import socketserver
+import threading
+import time
+
+
+class SinkState:
+    """Configuração, contadores e mensagens recebidas"""
+
+    def __init__(self, connect_latency=0.0, failure_rate=0.0, keep_messages=True):
+        self.connect_latency = connect_latency
+        self.failure_rate = failure_rate
+        self.keep_messages = keep_messages
+        self.lock = threading.Lock()
+        self.counters = {'connections': 0, 'messages': 0, 'recipients': 0, 'failures': 0}
+        self.messages = []  # (remetente, [destinatários], conteúdo)
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    timeout = 60
+
+    def reply(self, line):
+        self.wfile.write((line + '\r\n').encode('ascii'))
+
+    def handle(self):
+        state = self.server.state
+        if state.connect_latency:
+            time.sleep(state.connect_latency)
+        state.count('connections')
+        self.reply('220 localhost Servidor SMTP local')
+
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command[:4].upper()
+
+            if verb == 'EHLO':
+                self.reply('250-localhost')
+                self.reply('250-8BITMIME')
+                self.reply('250 SIZE 33554432')
+            elif verb == 'HELO':
+                self.reply('250 localhost')
+            elif verb == 'MAIL':
+                sender, recipients = command[10:].split(' ')[0].strip('<>'), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command[8:].split(' ')[0].strip('<>'))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 Envie a mensagem; termine com <CRLF>.<CRLF>')
+                content = self._read_data()
+                if state.failure_rate and random.random() < state.failure_rate:
+                    state.count('failures')
+                    self.reply('451 4.3.0 Falha temporaria simulada')
+                else:
+                    state.count('messages')
+                    state.count('recipients', len(recipients))
+                    if state.keep_messages:
+                        with state.lock:
+                            state.messages.append((sender, recipients, content))
+                    self.reply('250 OK')
+                sender, recipients = None, []
+            elif verb in ('RSET', 'NOOP'):
+                if verb == 'RSET':
+                    sender, recipients = None, []
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Ate logo')
+                return
+            else:
+                self.reply('502 Comando nao implementado')
+
+    def _read_data(self):
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b'.\r\n', b'.\n'):
+                break
+            lines.append(line[1:] if line.startswith(b'..') else line)
+        return b''.join(lines)
+
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    @property
+    def address(self):
+        """Valor para SMTP_SINK"""
+        host, port = self.server_address[:2]
+        return f"{host}:{port}"
+
+
+def start_smtp_sink(port=0, connect_latency=0.0, failure_rate=0.0, keep_messages=True):
+    """Inicia o servidor em uma thread; retorna o servidor (server.address, server.state)"""
+    server = SinkServer(('127.0.0.1', port), SinkHandler)
+    server.state = SinkState(connect_latency, failure_rate, keep_messages)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Servidor SMTP local para testes e benchmarks')
+    parser.add_argument('--port', type=int, default=8025, help='Porta (padrão: 8025)')
+    parser.add_argument('--connect-latency', type=float, default=0.0, help='Atraso ao abrir cada conexão (s)')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fração de mensagens recusadas com 451')
+
+    args = parser.parse_args()
+    servidor = start_smtp_sink(args.port, args.connect_latency, args.failure_rate, keep_messages=False)
+    print(f"📮 Servidor SMTP local em {servidor.address} (SMTP_SINK={servidor.address})")
+    try:
+        while True:
+            time.sleep(10)
+            print(f"   {servidor.state.counters}")
+    except KeyboardInterrupt:
+        servidor.shutdown()